@@ -0,0 +1,130 @@
+"""Casos del banco de pruebas del ciclo principal del juego.
+
+Cada caso es una función que prepara el estado y devuelve (run, after): run
+es la llamada que se mide y after, si no es None, se ejecuta sin medir
+después de cada llamada (por ejemplo para deshacer un movimiento).
+"""
+from typing import Callable, Dict, Tuple, Union
+
+from domino.game import Game
+from domino.match import Match
+from domino.piece import DOUBLE_NINE, DOUBLE_SIX, DOUBLE_TWELVE, PieceSet
+from domino.player import ALL_PLAYERS, PLAYER1, PLAYER2, Player
+
+
+Case = Callable[[], Tuple[Callable[[], object], Union[Callable[[], object], None]]]
+
+
+def play_to_end(game: Game) -> Game:
+    """Juega la partida como el ciclo de main.py, hasta que un jugador se 
+    queda sin fichas o todos pasan seguidos."""
+    players = game.players
+    passes = 0
+    turn = 0
+
+    while passes < len(players) and all(game.get_player_pieces_count(p) for p in players):
+        movement = players[turn % len(players)].play(game)
+        passes = 0 if movement else passes + 1
+        turn += 1
+
+    return game
+
+
+def _mid_game(plies: int = 8, seed: int = 1, 
+              piece_set: PieceSet = DOUBLE_SIX) -> Tuple[Game, Player]:
+    """Partida de dos jugadores tras algunos turnos, y un jugador que tiene 
+    fichas para jugar."""
+    game = Game.create(PLAYER1, PLAYER2, seed=seed, piece_set=piece_set)
+    for turn in range(plies):
+        game.players[turn % 2].play(game)
+
+    for player in game.players:
+        if game.get_player_pieces_for_current_play(player):
+            return game, player
+    return _mid_game(plies, seed + 1, piece_set)
+
+
+def game_create():
+    return (lambda: Game.create(PLAYER1, PLAYER2)), None
+
+
+def record_move():
+    game, player = _mid_game()
+    piece, side = game.get_player_pieces_for_current_play(player)[0]
+    record = game.record
+
+    def run():
+        record.move(piece, player, game.table, side)
+
+    return run, record.undo
+
+
+def build_row():
+    game, _ = _mid_game()
+    return game.record.build_row, None
+
+
+def get_player_pieces_for_current_play():
+    game, player = _mid_game()
+    return (lambda: game.get_player_pieces_for_current_play(player)), None
+
+
+def get_row_pieces_values_in_correct_alignament():
+    game, _ = _mid_game()
+    return game.record.get_row_pieces_values_in_correct_alignament, None
+
+
+def aligned_row():
+    game, _ = _mid_game()
+    return (lambda: list(game.record.aligned_row)), None
+
+
+def _player_turn(piece_set: PieceSet) -> Case:
+    """Un turno completo (Player.play) a mitad de partida con el juego de 
+    fichas indicado; el costo no debe crecer con el tamaño del juego."""
+    def case():
+        game, player = _mid_game(piece_set=piece_set)
+        return (lambda: player.play(game)), game.record.undo
+    return case
+
+
+def full_game_2_players():
+    return (lambda: play_to_end(Game.create(PLAYER1, PLAYER2))), None
+
+
+def full_game_4_players():
+    return (lambda: play_to_end(Game.create(*ALL_PLAYERS))), None
+
+
+def full_game_run_2_players():
+    """Como full_game_2_players, con Game.run en vez del ciclo de main.py."""
+    return (lambda: Game.create(PLAYER1, PLAYER2).run()), None
+
+
+def full_game_run_4_players():
+    return (lambda: Game.create(*ALL_PLAYERS).run()), None
+
+
+def match_round_4_players():
+    """Una ronda de una partida a puntos; debe costar lo mismo que 
+    full_game_4_players aunque la partida lleve muchas rondas."""
+    match = Match(ALL_PLAYERS, target=10 ** 9, teams=True, seed=1)
+    return match.play_round, None
+
+
+CASES: Dict[str, Case] = {
+    "game_create": game_create,
+    "record_move": record_move,
+    "build_row": build_row,
+    "get_player_pieces_for_current_play": get_player_pieces_for_current_play,
+    "get_row_pieces_values_in_correct_alignament": get_row_pieces_values_in_correct_alignament,
+    "aligned_row": aligned_row,
+    "full_game_2_players": full_game_2_players,
+    "full_game_4_players": full_game_4_players,
+    "full_game_run_2_players": full_game_run_2_players,
+    "full_game_run_4_players": full_game_run_4_players,
+    "match_round_4_players": match_round_4_players,
+}
+
+for _piece_set in (DOUBLE_SIX, DOUBLE_NINE, DOUBLE_TWELVE):
+    CASES["player_turn[%s]" % _piece_set] = _player_turn(_piece_set)
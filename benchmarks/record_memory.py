@@ -0,0 +1,52 @@
+"""Compara la memoria de GameRecord en modo normal y compacto.
+
+Uso:
+
+    python -m benchmarks.record_memory [partidas]
+"""
+import gc
+import sys
+import tracemalloc
+from typing import List
+
+from domino.game import Game
+from domino.player import PLAYER1, PLAYER2
+from domino.record import GameRecord
+
+from .cases import play_to_end
+
+
+def play_game(compact: bool, seed: int = None) -> GameRecord:
+    return play_to_end(Game.create(PLAYER1, PLAYER2, compact=compact, seed=seed)).record
+
+
+def measure(games: int, compact: bool, seed: int = 1) -> int:
+    """Bytes retenidos por los registros de las partidas terminadas."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    records: List[GameRecord] = [play_game(compact, seed + n) for n in range(games)]
+
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    return after - before
+
+
+def main(*args):
+    games = int(args[0]) if args else 1000
+
+    normal = measure(games, compact=False)
+    compact = measure(games, compact=True)
+
+    print("games: %d" % games)
+    print("normal:  %8.1f KiB per 1000 games" % (normal / games * 1000 / 1024))
+    print("compact: %8.1f KiB per 1000 games" % (compact / games * 1000 / 1024))
+    print("ratio:   %8.1fx" % (normal / compact))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv[1:]))
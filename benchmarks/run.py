@@ -0,0 +1,167 @@
+"""Ejecuta el banco de pruebas y lo compara con una línea base.
+
+Uso:
+
+    python -m benchmarks.run                    # mide y escribe results.json
+    python -m benchmarks.run --save-baseline    # guarda la línea base
+    python -m benchmarks.run --threshold 0.15   # falla si algo empeora > 15 %
+
+El resultado de cada caso incluye operaciones por segundo, percentiles de
+latencia por llamada (en microsegundos) y el pico de memoria durante las
+llamadas. Con una línea base guardada, el programa termina con código 1 si
+la latencia mediana de algún caso empeora más del umbral o su memoria lo 
+supera.
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+
+from .cases import CASES, Case
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RESULTS_PATH = os.path.join(HERE, "results.json")
+BASELINE_PATH = os.path.join(HERE, "baseline.json")
+
+# Diferencia de memoria que no se considera regresión, en KiB.
+MEMORY_SLACK_KIB = 16
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+def measure(case: Case, min_time: float, min_calls: int, memory_calls: int) -> Dict:
+    run, after = case()
+    timer = time.perf_counter_ns
+
+    # Calentamiento.
+    for _ in range(min(10, min_calls)):
+        run()
+        if after:
+            after()
+
+    latencies: List[int] = []
+    deadline = time.perf_counter() + min_time
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        while len(latencies) < min_calls or time.perf_counter() < deadline:
+            started = timer()
+            run()
+            latencies.append(timer() - started)
+            if after:
+                after()
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    run, after = case()
+    gc.collect()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    for _ in range(memory_calls):
+        run()
+        if after:
+            after()
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    total = sum(latencies)
+    micro = [latency / 1000 for latency in latencies]
+    return {
+        "calls": len(latencies),
+        "ops_per_sec": len(latencies) / (total / 1e9) if total else 0.0,
+        "mean_us": sum(micro) / len(micro),
+        "p50_us": percentile(micro, 0.50),
+        "p90_us": percentile(micro, 0.90),
+        "p99_us": percentile(micro, 0.99),
+        "peak_kib": peak / 1024,
+    }
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Obtiene la descripción de cada regresión respecto a la línea base."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+
+        # Se compara la mediana, menos sensible a pausas del sistema que la 
+        # media de la que sale ops_per_sec.
+        if result["p50_us"] > base["p50_us"] * (1 + threshold):
+            regressions.append("%s: p50 %.1f us, baseline %.1f us" % (
+                name, result["p50_us"], base["p50_us"]))
+
+        limit = base["peak_kib"] * (1 + threshold) + MEMORY_SLACK_KIB
+        if result["peak_kib"] > limit:
+            regressions.append("%s: peak %.1f KiB, baseline %.1f KiB" % (
+                name, result["peak_kib"], base["peak_kib"]))
+    return regressions
+
+
+def main(*args):
+    parser = argparse.ArgumentParser(prog="benchmarks.run")
+    parser.add_argument("cases", nargs="*", help="Casos a ejecutar (todos por defecto).")
+    parser.add_argument("--min-time", type=float, default=0.5)
+    parser.add_argument("--min-calls", type=int, default=20)
+    parser.add_argument("--memory-calls", type=int, default=20)
+    parser.add_argument("--output", default=RESULTS_PATH)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    options = parser.parse_args(args or None)
+
+    names = options.cases or list(CASES)
+    unknown = [name for name in names if name not in CASES]
+    if unknown:
+        parser.error("unknown cases: %s" % ", ".join(unknown))
+
+    results = {}
+    # Algunos casos imprimen; no se mide la salida por consola.
+    with open(os.devnull, "w") as devnull:
+        for name in names:
+            with contextlib.redirect_stdout(devnull):
+                result = measure(CASES[name], options.min_time, options.min_calls,
+                                 options.memory_calls)
+            results[name] = result
+            print("%-45s %12.0f ops/s  p50 %9.1f us  p99 %9.1f us  peak %8.1f KiB" % (
+                name, result["ops_per_sec"], result["p50_us"], result["p99_us"],
+                result["peak_kib"]))
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    path = options.baseline if options.save_baseline else options.output
+    with open(path, "w") as file:
+        json.dump(report, file, indent=2)
+    print("written %s" % path)
+
+    if options.save_baseline or not os.path.exists(options.baseline):
+        return 0
+
+    with open(options.baseline) as file:
+        baseline = json.load(file)["results"]
+
+    regressions = compare(results, baseline, options.threshold)
+    for regression in regressions:
+        print("REGRESSION %s" % regression)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv[1:]))
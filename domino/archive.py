@@ -0,0 +1,177 @@
+"""Archivo binario de partidas.
+
+Formato (enteros little-endian):
+
+    cabecera   MAGIC (8 bytes), versión (uint16), flags (uint16), 4 bytes libres
+    partidas   por cada una: largo (uint32) y los movimientos de
+               GameRecord.to_bytes(), comprimidos con zlib si FLAG_ZLIB
+    índice     desplazamiento (uint64) de cada partida
+    pie        desplazamiento del índice (uint64) y cantidad de partidas (uint64)
+
+El índice se escribe al cerrar el archivo, por lo que ArchiveWriter no
+guarda las partidas en memoria, solo sus desplazamientos. ArchiveReader
+mapea el archivo con mmap y lee el pie y el índice bajo demanda: abrirlo
+no depende de la cantidad de partidas y la partida k se lee en O(1).
+"""
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+from typing import BinaryIO, Iterator, Sequence
+
+from .exceptions import InvalidArchive
+from .player import Player
+from .record import GameRecord
+
+
+MAGIC = b"DOMINOAR"
+VERSION = 1
+
+# Los movimientos de cada partida están comprimidos con zlib.
+FLAG_ZLIB = 1
+
+_HEADER = struct.Struct("<8sHH4x")
+_FOOTER = struct.Struct("<QQ")
+_LENGTH = struct.Struct("<I")
+_OFFSET = struct.Struct("<Q")
+
+
+class ArchiveWriter:
+    """Escribe partidas en un archivo a medida que se agregan.
+
+    Ejemplo:
+
+        with ArchiveWriter("games.dar", compress=True) as writer:
+            for game in games:
+                writer.write(game.record)
+    """
+
+    def __init__(self, path: str, compress: bool = False, level: int = 6):
+        self.__file: BinaryIO = open(path, "wb")
+        self.__flags = FLAG_ZLIB if compress else 0
+        self.__level = level
+        self.__offsets = array("Q")
+        self.__file.write(_HEADER.pack(MAGIC, VERSION, self.__flags))
+
+    def __len__(self):
+        return len(self.__offsets)
+
+    def __enter__(self) -> 'ArchiveWriter':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        return self.__file.closed
+
+    def write(self, record: GameRecord) -> int:
+        """Agrega la partida al archivo y devuelve su posición."""
+        return self.write_bytes(record.to_bytes())
+
+    def write_bytes(self, data: bytes) -> int:
+        """Agrega una partida ya codificada con GameRecord.to_bytes()."""
+        if self.__flags & FLAG_ZLIB:
+            data = zlib.compress(data, self.__level)
+
+        self.__offsets.append(self.__file.tell())
+        self.__file.write(_LENGTH.pack(len(data)))
+        self.__file.write(data)
+        return len(self.__offsets) - 1
+
+    def close(self) -> None:
+        """Escribe el índice y el pie, y cierra el archivo."""
+        if self.__file.closed:
+            return
+
+        index_offset = self.__file.tell()
+        if self.__offsets.itemsize == _OFFSET.size and sys.byteorder == "little":
+            self.__offsets.tofile(self.__file)
+        else:
+            for offset in self.__offsets:
+                self.__file.write(_OFFSET.pack(offset))
+        self.__file.write(_FOOTER.pack(index_offset, len(self.__offsets)))
+        self.__file.close()
+
+
+class ArchiveReader:
+    """Lee partidas de un archivo escrito con ArchiveWriter.
+
+    Las partidas se reconstruyen como GameRecord solo al pedirlas, con
+    reader[k] o iterando el archivo.
+    """
+
+    def __init__(self, path: str, players: Sequence[Player] = None,
+                 compact: bool = False):
+        self.__players = players
+        self.__compact = compact
+        self.__file = open(path, "rb")
+        self.__mmap = None
+
+        try:
+            self.__mmap = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.__file.close()
+            raise InvalidArchive("The archive %s is empty." % path)
+
+        if len(self.__mmap) < _HEADER.size + _FOOTER.size:
+            self.close()
+            raise InvalidArchive("The archive %s is truncated." % path)
+
+        magic, version, self.__flags = _HEADER.unpack_from(self.__mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise InvalidArchive("The file %s is not a version %d game archive."
+                                 % (path, VERSION))
+
+        self.__index_offset, self.__count = _FOOTER.unpack_from(
+            self.__mmap, len(self.__mmap) - _FOOTER.size)
+
+        if self.__index_offset + self.__count * _OFFSET.size + _FOOTER.size != len(self.__mmap):
+            self.close()
+            raise InvalidArchive("The archive %s was not closed properly." % path)
+
+    def __len__(self):
+        return self.__count
+
+    def __getitem__(self, index: int) -> GameRecord:
+        return GameRecord.from_bytes(self.get_bytes(index), self.__players,
+                                     compact=self.__compact)
+
+    def __iter__(self) -> Iterator[GameRecord]:
+        for index in range(self.__count):
+            yield self[index]
+
+    def __enter__(self) -> 'ArchiveReader':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def compressed(self) -> bool:
+        return bool(self.__flags & FLAG_ZLIB)
+
+    def get_bytes(self, index: int) -> bytes:
+        """Obtiene los movimientos codificados de la partida, sin reconstruirla."""
+        if index < 0:
+            index += self.__count
+        if not 0 <= index < self.__count:
+            raise IndexError("game index out of range")
+
+        offset, = _OFFSET.unpack_from(self.__mmap,
+                                      self.__index_offset + index * _OFFSET.size)
+        length, = _LENGTH.unpack_from(self.__mmap, offset)
+        start = offset + _LENGTH.size
+        data = self.__mmap[start:start + length]
+
+        if self.__flags & FLAG_ZLIB:
+            data = zlib.decompress(data)
+        return data
+
+    def close(self) -> None:
+        if self.__mmap is not None and not self.__mmap.closed:
+            self.__mmap.close()
+        self.__file.close()
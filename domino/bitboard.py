@@ -0,0 +1,212 @@
+from typing import Callable, Iterator, List, NamedTuple, Sequence, Tuple
+
+from .piece import DOUBLE_SIX, Piece, PieceSet
+from .table import Table
+
+
+# Las tablas se generan para todas las fichas de Piece.PIECES, así sirven 
+# para cualquier juego de fichas (cada juego usa un prefijo de los índices). 
+# Cada ficha ocupa el bit indicado por su Piece.index.
+_ALL = PieceSet(Piece.MAX_NUMBER, 1, "all")
+
+# Cantidad de fichas y máscara con todas ellas, del juego por defecto.
+PIECES_COUNT = DOUBLE_SIX.count
+ALL_PIECES_MASK = DOUBLE_SIX.mask
+
+# Valor de los extremos cuando aún no se ha jugado ninguna ficha.
+EMPTY = -1
+
+# Máscara de las fichas que llevan cada número.
+NUMBER_MASKS: Tuple[int, ...] = _ALL.number_masks
+
+# Puntos de cada ficha según su índice.
+PIECES_PIPS: Tuple[int, ...] = _ALL.pips
+
+# Máscara de los dobles.
+DOUBLES_MASK = _ALL.doubles_mask
+
+# OTHER_NUMBER[i][n] es el número que queda expuesto al poner la ficha i
+# sobre un extremo n (o EMPTY si no encaja).
+OTHER_NUMBER: Tuple[Tuple[int, ...], ...] = _ALL.other_number
+
+# Suma de puntos por bloques de 7 bits, para contar los puntos de una mano
+# con una búsqueda por bloque en vez de recorrer sus bits.
+_CHUNK = 7
+_PIPS_CHUNKS: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(
+        sum(PIECES_PIPS[offset + i] for i in range(_CHUNK)
+            if m >> i & 1 and offset + i < len(PIECES_PIPS))
+        for m in range(1 << _CHUNK)
+    )
+    for offset in range(0, len(PIECES_PIPS), _CHUNK)
+)
+
+Move = Tuple[int, int]
+
+
+class BoardState(NamedTuple):
+    """Estado completo de una partida representado con enteros.
+
+    hands: Máscara de las fichas de cada asiento.
+    played: Máscara de las fichas jugadas en la mesa.
+    a, b: Números de los extremos de la fila (EMPTY si está vacía).
+    turn: Asiento al que le toca jugar.
+    passes: Cantidad de pases consecutivos.
+    pieces: Máscara de las fichas del juego (ver PieceSet.mask).
+    """
+    hands: Tuple[int, ...]
+    played: int = 0
+    a: int = EMPTY
+    b: int = EMPTY
+    turn: int = 0
+    passes: int = 0
+    pieces: int = ALL_PIECES_MASK
+
+    @property
+    def stock(self) -> int:
+        """Máscara de las fichas que no tiene nadie ni están jugadas."""
+        mask = self.played
+        for hand in self.hands:
+            mask |= hand
+        return self.pieces & ~mask
+
+    @property
+    def hand(self) -> int:
+        return self.hands[self.turn]
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Itera los índices de los bits activos de la máscara."""
+    while mask:
+        bit = mask & -mask
+        yield bit.bit_length() - 1
+        mask ^= bit
+
+
+def count_pieces(mask: int) -> int:
+    return bin(mask).count("1")
+
+
+def count_pips(mask: int) -> int:
+    """Suma los puntos de las fichas de la máscara."""
+    total = 0
+    for chunk in _PIPS_CHUNKS:
+        if not mask:
+            break
+        total += chunk[mask & 0x7F]
+        mask >>= _CHUNK
+    return total
+
+
+def get_playable_mask(hand: int, a: int, b: int) -> int:
+    """Obtiene la máscara de las fichas de la mano que encajan en la fila."""
+    if a == EMPTY:
+        return hand
+    return hand & (NUMBER_MASKS[a] | NUMBER_MASKS[b])
+
+
+def get_legal_moves(hand: int, a: int, b: int) -> List[Move]:
+    """Obtiene todos los pares (índice de ficha, lado) jugables.
+
+    Una ficha que encaje en ambos extremos aparece una vez por cada lado.
+    """
+    if a == EMPTY:
+        return [(i, Table.A) for i in iter_bits(hand)]
+
+    moves = []
+    for i in iter_bits(hand & (NUMBER_MASKS[a] | NUMBER_MASKS[b])):
+        other = OTHER_NUMBER[i]
+        if other[a] != EMPTY:
+            moves.append((i, Table.A))
+        if other[b] != EMPTY:
+            moves.append((i, Table.B))
+    return moves
+
+
+def legal_moves(state: BoardState) -> List[Move]:
+    return get_legal_moves(state.hands[state.turn], state.a, state.b)
+
+
+def play(state: BoardState, index: int, side: int) -> BoardState:
+    """Juega la ficha del asiento en turno. No valida el movimiento, se espera
+    que venga de legal_moves."""
+    bit = 1 << index
+    hands = list(state.hands)
+    hands[state.turn] &= ~bit
+    a, b = state.a, state.b
+
+    if a == EMPTY:
+        a, b = Piece.PIECES[index]
+    elif side == Table.A:
+        a = OTHER_NUMBER[index][a]
+    else:
+        b = OTHER_NUMBER[index][b]
+
+    return BoardState(tuple(hands), state.played | bit, a, b,
+                      (state.turn + 1) % len(hands), 0, state.pieces)
+
+
+def pass_turn(state: BoardState) -> BoardState:
+    return state._replace(turn=(state.turn + 1) % len(state.hands),
+                          passes=state.passes + 1)
+
+
+def is_blocked(state: BoardState) -> bool:
+    return state.passes >= len(state.hands)
+
+
+def is_finished(state: BoardState) -> bool:
+    return is_blocked(state) or not all(state.hands)
+
+
+def get_winner(state: BoardState) -> int:
+    """Obtiene el asiento ganador de una partida terminada.
+
+    Gana quien se quedó sin fichas o, si el juego se trancó, quien tenga menos
+    puntos. Devuelve -1 si hay empate o la partida no ha terminado.
+    """
+    for seat, hand in enumerate(state.hands):
+        if not hand:
+            return seat
+
+    if not is_blocked(state):
+        return -1
+
+    pips = [count_pips(hand) for hand in state.hands]
+    lowest = min(pips)
+    if pips.count(lowest) > 1:
+        return -1
+    return pips.index(lowest)
+
+
+def choose_max_piece(state: BoardState, moves: Sequence[Move]) -> Move:
+    """Estrategia por defecto: juega la ficha con más puntos."""
+    return max(moves, key=lambda move: PIECES_PIPS[move[0]])
+
+
+def choose_heaviest_piece(state: BoardState, moves: Sequence[Move]) -> Move:
+    """Juega la ficha con más puntos, prefiriendo los dobles si hay empate."""
+    return max(moves, key=lambda move: PIECES_PIPS[move[0]] * 2
+               + (DOUBLES_MASK >> move[0] & 1))
+
+
+Policy = Callable[[BoardState, Sequence[Move]], Move]
+
+
+def playout(state: BoardState, policies: Sequence[Policy]) -> Tuple[BoardState, int]:
+    """Juega la partida hasta el final con la estrategia de cada asiento.
+
+    Returns:
+        Tuple[BoardState, int]: El estado final y la cantidad de turnos
+        jugados (pases incluidos).
+    """
+    turns = 0
+    while not is_finished(state):
+        moves = legal_moves(state)
+        if moves:
+            index, side = policies[state.turn](state, moves)
+            state = play(state, index, side)
+        else:
+            state = pass_turn(state)
+        turns += 1
+    return state, turns
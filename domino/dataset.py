@@ -0,0 +1,415 @@
+"""Exportación de posiciones de partidas a arreglos para entrenar modelos.
+
+Requiere NumPy. Cada posición es un turno en el que se jugó una ficha, vista
+por el jugador en turno, y ocupa una fila de ancho fijo en cada campo:
+
+    hand       bool (fichas)   Fichas del jugador antes de jugar.
+    played     bool (fichas)   Fichas ya jugadas en la mesa.
+    ends       int8 (2)        Números de los extremos A y B (-1 mesa vacía).
+    opponents  int8 (3)        Fichas de cada rival, desde el asiento siguiente
+                               (-1 si el asiento no existe).
+    move       int16 (2)       Índice de la ficha jugada y lado (0 A, 1 B).
+    outcome    int8            1 si el jugador ganó, -1 si perdió, 0 si empate.
+    game       int64           Número de la partida en el conjunto.
+    seat       int8            Asiento del jugador.
+    turn       int16           Fichas jugadas antes en la partida.
+
+Las partidas se codifican por lotes con operaciones de NumPy sobre sus bytes
+(GameRecord.to_bytes()), sin recorrer los movimientos en Python, y cada
+campo se agrega a un archivo .npy que crece según haga falta:
+
+    with DatasetWriter("dataset") as writer:
+        writer.write(records)
+    data = load("dataset")          # np.load(..., mmap_mode="r"), sin copias
+    data["hand"][1000:2000]
+
+Igual que en domino.stats, una partida en la que nadie se quedó sin fichas
+se considera trancada.
+"""
+import argparse
+import io
+import json
+import os
+import sys
+from typing import Dict, Iterable, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from .archive import ArchiveReader
+from .bitboard import EMPTY, PIECES_PIPS
+from .exceptions import InvalidDataset
+from .piece import DOUBLE_SIX, PIECE_SETS, Piece, PieceSet
+from .record import GameRecord, MOVEMENT_SIZE, SIDES_CODES, TABLE_CODE
+from .table import Table
+
+
+# Asientos por partida (el máximo de jugadores).
+SEATS = 4
+
+META_FILE = "dataset.json"
+
+_PIECES = np.array(Piece.PIECES, dtype=np.int16)
+_PIPS = np.array(PIECES_PIPS, dtype=np.int32)
+# Los códigos de los dueños caben en 3 bits (jugadores 2-5).
+_CODES = 8
+
+
+def get_fields(piece_set: PieceSet = DOUBLE_SIX) -> Dict[str, Tuple[np.dtype, Tuple[int, ...]]]:
+    """Tipo y forma de una fila de cada campo."""
+    count = piece_set.count
+    return {
+        "hand": (np.dtype(bool), (count,)),
+        "played": (np.dtype(bool), (count,)),
+        "ends": (np.dtype(np.int8), (2,)),
+        "opponents": (np.dtype(np.int8), (SEATS - 1,)),
+        "move": (np.dtype(np.int16), (2,)),
+        "outcome": (np.dtype(np.int8), ()),
+        "game": (np.dtype(np.int64), ()),
+        "seat": (np.dtype(np.int8), ()),
+        "turn": (np.dtype(np.int16), ()),
+    }
+
+
+def _segment_cumsum(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Suma acumulada (inclusiva, por el eje 0) que vuelve a empezar en cada
+    fila de `starts` (índice de la primera fila del segmento de cada fila)."""
+    total = np.cumsum(values, axis=0)
+    return total - (total[starts] - values[starts])
+
+
+def _forward_fill(values: np.ndarray, defined: np.ndarray) -> np.ndarray:
+    """Repite hacia adelante el último valor definido."""
+    index = np.maximum.accumulate(np.where(defined, np.arange(len(values)), 0))
+    return values[index]
+
+
+def _get_end(first: np.ndarray, on_side: np.ndarray, starts: np.ndarray,
+             initial: np.ndarray, pips: np.ndarray) -> np.ndarray:
+    """Número de un extremo de la fila después de cada jugada.
+
+    Poner la ficha (a, b) sobre el extremo e deja expuesto a + b - e, así que
+    el k-ésimo número del extremo es e_k = (-1)^k (e_0 + sum (-1)^j s_j), con
+    s_j los puntos de la j-ésima ficha puesta de ese lado: una suma acumulada.
+    """
+    chain = _segment_cumsum(on_side.astype(np.int32), starts)
+    sign = 1 - 2 * (chain & 1)
+    values = np.where(first, initial, np.where(on_side, sign * pips, 0))
+    ends = sign * _segment_cumsum(values, starts)
+    return _forward_fill(ends, first | on_side)
+
+
+def encode_games(logs: Sequence[bytes], piece_set: PieceSet = DOUBLE_SIX,
+                 first_game: int = 0) -> Dict[str, np.ndarray]:
+    """Codifica las posiciones de un lote de partidas (ver el módulo).
+
+    Args:
+        logs (Sequence[bytes]): Partidas codificadas con GameRecord.to_bytes(),
+        desde el reparto.
+        piece_set (PieceSet, optional): Juego de fichas de las partidas.
+        first_game (int, optional): Número de la primera partida del lote.
+    """
+    count = piece_set.count
+    games = len(logs)
+    lengths = np.array([len(log) // MOVEMENT_SIZE for log in logs], dtype=np.intp)
+    rows = np.frombuffer(b"".join(logs), dtype=np.uint8).reshape(-1, MOVEMENT_SIZE)
+    game = np.repeat(np.arange(games), lengths)
+    piece = rows[:, 0].astype(np.intp)
+    source = rows[:, 1].astype(np.intp)
+    target = rows[:, 2].astype(np.intp)
+
+    # Asientos: los jugadores en el orden en que se les reparte.
+    dealt = (source == TABLE_CODE) & (target > TABLE_CODE)
+    keys, first_rows = np.unique(game[dealt] * _CODES + target[dealt], return_index=True)
+    keys = keys[np.lexsort((first_rows, keys // _CODES))]
+    key_games = keys // _CODES
+    seats = np.arange(len(keys)) - np.searchsorted(key_games, key_games)
+    seat_of = np.full((games, _CODES), -1, dtype=np.intp)
+    seat_of[key_games, keys % _CODES] = seats
+    players = np.bincount(key_games, minlength=games)
+
+    hands = np.zeros((games, SEATS, count), dtype=bool)
+    hands[game[dealt], seat_of[game[dealt], target[dealt]], piece[dealt]] = True
+
+    # Una posición por cada ficha puesta en la mesa.
+    placed = (source > TABLE_CODE) & (target == TABLE_CODE)
+    p_game = game[placed]
+    p_piece = piece[placed]
+    p_seat = seat_of[p_game, source[placed]]
+    p_side = rows[placed, 3]
+    positions = len(p_game)
+    rows_range = np.arange(positions)
+
+    first = np.ones(positions, dtype=bool)
+    first[1:] = p_game[1:] != p_game[:-1]
+    starts = np.maximum.accumulate(np.where(first, rows_range, 0))
+
+    # Fichas jugadas y fichas puestas por cada asiento antes de cada posición.
+    played = np.zeros((positions, count), dtype=np.int32)
+    played[rows_range, p_piece] = 1
+    played = _segment_cumsum(played, starts) - played
+    by_seat = np.zeros((positions, SEATS), dtype=np.int32)
+    by_seat[rows_range, p_seat] = 1
+    by_seat = _segment_cumsum(by_seat, starts) - by_seat
+
+    hand = hands[p_game, p_seat] & (played == 0)
+    left = hands.sum(axis=2)[p_game] - by_seat
+    opponents = np.full((positions, SEATS - 1), -1, dtype=np.int8)
+    for k in range(1, SEATS):
+        exists = k < players[p_game]
+        other = (p_seat + k) % np.maximum(players[p_game], 1)
+        opponents[:, k - 1] = np.where(exists, left[rows_range, other], -1)
+
+    # Extremos tras cada jugada y, desplazados, antes de cada una.
+    a, b = _PIECES[p_piece, 0], _PIECES[p_piece, 1]
+    pips = (a + b).astype(np.int32)
+    side_a = ~first & (p_side == SIDES_CODES[Table.A])
+    side_b = ~first & (p_side == SIDES_CODES[Table.B])
+    ends = np.full((positions, 2), EMPTY, dtype=np.int8)
+    after_a = _get_end(first, side_a, starts, a.astype(np.int32), pips)
+    after_b = _get_end(first, side_b, starts, b.astype(np.int32), pips)
+    ends[1:, 0] = np.where(first[1:], EMPTY, after_a[:-1])
+    ends[1:, 1] = np.where(first[1:], EMPTY, after_b[:-1])
+
+    # Resultado: gana quien se quedó sin fichas o, si no, el único con menos
+    # puntos.
+    hands[p_game, p_seat, p_piece] = False
+    seated = np.arange(SEATS) < players[:, None]
+    empty = seated & ~hands.any(axis=2)
+    final_pips = np.where(seated, (hands * _PIPS[:count]).sum(axis=2), np.iinfo(np.int32).max)
+    lowest = final_pips.min(axis=1, keepdims=True)
+    tied = (final_pips == lowest).sum(axis=1) > 1
+    winners = np.where(empty.any(axis=1), np.argmax(empty, axis=1),
+                       np.where(tied, -1, np.argmin(final_pips, axis=1)))
+    p_winner = winners[p_game]
+    outcome = np.where(p_winner == p_seat, 1, np.where(p_winner == -1, 0, -1))
+
+    move = np.empty((positions, 2), dtype=np.int16)
+    move[:, 0] = p_piece
+    move[:, 1] = p_side == SIDES_CODES[Table.B]
+
+    return {
+        "hand": hand,
+        "played": played > 0,
+        "ends": ends,
+        "opponents": opponents,
+        "move": move,
+        "outcome": outcome.astype(np.int8),
+        "game": (first_game + p_game).astype(np.int64),
+        "seat": p_seat.astype(np.int8),
+        "turn": (rows_range - starts).astype(np.int16),
+    }
+
+
+class GrowableArray:
+    """Archivo .npy que crece al agregarle filas, escrito mediante un memmap.
+
+    La cabecera de NumPy reserva espacio para que la primera dimensión crezca
+    sin moverla; la forma real se escribe en flush() y close(). Si el archivo
+    existe se continúa al final.
+    """
+
+    def __init__(self, path: str, dtype: np.dtype, shape: Tuple[int, ...] = (),
+                 capacity: int = 4096):
+        self.__path = path
+        self.__dtype = np.dtype(dtype)
+        self.__shape = tuple(shape)
+        self.__row_size = self.__dtype.itemsize * int(np.prod(self.__shape, dtype=np.int64))
+        self.__length = 0
+        self.__capacity = 0
+        self.__array: Union[np.memmap, None] = None
+
+        header = self.__get_header(0)
+        if os.path.exists(path):
+            self.__file = open(path, "r+b")
+            version = np.lib.format.read_magic(self.__file)
+            if version == (1, 0):
+                shape, _, dtype = np.lib.format.read_array_header_1_0(self.__file)
+            else:
+                shape, _, dtype = np.lib.format.read_array_header_2_0(self.__file)
+            if (dtype != self.__dtype or tuple(shape[1:]) != self.__shape
+                    or self.__file.tell() != len(header)):
+                self.__file.close()
+                raise InvalidDataset("The file %s does not match the dataset." % path)
+            self.__length = shape[0]
+        else:
+            self.__file = open(path, "w+b")
+            self.__file.write(header)
+
+        self.__offset = len(header)
+        self.__reserve(max(capacity, self.__length))
+
+    def __len__(self):
+        return self.__length
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    def append(self, values: np.ndarray) -> None:
+        size = len(values)
+        if self.__length + size > self.__capacity:
+            self.__reserve(max(self.__length + size, self.__capacity * 2))
+        self.__array[self.__length:self.__length + size] = values
+        self.__length += size
+
+    def flush(self) -> None:
+        """Escribe los datos y la forma actual; el archivo queda legible."""
+        self.__array.flush()
+        self.__file.seek(0)
+        self.__file.write(self.__get_header(self.__length))
+        self.__file.flush()
+
+    def close(self) -> None:
+        if self.__file.closed:
+            return
+        self.flush()
+        self.__array = None
+        self.__file.truncate(self.__offset + self.__length * self.__row_size)
+        self.__file.close()
+
+    def __reserve(self, capacity: int) -> None:
+        if self.__array is not None:
+            self.__array.flush()
+            self.__array = None
+        self.__file.truncate(self.__offset + capacity * self.__row_size)
+        self.__array = np.memmap(self.__file, dtype=self.__dtype, mode="r+",
+                                 offset=self.__offset, shape=(capacity,) + self.__shape)
+        self.__capacity = capacity
+
+    def __get_header(self, length: int) -> bytes:
+        buffer = io.BytesIO()
+        np.lib.format.write_array_header_1_0(buffer, {
+            "descr": np.lib.format.dtype_to_descr(self.__dtype),
+            "fortran_order": False,
+            "shape": (length,) + self.__shape,
+        })
+        return buffer.getvalue()
+
+
+class DatasetWriter:
+    """Escribe las posiciones de partidas en un directorio, un archivo .npy
+    por campo (ver get_fields), más un dataset.json con los totales. Si el
+    directorio ya tiene un conjunto, se continúa.
+
+    Args:
+        path (str): Directorio del conjunto.
+        piece_set (PieceSet, optional): Juego de fichas de las partidas.
+        batch_size (int, optional): Partidas por lote en write().
+    """
+
+    def __init__(self, path: str, piece_set: PieceSet = DOUBLE_SIX,
+                 batch_size: int = 1024):
+        self.__path = path
+        self.__piece_set = PieceSet.clean_piece_set(piece_set)
+        self.__batch_size = batch_size
+        self.__games = 0
+
+        os.makedirs(path, exist_ok=True)
+        meta = _read_meta(path)
+        if meta is not None:
+            if meta["piece_set"] != self.__piece_set.name:
+                raise InvalidDataset("The dataset %s uses the %s set."
+                                     % (path, meta["piece_set"]))
+            self.__games = meta["games"]
+
+        self.__arrays = {name: GrowableArray(os.path.join(path, name + ".npy"), dtype, shape)
+                         for name, (dtype, shape) in get_fields(self.__piece_set).items()}
+        if len({len(array) for array in self.__arrays.values()}) > 1:
+            for array in self.__arrays.values():
+                array.close()
+            raise InvalidDataset("The fields of the dataset %s have different lengths." % path)
+
+    def __len__(self):
+        """Cantidad de posiciones."""
+        return len(self.__arrays["game"])
+
+    def __enter__(self) -> 'DatasetWriter':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def games(self) -> int:
+        return self.__games
+
+    def write(self, records: Iterable[Union[GameRecord, bytes]]) -> int:
+        """Agrega las partidas (GameRecord o sus bytes) por lotes y devuelve la
+        cantidad de posiciones agregadas."""
+        added = 0
+        batch: List[bytes] = []
+        for record in records:
+            batch.append(record if isinstance(record, bytes) else record.to_bytes())
+            if len(batch) >= self.__batch_size:
+                added += self.write_batch(batch)
+                batch = []
+        if batch:
+            added += self.write_batch(batch)
+        return added
+
+    def write_batch(self, logs: Sequence[bytes]) -> int:
+        """Agrega un lote de partidas codificadas con GameRecord.to_bytes()."""
+        data = encode_games(logs, self.__piece_set, self.__games)
+        for name, array in self.__arrays.items():
+            array.append(data[name])
+        self.__games += len(logs)
+        return len(data["game"])
+
+    def flush(self) -> None:
+        for array in self.__arrays.values():
+            array.flush()
+        _write_meta(self.__path, self.__piece_set, self.__games, len(self))
+
+    def close(self) -> None:
+        if not self.__arrays:
+            return
+        self.flush()
+        for array in self.__arrays.values():
+            array.close()
+        self.__arrays = {}
+
+
+def _read_meta(path: str) -> Union[Dict, None]:
+    try:
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def _write_meta(path: str, piece_set: PieceSet, games: int, positions: int) -> None:
+    with open(os.path.join(path, META_FILE), "w", encoding="utf-8") as file:
+        json.dump({"piece_set": piece_set.name, "games": games,
+                   "positions": positions}, file)
+
+
+def load(path: str, mmap: bool = True) -> Dict[str, np.ndarray]:
+    """Lee los campos de un conjunto; con mmap=True no se copian a memoria."""
+    meta = _read_meta(path)
+    if meta is None:
+        raise InvalidDataset("The directory %s is not a dataset." % path)
+    piece_set = PIECE_SETS[meta["piece_set"]]
+    return {name: np.load(os.path.join(path, name + ".npy"),
+                          mmap_mode="r" if mmap else None)
+            for name in get_fields(piece_set)}
+
+
+def main(*args):
+    parser = argparse.ArgumentParser(prog="domino.dataset")
+    parser.add_argument("output", help="directorio del conjunto")
+    parser.add_argument("archives", nargs="+", help="archivos de partidas (domino.archive)")
+    parser.add_argument("-s", "--piece-set", default=DOUBLE_SIX.name, choices=sorted(PIECE_SETS))
+    parser.add_argument("-b", "--batch-size", type=int, default=1024)
+    options = parser.parse_args(args or None)
+
+    with DatasetWriter(options.output, PIECE_SETS[options.piece_set],
+                       options.batch_size) as writer:
+        for path in options.archives:
+            with ArchiveReader(path) as reader:
+                writer.write(reader.get_bytes(k) for k in range(len(reader)))
+        print("%d games, %d positions" % (writer.games, len(writer)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv[1:]))
@@ -0,0 +1,147 @@
+"""Repartos de fichas y su enumeración.
+
+Un reparto es la mano de cada asiento (máscaras de bits); las fichas que
+sobran quedan en la mesa. Cada reparto de `players` asientos de un juego de
+fichas tiene un rango único entre 0 y count_deals(players) - 1, de modo que
+un rango de enteros equivale a un conjunto de repartos que se puede recorrer
+por partes, sin coordinación entre procesos:
+
+    for rank in range(start, stop):
+        hands = unrank_deal(rank, players)
+
+Las manos se numeran como combinaciones (sistema combinatorio) de las fichas
+que quedan tras las manos anteriores, y el rango total las combina en base
+mixta con el primer asiento como dígito más significativo.
+"""
+import random
+from math import comb
+from typing import Iterator, List, Sequence, Tuple
+
+from . import bitboard
+from .exceptions import DominoError
+from .piece import DOUBLE_SIX, PieceSet
+
+
+def _clean_players(players: int, piece_set: PieceSet) -> int:
+    limit = piece_set.count // piece_set.hand_size
+    if not isinstance(players, int) or not 1 <= players <= limit:
+        raise DominoError("The players must be between 1 and %d." % limit)
+    return players
+
+
+def _get_sizes(players: int, piece_set: PieceSet) -> List[int]:
+    """Cantidad de manos posibles de cada asiento, dadas las anteriores."""
+    return [comb(piece_set.count - seat * piece_set.hand_size, piece_set.hand_size)
+            for seat in range(_clean_players(players, piece_set))]
+
+
+def count_deals(players: int, piece_set: PieceSet = DOUBLE_SIX) -> int:
+    """Cantidad de repartos distintos para la cantidad de jugadores."""
+    total = 1
+    for size in _get_sizes(players, piece_set):
+        total *= size
+    return total
+
+
+def rank_deal(hands: Sequence[int], piece_set: PieceSet = DOUBLE_SIX) -> int:
+    """Obtiene el rango de un reparto."""
+    sizes = _get_sizes(len(hands), piece_set)
+    hand_size = piece_set.hand_size
+    remaining = list(range(piece_set.count))
+    rank = 0
+
+    for hand, size in zip(hands, sizes):
+        if bitboard.count_pieces(hand) != hand_size or hand >> piece_set.count:
+            raise DominoError("Each hand must have %d pieces of the %s set." 
+                              % (hand_size, piece_set))
+
+        digit = 0
+        chosen = 0
+        rest = []
+        for position, index in enumerate(remaining):
+            if hand >> index & 1:
+                chosen += 1
+                digit += comb(position, chosen)
+            else:
+                rest.append(index)
+        if chosen != hand_size:
+            raise DominoError("The hands must not share pieces.")
+
+        rank = rank * size + digit
+        remaining = rest
+
+    return rank
+
+
+def unrank_deal(rank: int, players: int, piece_set: PieceSet = DOUBLE_SIX) -> Tuple[int, ...]:
+    """Obtiene las manos del reparto con el rango indicado."""
+    sizes = _get_sizes(players, piece_set)
+    total = count_deals(players, piece_set)
+    if not 0 <= rank < total:
+        raise DominoError("The rank is outside the range 0-%d." % (total - 1))
+
+    digits = []
+    for size in reversed(sizes):
+        rank, digit = divmod(rank, size)
+        digits.append(digit)
+    digits.reverse()
+
+    remaining = list(range(piece_set.count))
+    hands = []
+    for digit in digits:
+        positions = []
+        for k in range(piece_set.hand_size, 0, -1):
+            # Mayor posición c con comb(c, k) <= digit.
+            c = k - 1
+            while comb(c + 1, k) <= digit:
+                c += 1
+            digit -= comb(c, k)
+            positions.append(c)
+
+        hand = 0
+        for position in positions:
+            hand |= 1 << remaining[position]
+        hands.append(hand)
+        taken = set(positions)
+        remaining = [index for position, index in enumerate(remaining)
+                     if position not in taken]
+
+    return tuple(hands)
+
+
+def random_deal(players: int, rng: random.Random = None,
+                piece_set: PieceSet = DOUBLE_SIX) -> Tuple[int, ...]:
+    """Reparto al azar (uniforme) con el generador indicado."""
+    rng = rng or random.Random()
+    size = piece_set.hand_size
+    indexes = list(range(piece_set.count))
+    rng.shuffle(indexes)
+    return tuple(sum(1 << i for i in indexes[seat * size:(seat + 1) * size])
+                 for seat in range(_clean_players(players, piece_set)))
+
+
+def iter_deals(players: int, start: int = 0, stop: int = None,
+               piece_set: PieceSet = DOUBLE_SIX) -> Iterator[Tuple[int, ...]]:
+    """Itera los repartos con rango en [start, stop)."""
+    stop = count_deals(players, piece_set) if stop is None else stop
+    for rank in range(start, stop):
+        yield unrank_deal(rank, players, piece_set)
+
+
+def split_ranks(players: int, parts: int, piece_set: PieceSet = DOUBLE_SIX) -> List[range]:
+    """Divide todos los rangos en `parts` intervalos contiguos disjuntos, 
+    ninguno vacío."""
+    total = count_deals(players, piece_set)
+    if not isinstance(parts, int) or not 1 <= parts <= total:
+        raise DominoError("The parts must be between 1 and %d." % total)
+    bounds = [total * n // parts for n in range(parts + 1)]
+    return [range(bounds[n], bounds[n + 1]) for n in range(parts)]
+
+
+def stratified_ranks(players: int, count: int, rng: random.Random = None,
+                     piece_set: PieceSet = DOUBLE_SIX) -> List[int]:
+    """Un rango al azar de cada uno de `count` intervalos iguales; no puede 
+    haber más intervalos que repartos."""
+    rng = rng or random.Random()
+    return [rng.randrange(part.start, part.stop)
+            for part in split_ranks(players, count, piece_set)]
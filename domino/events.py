@@ -0,0 +1,321 @@
+"""Flujo de eventos de las partidas hacia registros y analítica.
+
+Un EventStream se agrega como listener al registro de cada partida
+(watch()). Publicar un evento solo agrega una tupla a una cola; un hilo de
+fondo los convierte en diccionarios y los entrega por lotes a los sinks:
+
+    with EventStream([JsonlSink("moves.jsonl")]) as stream:
+        game = Game.create(PLAYER1, PLAYER2)
+        stream.watch(game)
+        game.run()
+
+Eventos, con el formato de los mensajes de domino.server:
+
+    {"type": "played", "game": 1, "seat": 0, "piece": [6, 4], "side": "A", "time": ...}
+    {"type": "passed", "game": 1, "seat": 1, "time": ...}
+    {"type": "undone", "game": 1, "piece": [6, 4], "time": ...}
+    {"type": "end", "game": 1, "winner": 0, "pips": [0, 17], "time": ...}
+
+Solo se publican las jugadas y pases ocurridos después de watch(), no el
+reparto. Al terminar la partida se pide al hilo que escriba y vacíe los
+sinks, sin esperarlo. Si la cola llega a max_pending, los eventos nuevos se
+descartan (y se cuentan) en vez de detener la partida; un sink lento o que
+falla solo retrasa al hilo de fondo.
+"""
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Sequence, Union
+
+from .game import Game
+from .piece import Piece
+from .player import Player
+from .record import GameRecord, Movement, RecordListener
+from .table import Table
+
+
+SIDES_NAMES = {Table.A: "A", Table.B: "B"}
+
+# Tipos de los eventos en la cola (el primer elemento de cada tupla).
+PLAYED = 0
+PASSED = 1
+UNDONE = 2
+END = 3
+
+
+class Sink:
+    """Destino de los eventos. Las subclases sobrescriben write(); todos los
+    métodos se llaman desde el hilo de fondo."""
+
+    def write(self, events: List[Dict]) -> None:
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.flush()
+
+
+class JsonlSink(Sink):
+    """Agrega los eventos a un archivo, un objeto JSON por línea."""
+
+    def __init__(self, path: str):
+        self.__path = path
+        self.__file = open(path, "a", encoding="utf-8")
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    def write(self, events: List[Dict]) -> None:
+        self.__file.write("".join(json.dumps(event) + "\n" for event in events))
+
+    def flush(self) -> None:
+        self.__file.flush()
+
+    def close(self) -> None:
+        self.__file.close()
+
+
+class CallbackSink(Sink):
+    """Entrega cada lote de eventos a una función."""
+
+    def __init__(self, callback: Callable[[List[Dict]], None]):
+        self.__callback = callback
+
+    def write(self, events: List[Dict]) -> None:
+        self.__callback(events)
+
+
+class GamePublisher(RecordListener):
+    """Publica en un EventStream los cambios del registro de una partida.
+    Se crea con EventStream.watch()."""
+
+    def __init__(self, stream: 'EventStream', game: Game, name: Union[int, str]):
+        self.__stream = stream
+        self.__game = game
+        self.__name = name
+        self.__seats: Dict[Player, int] = {p: seat for seat, p in enumerate(game.players)}
+
+    @property
+    def game(self) -> Game:
+        return self.__game
+
+    @property
+    def name(self) -> Union[int, str]:
+        return self.__name
+
+    def on_move(self, record: GameRecord, movement: Movement) -> None:
+        seat = self.__seats.get(movement._from)
+        if seat is None or not isinstance(movement.to, Table):
+            return
+        self.__stream.publish((PLAYED, self.__name, time.time(), seat,
+                               movement.piece.index, movement.side))
+        if not record.get_possession_mask(movement._from):
+            self.__end()
+
+    def on_pass(self, record: GameRecord, player: Player) -> None:
+        self.__stream.publish((PASSED, self.__name, time.time(), self.__seats[player]))
+        if record.passes >= len(self.__seats):
+            self.__end()
+
+    def on_undo(self, record: GameRecord, movement: Movement) -> None:
+        if isinstance(movement.to, Table) and movement._from in self.__seats:
+            self.__stream.publish((UNDONE, self.__name, time.time(),
+                                   movement.piece.index))
+
+    def __end(self) -> None:
+        game = self.__game
+        winner = game.get_winner()
+        self.__stream.publish((
+            END, self.__name, time.time(),
+            self.__seats[winner] if winner is not None else -1,
+            tuple(game.get_player_pips(player) for player in game.players),
+        ), flush=True)
+
+
+class EventStream:
+    """Cola de eventos con un hilo de fondo que los entrega por lotes.
+
+    Args:
+        sinks (Sequence[Sink]): Destinos de los eventos.
+        batch_size (int, optional): Eventos por lote; al acumularse tantos se
+        despierta al hilo.
+        flush_interval (float, optional): Segundos máximos entre entregas.
+        max_pending (int, optional): Eventos en cola a partir de los cuales se
+        descartan los nuevos.
+    """
+
+    def __init__(self, sinks: Sequence[Sink], batch_size: int = 512,
+                 flush_interval: float = 1.0, max_pending: int = 100000):
+        self.__sinks = list(sinks)
+        self.__batch_size = batch_size
+        self.__flush_interval = flush_interval
+        self.__max_pending = max_pending
+
+        # deque.append y popleft son atómicos, así que publicar no usa locks.
+        self.__queue: Deque[tuple] = deque()
+        self.__wake = threading.Event()
+        self.__closing = False
+        self.__thread: Union[threading.Thread, None] = None
+        self.__names = itertools.count(1)
+
+        # Contadores aproximados si publican varios hilos a la vez.
+        self.__published = 0
+        self.__dropped = 0
+        self.__written = 0
+        self.__errors = 0
+
+    def __enter__(self) -> 'EventStream':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def sinks(self) -> List[Sink]:
+        return self.__sinks
+
+    @property
+    def running(self) -> bool:
+        return self.__thread is not None and self.__thread.is_alive()
+
+    def get_stats(self) -> Dict:
+        return {
+            "published": self.__published,
+            "dropped": self.__dropped,
+            "written": self.__written,
+            "pending": len(self.__queue),
+            "errors": self.__errors,
+        }
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self.__closing = False
+        self.__thread = threading.Thread(target=self.__run, name="domino-events",
+                                         daemon=True)
+        self.__thread.start()
+
+    def close(self, timeout: float = None) -> bool:
+        """Entrega los eventos pendientes, detiene el hilo y cierra los sinks.
+        Devuelve False si el hilo no terminó en el tiempo indicado; en ese
+        caso los sinks siguen abiertos y se puede volver a llamar."""
+        if self.__thread is None:
+            return True
+        self.__closing = True
+        self.__wake.set()
+        self.__thread.join(timeout)
+        if self.__thread.is_alive():
+            return False
+        self.__thread = None
+        for sink in self.__sinks:
+            try:
+                sink.close()
+            except Exception:
+                self.__errors += 1
+        return True
+
+    def watch(self, game: Game, name: Union[int, str] = None) -> GamePublisher:
+        """Publica desde ahora los eventos de la partida.
+
+        Args:
+            name (Union[int, str], optional): Identificador de la partida en
+            los eventos. Defaults to un número consecutivo.
+        """
+        publisher = GamePublisher(self, game, next(self.__names) if name is None else name)
+        game.record.add_listener(publisher)
+        return publisher
+
+    def unwatch(self, publisher: GamePublisher) -> None:
+        publisher.game.record.remove_listener(publisher)
+
+    def publish(self, event: tuple, flush: bool = False) -> bool:
+        """Agrega un evento a la cola sin bloquear. Devuelve False si se
+        descartó por estar la cola llena.
+
+        Args:
+            flush (bool, optional): Pide al hilo que entregue y vacíe los
+            sinks ya, sin esperar el lote ni el intervalo.
+        """
+        queue = self.__queue
+        if len(queue) >= self.__max_pending:
+            self.__dropped += 1
+            return False
+        queue.append(event)
+        self.__published += 1
+        if flush or len(queue) == self.__batch_size:
+            self.__wake.set()
+        return True
+
+    def flush(self, timeout: float = None) -> bool:
+        """Espera a que se entreguen los eventos publicados hasta ahora.
+        Devuelve False si no terminó en el tiempo indicado."""
+        if not self.running:
+            return not self.__queue
+        done = threading.Event()
+        self.__queue.append(done)
+        self.__wake.set()
+        return done.wait(timeout)
+
+    def __run(self) -> None:
+        while True:
+            self.__wake.wait(self.__flush_interval)
+            self.__wake.clear()
+            closing = self.__closing
+            self.__drain()
+            if closing:
+                return
+
+    def __drain(self) -> None:
+        queue = self.__queue
+        batch: List[Dict] = []
+        waiting: List[threading.Event] = []
+
+        while queue:
+            event = queue.popleft()
+            if isinstance(event, threading.Event):
+                waiting.append(event)
+                continue
+            batch.append(_to_dict(event))
+            if len(batch) >= self.__batch_size:
+                self.__write(batch)
+                batch = []
+
+        if batch:
+            self.__write(batch)
+        for sink in self.__sinks:
+            try:
+                sink.flush()
+            except Exception:
+                self.__errors += 1
+        for event in waiting:
+            event.set()
+
+    def __write(self, batch: List[Dict]) -> None:
+        for sink in self.__sinks:
+            try:
+                sink.write(batch)
+            except Exception:
+                self.__errors += 1
+        self.__written += len(batch)
+
+
+def _to_dict(event: tuple) -> Dict:
+    kind, name, when = event[:3]
+    if kind == PLAYED:
+        _, _, _, seat, index, side = event
+        return {"type": "played", "game": name, "seat": seat,
+                "piece": list(Piece.PIECES[index]), "side": SIDES_NAMES[side],
+                "time": when}
+    if kind == PASSED:
+        return {"type": "passed", "game": name, "seat": event[3], "time": when}
+    if kind == UNDONE:
+        return {"type": "undone", "game": name, "piece": list(Piece.PIECES[event[3]]),
+                "time": when}
+    return {"type": "end", "game": name, "winner": event[3], "pips": list(event[4]),
+            "time": when}
@@ -32,3 +32,11 @@ class InvalidPieceNumber(DominoError):
 class InvalidSide(DominoError):
     """When trying to set invalid side movement."""
     
+
+
+class InvalidArchive(DominoError):
+    """When the game archive file is not valid."""
+
+
+class InvalidDataset(DominoError):
+    """When the dataset files are not valid."""
@@ -1,11 +1,13 @@
 
 
 import random
-from typing import List, Tuple
+from typing import List, Sequence, Tuple, Union
 
+from . import bitboard, deals
+from .bitboard import BoardState
 from .domino import Domino
 from .table import Table
-from .piece import Piece, ALL_PIECES
+from .piece import DOUBLE_SIX, Piece, PieceSet
 from .player import ANNOTATOR, Player, ALL_PLAYERS
 from .record import GameRecord, Movement
 from .exceptions import InvalidPiece
@@ -13,12 +15,13 @@ from .exceptions import InvalidPiece
 
 class Game(Domino):
     
-    def __init__(self, table: Table, pieces: List[Piece], players: List[Player]):
+    def __init__(self, table: Table, pieces: List[Piece], players: List[Player], 
+                 compact: bool = False, piece_set: PieceSet = DOUBLE_SIX):
+        self.__piece_set = PieceSet.clean_piece_set(piece_set)
         self.__table = Table.clean_table(table)
         self.__pieces: List[Piece] = [Piece.clean_piece(piece) for piece in pieces]
-        self.__pieces_index = {p.tuple():p for p in self.__pieces}
         self.__players = [Player.clean_player(player) for player in players]
-        self.__record: GameRecord = GameRecord()
+        self.__record: GameRecord = GameRecord(compact=compact)
         self.__id = id(self)
         
     def __str__(self):
@@ -32,6 +35,10 @@ class Game(Domino):
     def pieces(self) -> List[Piece]:
         return self.__pieces
     
+    @property
+    def piece_set(self) -> PieceSet:
+        return self.__piece_set
+    
     @property
     def players(self) -> List[Player]:
         return self.__players
@@ -41,107 +48,224 @@ class Game(Domino):
         return self.__record
 
     def get_availables_pieces(self) -> List[Piece]:
-        table_pieces = []
-        
-        for piece_tuple in self.record.pieces_possession:
-            if isinstance(self.record.pieces_possession[piece_tuple], Table):
-                piece = self.get_piece_from_value(piece_tuple)
-                table_pieces.append(piece)
-        
-        return table_pieces
+        return self.get_pieces_from_mask(self.get_availables_mask())
+    
+    def get_availables_mask(self) -> int:
+        """Máscara de las fichas de la mesa que aún no se han jugado."""
+        return self.record.get_possession_mask(self.table) & ~self.record.played_mask
     
     def get_available_random_piece(self) -> Piece:
-        availables = list(self.get_availables_pieces())
-        random.shuffle(availables)
-        return availables[0]
+        return random.choice(self.get_availables_pieces())
+    
+    def get_availables_pieces_count(self) -> int:
+        return bin(self.get_availables_mask()).count("1")
                    
     def get_piece_from_value(self, value: Tuple) -> Piece:
-        return self.__pieces_index[value]
+        return Piece.from_values(*value)
+    
+    def get_piece_from_index(self, index: int) -> Piece:
+        return Piece.from_index(index)
+    
+    def get_pieces_from_mask(self, mask: int) -> List[Piece]:
+        """Obtiene las fichas cuyos bits están activos en la máscara."""
+        pieces = []
+        
+        while mask:
+            bit = mask & -mask
+            pieces.append(Piece.from_index(bit.bit_length() - 1))
+            mask ^= bit
+        
+        return pieces
             
     def get_player_pieces(self, player: Player) -> List[Piece]:
         """Obtiene las fichas del jugador."""
-        player_pieces = []
+        return self.get_pieces_from_mask(self.record.get_possession_mask(player))
+    
+    def get_player_pieces_count(self, player: Player) -> int:
+        """Obtiene la cantidad de fichas del jugador."""
+        return bin(self.record.get_possession_mask(player)).count("1")
+    
+    def get_player_pips(self, player: Player) -> int:
+        """Obtiene la suma de los puntos de las fichas del jugador."""
+        return self.record.get_possession_pips(player)
+    
+    def is_blocked(self) -> bool:
+        """Indica si el juego se trancó: todos pasaron seguidos."""
+        return self.record.passes >= len(self.players)
+    
+    def is_finished(self) -> bool:
+        """Indica si un jugador se quedó sin fichas (dominó) o si el juego se
+        trancó."""
+        if self.is_blocked():
+            return True
+        masks = self.record.possession_masks
+        return any(not masks.get(player, 0) for player in self.players)
+    
+    def get_winner(self) -> Union[Player, None]:
+        """Obtiene el ganador de la partida terminada (ver
+        bitboard.get_winner), o None si hay empate o no ha terminado."""
+        masks = self.record.possession_masks
+        for player in self.players:
+            if not masks.get(player, 0):
+                return player
         
-        for piece_tuple in self.record.pieces_possession:
-            if player == self.record.pieces_possession[piece_tuple]:
-                piece = self.get_piece_from_value(piece_tuple)
-                player_pieces.append(piece)
+        if not self.is_blocked():
+            return None
         
-        return player_pieces
+        pips = [self.get_player_pips(player) for player in self.players]
+        lowest = min(pips)
+        if pips.count(lowest) > 1:
+            return None
+        return self.players[pips.index(lowest)]
+    
+    def has_piece(self, player: Player, piece: Piece) -> bool:
+        """Indica si la ficha está en posesión del jugador."""
+        return bool(self.record.get_possession_mask(player) & piece.mask)
     
     def get_player_pieces_for_current_play(self, 
                                     player: Player) -> List[Tuple[Piece, int]]:
-        """Obtiene las fichas del jugador, que se puedan jugar actualmente."""
-        player_pieces_and_side = []
-        
-        for piece in self.get_player_pieces(player):
-            try:
-                side = self.get_correct_side_for_piece(piece)
-            except (InvalidPiece):
-                continue
-            
-            player_pieces_and_side.append((piece, side))
-        
-        return player_pieces_and_side
+        """Obtiene las fichas del jugador que se puedan jugar actualmente, con 
+        cada lado en el que encajan."""
+        a, b = self.record.ends or (bitboard.EMPTY, bitboard.EMPTY)
+        moves = bitboard.get_legal_moves(
+            self.record.get_possession_mask(player), a, b)
+        return [(Piece.from_index(i), side) for i, side in moves]
+    
+    def get_state(self, player: Player = None) -> BoardState:
+        """Obtiene el estado actual de la partida en el motor de bits.
+
+        Args:
+            player (Player, optional): Jugador en turno. Defaults to el primero.
+        """
+        a, b = self.record.ends or (bitboard.EMPTY, bitboard.EMPTY)
+        return BoardState(
+            hands=tuple(self.record.get_possession_mask(p) for p in self.players),
+            played=self.record.played_mask,
+            a=a,
+            b=b,
+            turn=self.players.index(player) if player is not None else 0,
+            passes=self.record.passes,
+            pieces=self.piece_set.mask,
+        )
     
     def play(self, player: Player, piece: Piece, side: int = None) -> Movement:
         
         piece = Piece.clean_piece(piece)
         
-        player_pieces = self.get_player_pieces(player)
-        
-        if not piece in player_pieces:
+        if not self.has_piece(player, piece):
             raise InvalidPiece("The %s is not %s's" % (piece, player))
         
-        if not side:
+        if side is None:
             side = self.get_correct_side_for_piece(piece)
         
         return self.record.move(piece=piece, _from=player, to=self.table, side=side)
     
-    def get_correct_side_for_piece(self, piece: Piece) -> int:
-        """Obtiene el side correcto en la que se puede poner la ficha."""
-        row = self.record.build_row()
+    def run(self, strategies: Sequence[bitboard.Policy] = None,
+            player: Player = None) -> Union[Player, None]:
+        """Juega la partida hasta el final y devuelve el ganador (ver
+        get_winner).
+
+        Las jugadas salen del motor de bits (legal_moves), así que se
+        registran sin las validaciones de play(): ni clean_piece, ni la
+        posesión de la ficha, ni el lado contra la fila.
+
+        Args:
+            strategies (Sequence[bitboard.Policy], optional): Estrategia de
+            cada asiento. Defaults to el choose_move de cada jugador.
+            player (Player, optional): Jugador en turno. Defaults to el primero.
+        """
+        players = self.players
+        record = self.record
+        table = self.table
+        if strategies is None:
+            strategies = [p.choose_move for p in players]
         
-        if row:
-            a, b = row[0][0], row[-1][0]
-        else:
-            return Table.A
+        state = self.get_state(player)
+        while not bitboard.is_finished(state):
+            seat = state.turn
+            moves = bitboard.legal_moves(state)
+            if not moves:
+                record.pass_turn(players[seat])
+                state = bitboard.pass_turn(state)
+                continue
         
-        if a in piece: return Table.A
-        if b in piece: return Table.B
+            index, side = strategies[seat](state, moves)
+            state = bitboard.play(state, index, side)
+            record._move(Piece.from_index(index), players[seat], table, side,
+                         state.a if side == Table.A else state.b)
         
-        raise InvalidPiece("The piece %s is not valid for either side %s or %s" 
-                                                                % (piece, a, b))
+        return self.get_winner()
+    
+    def pass_turn(self, player: Player) -> None:
+        """Registra que el jugador pasó por no tener fichas que jugar."""
+        self.record.pass_turn(player)
+    
+    def get_correct_side_for_piece(self, piece: Piece) -> int:
+        """Obtiene el side correcto en la que se puede poner la ficha."""
+        return self.record.get_side_for_piece(piece)
                 
+    def clone(self) -> 'Game':
+        """Obtiene una partida independiente en el mismo estado, para probar 
+        movimientos sin afectar esta. La mesa, las fichas y los jugadores se 
+        comparten; solo se copia el registro."""
+        game = type(self).__new__(type(self))
+        game.__piece_set = self.__piece_set
+        game.__table = self.__table
+        game.__pieces = self.__pieces
+        game.__players = self.__players
+        game.__record = self.__record.copy()
+        game.__id = id(game)
+        return game
+    
     @classmethod
-    def create(cls, *players: Player) -> 'Game':
-        
+    def create(cls, *players: Player, compact: bool = False, seed: int = None,
+               deal: int = None, piece_set: PieceSet = DOUBLE_SIX) -> 'Game':
+        """Crea una partida y reparte a cada jugador las fichas que indica el 
+        juego de fichas (7 en el doble seis).
+
+        No modifica ningún estado global, por lo que se pueden crear partidas
+        desde varios hilos.
+
+        Args:
+            players (Player): Jugadores en orden de asiento. Defaults to 
+            ALL_PLAYERS.
+            compact (bool, optional): Ver GameRecord.
+            seed (int, optional): Semilla del reparto de esta partida.
+            deal (int, optional): Rango del reparto a usar (ver deals); si se 
+            indica, se ignora seed.
+            piece_set (PieceSet, optional): Juego de fichas. Defaults to 
+            DOUBLE_SIX.
+        """
         if not players:
             players = ALL_PLAYERS 
-            
-        pieces = ALL_PIECES
-        random.shuffle(pieces)
         
-        game = Game(
+        if deal is None:
+            hands = deals.random_deal(len(players), random.Random(seed), piece_set)
+        else:
+            hands = deals.unrank_deal(deal, len(players), piece_set)
+        
+        # Las fichas de cada mano en orden de asiento, y luego las que sobran.
+        pieces = []
+        for mask in hands + (piece_set.mask & ~sum(hands),):
+            pieces.extend(Piece.from_index(i) for i in bitboard.iter_bits(mask))
+        
+        game = cls(
             table=Table(),
             pieces=pieces,
-            players=players
+            players=players,
+            compact=compact,
+            piece_set=piece_set,
         )
         
         # Inicialmente todas las piezas están en la mesa.
-        for i in range(28):
-            piece = pieces[i]
+        for piece in pieces:
             game.record.move(piece, ANNOTATOR, game.table, None)
         
         i = 0
         for player in game.players:
-            for n in range(7):
+            for n in range(piece_set.hand_size):
                 piece = pieces[i]
                 game.record.move(piece, game.table, player, None)
                 i += 1
                 
         return game
-
-    
-    
-    
\ No newline at end of file
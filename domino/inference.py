@@ -0,0 +1,307 @@
+"""Deducción de las fichas que puede tener cada rival.
+
+HandTracker se agrega como listener al registro de la partida y actualiza en
+cada movimiento o pase, sin recorrer el registro, las fichas que cada asiento
+todavía puede tener y cuántas de ellas llevan cada número:
+
+    tracker = HandTracker(game, player)
+    ...
+    tracker.get_possible_pieces(rival)
+    tracker.get_probabilities(rival)[piece.index]
+
+Un jugador que pasa no tiene fichas con ninguno de los números de los
+extremos. Solo se usa información pública y la mano del jugador observador.
+"""
+import itertools
+from typing import Dict, List, Tuple, Union
+
+from . import bitboard
+from .exceptions import InvalidPlayer
+from .game import Game
+from .piece import Piece
+from .player import ANNOTATOR, Player
+from .record import GameRecord, Movement, RecordListener
+from .table import Table
+
+
+# Máximo de rondas del ajuste proporcional iterativo de get_probabilities()
+# y error aceptado en la cantidad de fichas de cada mano.
+PROBABILITY_ITERATIONS = 200
+PROBABILITY_TOLERANCE = 1e-9
+
+
+class HandTracker(RecordListener):
+    """Fichas posibles de cada asiento desde el punto de vista de un jugador.
+
+    Args:
+        game (Game): Partida a seguir; se usa su estado actual como punto de
+        partida y desde entonces se actualiza con cada movimiento y pase.
+        player (Player, optional): Observador, cuya mano se conoce. Sin
+        observador solo se usa información pública.
+    """
+
+    def __init__(self, game: Game, player: Player = None):
+        self.__game = game
+        self.__player = player
+        self.__seats: Dict[Player, int] = {p: seat for seat, p in enumerate(game.players)}
+        if player is not None and player not in self.__seats:
+            raise InvalidPlayer("The player %s is not in the game." % player)
+        self.__observer = self.__seats[player] if player is not None else -1
+        self.__max_number = game.piece_set.max_number
+
+        # Máscara de las fichas que puede tener cada asiento, cantidad de
+        # ellas con cada número y cantidad de fichas en la mano.
+        self.__possible: List[int] = []
+        self.__suits: List[List[int]] = []
+        self.__counts: List[int] = []
+        # Fichas que quedan en la mesa sin jugar (el pozo).
+        self.__stock = 0
+        # Cambios de cada movimiento y pase seguidos, para deshacerlos sin
+        # recalcular: (es pase, cambio del pozo, asiento, cambio de su mano,
+        # bits quitados y bits agregados a cada asiento).
+        self.__history: List[Tuple[bool, int, int, int, Tuple[int, ...], Tuple[int, ...]]] = []
+        self.__probabilities: Union[List[List[float]], None] = None
+
+        self.__rebuild()
+        game.record.add_listener(self)
+
+    @property
+    def game(self) -> Game:
+        return self.__game
+
+    @property
+    def player(self) -> Union[Player, None]:
+        return self.__player
+
+    def close(self) -> None:
+        """Deja de seguir la partida."""
+        self.__game.record.remove_listener(self)
+
+    def get_possible_mask(self, player: Player) -> int:
+        return self.__possible[self.__seats[player]]
+
+    def get_possible_pieces(self, player: Player) -> List[Piece]:
+        return [Piece.from_index(i) for i in bitboard.iter_bits(self.get_possible_mask(player))]
+
+    def can_have(self, player: Player, piece: Piece) -> bool:
+        return bool(self.get_possible_mask(player) & piece.mask)
+
+    def get_pieces_count(self, player: Player) -> int:
+        """Fichas en la mano del jugador."""
+        return self.__counts[self.__seats[player]]
+
+    def get_suit_counts(self, player: Player) -> Tuple[int, ...]:
+        """Cantidad de fichas posibles del jugador que llevan cada número."""
+        return tuple(self.__suits[self.__seats[player]])
+
+    def lacks_number(self, player: Player, number: int) -> bool:
+        """Indica si el jugador no puede tener fichas con el número."""
+        return not self.__suits[self.__seats[player]][number]
+
+    def get_probabilities(self, player: Player) -> List[float]:
+        """Probabilidad de que el jugador tenga cada ficha, por índice.
+
+        Se estima con un ajuste proporcional iterativo sobre las fichas
+        ocultas: cada una está en exactamente una mano o en el pozo, y cada
+        mano tiene su cantidad conocida de fichas. El resultado se guarda
+        hasta la siguiente actualización.
+        """
+        if self.__probabilities is None:
+            self.__probabilities = self.__get_probabilities()
+        return self.__probabilities[self.__seats[player]]
+
+    def on_move(self, record: GameRecord, movement: Movement) -> None:
+        bit = movement.piece.mask
+        self.__probabilities = None
+
+        if movement._from is ANNOTATOR:
+            self.__stock += 1
+            self.__history.append((False, 1, -1, 0, (), ()))
+            return
+
+        seats = range(len(self.__possible))
+        if isinstance(movement._from, Table):
+            # Reparto: la ficha sale del pozo a una mano.
+            self.__stock -= 1
+            seat = self.__seats[movement.to]
+            self.__counts[seat] += 1
+            removed = added = ()
+            if seat == self.__observer:
+                removed = tuple(self.__remove(other, bit) if other != seat else 0
+                                for other in seats)
+                added = tuple(self.__add(other, bit) if other == seat else 0
+                              for other in seats)
+            self.__history.append((False, -1, seat, 1, removed, added))
+            return
+
+        # Jugada: la ficha queda a la vista y ya nadie la tiene.
+        seat = self.__seats[movement._from]
+        self.__counts[seat] -= 1
+        removed = tuple(self.__remove(other, bit) for other in seats)
+        self.__history.append((False, 0, seat, -1, removed, ()))
+
+    def on_pass(self, record: GameRecord, player: Player) -> None:
+        ends = record.ends
+        if ends is None:
+            return
+        seat = self.__seats[player]
+        mask = bitboard.NUMBER_MASKS[ends[0]] | bitboard.NUMBER_MASKS[ends[1]]
+        removed = tuple(self.__remove(seat, mask) if other == seat else 0
+                        for other in range(len(self.__possible)))
+        self.__history.append((True, 0, seat, 0, removed, ()))
+        self.__probabilities = None
+
+    def on_undo(self, record: GameRecord, movement: Movement) -> None:
+        """Deshace los pases posteriores al movimiento y luego el movimiento,
+        con los cambios guardados. Solo recalcula todo si el movimiento es
+        anterior al tracker."""
+        history = self.__history
+        self.__probabilities = None
+        while history and history[-1][0]:
+            self.__revert(history.pop())
+        if history:
+            self.__revert(history.pop())
+        else:
+            self.__rebuild()
+
+    def __revert(self, change: Tuple) -> None:
+        _, stock, seat, count, removed, added = change
+        self.__stock -= stock
+        if count:
+            self.__counts[seat] -= count
+        for other, bits in enumerate(added):
+            self.__remove(other, bits)
+        for other, bits in enumerate(removed):
+            self.__add(other, bits)
+
+    def __add(self, seat: int, mask: int) -> int:
+        """Agrega las fichas a las posibles del asiento y devuelve las que no
+        lo eran."""
+        bits = mask & ~self.__possible[seat]
+        self.__possible[seat] |= bits
+        suits = self.__suits[seat]
+        for index in bitboard.iter_bits(bits):
+            a, b = Piece.PIECES[index]
+            suits[a] += 1
+            if b != a:
+                suits[b] += 1
+        return bits
+
+    def __remove(self, seat: int, mask: int) -> int:
+        """Quita las fichas de las posibles del asiento y devuelve las que lo
+        eran."""
+        bits = self.__possible[seat] & mask
+        if not bits:
+            return 0
+        self.__possible[seat] ^= bits
+        suits = self.__suits[seat]
+        for index in bitboard.iter_bits(bits):
+            a, b = Piece.PIECES[index]
+            suits[a] -= 1
+            if b != a:
+                suits[b] -= 1
+        return bits
+
+    def __rebuild(self) -> None:
+        """Calcula todo desde el estado actual del registro."""
+        game = self.__game
+        record = game.record
+        players = game.players
+        self.__probabilities = None
+
+        hidden = game.piece_set.mask & ~record.played_mask
+        if self.__observer != -1:
+            own = record.get_possession_mask(self.__player)
+            hidden &= ~own
+
+        self.__counts = [bitboard.count_pieces(record.get_possession_mask(p))
+                         for p in players]
+        self.__stock = bitboard.count_pieces(game.get_availables_mask())
+        self.__possible = [0] * len(players)
+        self.__suits = [[0] * (self.__max_number + 1) for _ in players]
+
+        for seat in range(len(players)):
+            self.__add(seat, own if seat == self.__observer else hidden)
+
+    def __get_probabilities(self) -> List[List[float]]:
+        seats = len(self.__possible)
+        holders = [seat for seat in range(seats) if seat != self.__observer]
+        hidden = 0
+        for seat in holders:
+            hidden |= self.__possible[seat]
+
+        # El pozo puede tener cualquier ficha oculta.
+        stock_mask = self.__game.piece_set.mask & ~self.__game.record.played_mask
+        if self.__observer != -1:
+            stock_mask &= ~self.__possible[self.__observer]
+        masks = [self.__possible[seat] for seat in holders] + [stock_mask]
+        counts = [self.__counts[seat] for seat in holders] + [self.__stock]
+        hidden |= stock_mask
+
+        # Primero se fijan las fichas seguras, porque el ajuste converge muy 
+        # lento cuando la solución tiene ceros forzados: si un grupo de manos 
+        # suma tantas fichas como fichas posibles tiene, nadie más puede tener 
+        # esas fichas; y una ficha que solo puede tener una mano es de ella.
+        fixed = [0] * len(masks)
+        changed = True
+        while changed:
+            changed = False
+            for h, mask in enumerate(masks):
+                if mask and not counts[h]:
+                    masks[h] = 0
+                    changed = True
+            active = [h for h, mask in enumerate(masks) if mask]
+            for size in range(1, len(active)):
+                for group in itertools.combinations(active, size):
+                    union = 0
+                    for h in group:
+                        union |= masks[h]
+                    if bitboard.count_pieces(union) != sum(counts[h] for h in group):
+                        continue
+                    for h in active:
+                        if h not in group and masks[h] & union:
+                            masks[h] &= ~union
+                            changed = True
+            for index in bitboard.iter_bits(hidden & ~sum(fixed)):
+                bit = 1 << index
+                owners = [h for h, mask in enumerate(masks) if mask & bit]
+                if len(owners) == 1:
+                    h = owners[0]
+                    fixed[h] |= bit
+                    counts[h] -= 1
+                    masks[h] &= ~bit
+                    changed = True
+
+        pieces = list(bitboard.iter_bits(hidden & ~sum(fixed)))
+        weights = [[float(mask >> i & 1) for i in pieces] for mask in masks]
+
+        for _ in range(PROBABILITY_ITERATIONS):
+            # Cada mano suma su cantidad de fichas.
+            for row, count in zip(weights, counts):
+                total = sum(row)
+                if total:
+                    factor = count / total
+                    for k in range(len(row)):
+                        row[k] *= factor
+            # Cada ficha oculta está en un solo lugar.
+            for k in range(len(pieces)):
+                total = sum(row[k] for row in weights)
+                if total:
+                    for row in weights:
+                        row[k] /= total
+
+            error = max(abs(sum(row) - count) for row, count in zip(weights, counts))
+            if error < PROBABILITY_TOLERANCE:
+                break
+
+        size = self.__game.piece_set.count
+        probabilities = [[0.0] * size for _ in range(seats)]
+        for h, seat in enumerate(holders):
+            for k, index in enumerate(pieces):
+                probabilities[seat][index] = weights[h][k]
+            for index in bitboard.iter_bits(fixed[h]):
+                probabilities[seat][index] = 1.0
+        if self.__observer != -1:
+            for index in bitboard.iter_bits(self.__possible[self.__observer]):
+                probabilities[self.__observer][index] = 1.0
+        return probabilities
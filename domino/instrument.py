@@ -0,0 +1,249 @@
+"""Instrumentación opcional del ciclo del juego.
+
+Al activarla se reemplazan los métodos medidos por envoltorios que cuentan
+y cronometran cada llamada; al desactivarla se restauran los originales,
+así que desactivada no agrega ningún costo.
+
+Ejemplo:
+
+    with instrument.enabled(trace=True):
+        play_games()
+    print(instrument.get_stats())
+    instrument.export_trace("trace.json")   # chrome://tracing o Perfetto
+
+Las estadísticas se agregan por proceso y por partida (según su GameRecord;
+las decisiones de estrategia se asignan a la partida del Player.play o
+Game.run en curso). Para varios procesos, combine los get_stats() con merge_stats().
+"""
+import contextlib
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+import weakref
+from typing import Callable, Dict, Iterator, List, Tuple, Union
+
+from .game import Game
+from .player import Player
+from .record import GameRecord
+
+
+# Métodos medidos: (clase, nombre). Las subclases de Player que redefinen
+# choose_move se agregan al activar.
+TARGETS: List[Tuple[type, str]] = [
+    (GameRecord, "move"),
+    (GameRecord, "_move"),
+    (GameRecord, "build_row"),
+    (Game, "play"),
+    (Game, "run"),
+    (Game, "get_correct_side_for_piece"),
+    (Player, "play"),
+    (Player, "choose_move"),
+]
+
+_lock = threading.Lock()
+_local = threading.local()
+
+# Métodos originales de los envoltorios instalados.
+_originals: Dict[Tuple[type, str], Callable] = {}
+_trace = False
+_trace_limit = 0
+
+# name -> [llamadas, total ns, máximo ns]
+_process: Dict[str, List[int]] = {}
+# número de partida -> name -> [llamadas, total ns, máximo ns]
+_games: Dict[int, Dict[str, List[int]]] = {}
+_games_numbers: 'weakref.WeakKeyDictionary[GameRecord, int]' = weakref.WeakKeyDictionary()
+_events: List[Dict] = []
+_counter = itertools.count(1)
+
+
+def _get_game_number(record: Union[GameRecord, None]) -> Union[int, None]:
+    if record is None:
+        return None
+    number = _games_numbers.get(record)
+    if number is None:
+        number = _games_numbers[record] = next(_counter)
+    return number
+
+
+def _get_record(owner: object) -> Union[GameRecord, None]:
+    if isinstance(owner, GameRecord):
+        return owner
+    if isinstance(owner, Game):
+        return owner.record
+    return getattr(_local, "record", None)
+
+
+def _add(totals: Dict[str, List[int]], name: str, elapsed: int) -> None:
+    values = totals.get(name)
+    if values is None:
+        totals[name] = [1, elapsed, elapsed]
+        return
+    values[0] += 1
+    values[1] += elapsed
+    if elapsed > values[2]:
+        values[2] = elapsed
+
+
+def _wrap(name: str, function: Callable) -> Callable:
+    timer = time.perf_counter_ns
+    # Las decisiones de estrategia dentro de estos métodos se asignan a su
+    # partida.
+    sets_record = name in ("Player.play", "Game.run")
+
+    @functools.wraps(function)
+    def wrapper(self, *args, **kwargs):
+        record = _get_record(self)
+        if sets_record:
+            previous = getattr(_local, "record", None)
+            if isinstance(self, Game):
+                game = self
+            else:
+                game = args[0] if args else kwargs.get("game")
+            _local.record = game.record if isinstance(game, Game) else None
+            record = _local.record
+
+        started = timer()
+        try:
+            return function(self, *args, **kwargs)
+        finally:
+            elapsed = timer() - started
+            if sets_record:
+                _local.record = previous
+
+            with _lock:
+                _add(_process, name, elapsed)
+                number = _get_game_number(record)
+                if number is not None:
+                    _add(_games.setdefault(number, {}), name, elapsed)
+                if _trace and len(_events) < _trace_limit:
+                    _events.append({
+                        "name": name,
+                        "ph": "X",
+                        "ts": started / 1000,
+                        "dur": elapsed / 1000,
+                        "pid": os.getpid(),
+                        "tid": threading.get_ident(),
+                        "args": {"game": number},
+                    })
+
+    wrapper.__instrumented__ = True
+    return wrapper
+
+
+def _get_targets() -> List[Tuple[type, str]]:
+    targets = list(TARGETS)
+    pending = list(Player.__subclasses__())
+    while pending:
+        cls = pending.pop()
+        pending.extend(cls.__subclasses__())
+        if "choose_move" in cls.__dict__:
+            targets.append((cls, "choose_move"))
+    return targets
+
+
+def is_enabled() -> bool:
+    return bool(_originals)
+
+
+def enable(trace: bool = False, trace_limit: int = 1000000) -> None:
+    """Instala los envoltorios.
+
+    Args:
+        trace (bool, optional): Guarda además cada llamada como evento para
+        export_trace().
+        trace_limit (int, optional): Máximo de eventos guardados.
+    """
+    global _trace, _trace_limit
+    _trace = trace
+    _trace_limit = trace_limit
+
+    for cls, attribute in _get_targets():
+        if (cls, attribute) in _originals:
+            continue
+        function = cls.__dict__[attribute]
+        _originals[(cls, attribute)] = function
+        setattr(cls, attribute, _wrap("%s.%s" % (cls.__name__, attribute), function))
+
+
+def disable() -> None:
+    """Restaura los métodos originales. Las estadísticas se conservan."""
+    global _trace
+    for (cls, attribute), function in _originals.items():
+        setattr(cls, attribute, function)
+    _originals.clear()
+    _trace = False
+
+
+@contextlib.contextmanager
+def enabled(trace: bool = False, trace_limit: int = 1000000) -> Iterator[None]:
+    enable(trace, trace_limit)
+    try:
+        yield
+    finally:
+        disable()
+
+
+def reset() -> None:
+    """Borra las estadísticas y los eventos acumulados."""
+    with _lock:
+        _process.clear()
+        _games.clear()
+        _games_numbers.clear()
+        _events.clear()
+
+
+def _summarize(totals: Dict[str, List[int]]) -> Dict[str, Dict[str, float]]:
+    return {
+        name: {
+            "calls": calls,
+            "total_ms": total / 1e6,
+            "mean_us": total / calls / 1000,
+            "max_us": maximum / 1000,
+        }
+        for name, (calls, total, maximum) in totals.items()
+    }
+
+
+def get_stats() -> Dict:
+    """Estadísticas del proceso y de cada partida."""
+    with _lock:
+        return {
+            "pid": os.getpid(),
+            "process": _summarize(_process),
+            "games": {number: _summarize(totals) for number, totals in _games.items()},
+        }
+
+
+def merge_stats(stats: List[Dict]) -> Dict[str, Dict[str, float]]:
+    """Combina las estadísticas de proceso de varios get_stats()."""
+    totals: Dict[str, List[float]] = {}
+    for item in stats:
+        for name, values in item["process"].items():
+            merged = totals.setdefault(name, [0, 0.0, 0.0])
+            merged[0] += values["calls"]
+            merged[1] += values["total_ms"]
+            merged[2] = max(merged[2], values["max_us"])
+
+    return {
+        name: {
+            "calls": calls,
+            "total_ms": total,
+            "mean_us": total * 1000 / calls,
+            "max_us": maximum,
+        }
+        for name, (calls, total, maximum) in totals.items()
+    }
+
+
+def export_trace(path: str) -> int:
+    """Escribe los eventos en formato Chrome trace-event JSON. Devuelve la
+    cantidad de eventos escritos."""
+    with _lock:
+        events = list(_events)
+    with open(path, "w") as file:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+    return len(events)
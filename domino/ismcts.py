@@ -0,0 +1,354 @@
+"""Jugador con búsqueda Monte Carlo en árboles de conjuntos de información
+(Single-Observer ISMCTS).
+
+En cada iteración se reparten al azar las fichas que el jugador no ve entre
+los rivales y el pozo, respetando la cantidad de fichas de cada rival y los
+números que se sabe que no tienen (porque pasaron), y se recorre el árbol
+con ese reparto. El árbol se conserva entre turnos cuando se pueden deducir
+las jugadas de los rivales.
+"""
+import math
+import random
+import time
+from concurrent.futures import Executor
+from typing import Dict, List, NamedTuple, Sequence, Tuple, Union
+
+from . import bitboard
+from .bitboard import BoardState, Move
+from .player import Player
+
+
+# Acción de pasar en el árbol.
+PASS: Move = (-1, 0)
+
+
+class Observation(NamedTuple):
+    """Lo que el jugador sabe de la partida al momento de decidir."""
+    seat: int
+    hand: int
+    played: int
+    a: int
+    b: int
+    counts: Tuple[int, ...]
+    # Máscara de las fichas que cada asiento no puede tener.
+    excluded: Tuple[int, ...]
+    passes: int
+    # Máscara de las fichas del juego.
+    pieces: int = bitboard.ALL_PIECES_MASK
+
+
+class Node:
+    """Nodo del árbol: la acción que lleva a él y sus estadísticas, desde el
+    punto de vista del asiento que la jugó."""
+
+    __slots__ = ("seat", "visits", "reward", "available", "children")
+
+    def __init__(self, seat: int = -1):
+        self.seat = seat
+        self.visits = 0
+        self.reward = 0.0
+        self.available = 0
+        self.children: Dict[Move, Node] = {}
+
+
+def sample(observation: Observation, rng: random.Random) -> BoardState:
+    """Reparte las fichas ocultas de forma consistente con la observación.
+
+    Si tras varios intentos no se encuentra un reparto que respete todas las
+    exclusiones, se ignoran (puede pasar con deducciones incompletas).
+    """
+    hidden = observation.pieces & ~observation.hand & ~observation.played
+    hidden_pieces = list(bitboard.iter_bits(hidden))
+    seats = [seat for seat in range(len(observation.counts))
+             if seat != observation.seat]
+    # Primero los asientos con más restricciones.
+    seats.sort(key=lambda seat: -bitboard.count_pieces(observation.excluded[seat]))
+
+    for attempt in range(8):
+        excluded = observation.excluded if attempt < 7 else (0,) * len(observation.counts)
+        rng.shuffle(hidden_pieces)
+        remaining = hidden_pieces
+        hands = [0] * len(observation.counts)
+        hands[observation.seat] = observation.hand
+
+        for seat in seats:
+            allowed = [i for i in remaining if not excluded[seat] >> i & 1]
+            count = observation.counts[seat]
+            if len(allowed) < count:
+                break
+            taken = allowed[:count]
+            for i in taken:
+                hands[seat] |= 1 << i
+            taken_mask = hands[seat]
+            remaining = [i for i in remaining if not taken_mask >> i & 1]
+        else:
+            return BoardState(tuple(hands), observation.played, observation.a,
+                              observation.b, observation.seat, observation.passes,
+                              observation.pieces)
+
+    raise AssertionError("unreachable")
+
+
+def search(root: Node, observation: Observation, rng: random.Random,
+           iterations: int = None, time_limit: float = None,
+           exploration: float = 0.7) -> int:
+    """Realiza iteraciones de ISMCTS sobre el árbol hasta agotar el número de
+    iteraciones o el tiempo (en segundos). Devuelve las iteraciones hechas."""
+    deadline = time.perf_counter() + time_limit if time_limit else None
+    done = 0
+
+    def rollout_policy(state, moves):
+        return moves[rng.randrange(len(moves))]
+
+    players = len(observation.counts)
+    policies = [rollout_policy] * players
+
+    while (iterations is None or done < iterations) and (
+            deadline is None or done % 16 or time.perf_counter() < deadline):
+        state = sample(observation, rng)
+        node = root
+        path = [root]
+
+        # Selección y expansión.
+        while not bitboard.is_finished(state):
+            moves = bitboard.legal_moves(state) or [PASS]
+            untried = []
+            for move in moves:
+                child = node.children.get(move)
+                if child is None:
+                    untried.append(move)
+                else:
+                    child.available += 1
+
+            if untried:
+                move = untried[rng.randrange(len(untried))]
+                child = node.children[move] = Node(state.turn)
+                child.available = 1
+            else:
+                best = -1.0
+                for candidate in moves:
+                    option = node.children[candidate]
+                    score = option.reward / option.visits + exploration * math.sqrt(
+                        math.log(option.available) / option.visits)
+                    if score > best:
+                        best, move, child = score, candidate, option
+
+            state = _apply(state, move)
+            node = child
+            path.append(node)
+            if untried:
+                break
+
+        # Simulación y retropropagación.
+        final, _ = bitboard.playout(state, policies)
+        winner = bitboard.get_winner(final)
+        for node in path[1:]:
+            node.visits += 1
+            if winner == node.seat:
+                node.reward += 1.0
+            elif winner == -1:
+                node.reward += 0.5
+
+        done += 1
+
+    return done
+
+
+def _apply(state: BoardState, move: Move) -> BoardState:
+    if move == PASS:
+        return bitboard.pass_turn(state)
+    return bitboard.play(state, *move)
+
+
+def _search_visits(observation: Observation, seed: int, iterations: int,
+                   time_limit: float, exploration: float) -> Tuple[Dict[Move, int], int]:
+    """Búsqueda independiente para ejecutar en otro hilo o proceso."""
+    root = Node()
+    done = search(root, observation, random.Random(seed), iterations,
+                  time_limit, exploration)
+    return {move: child.visits for move, child in root.children.items()}, done
+
+
+class ISMCTSPlayer(Player):
+    """Jugador que decide con ISMCTS.
+
+    Args:
+        number (int): Número del jugador (1-4).
+        name (str, optional): Nombre del jugador.
+        iterations (int, optional): Iteraciones por decisión.
+        time_limit (float, optional): Segundos por decisión. Si se indican
+        ambos límites se detiene con el primero que se alcance.
+        exploration (float, optional): Constante de exploración de UCB.
+        executor (Executor, optional): Si se indica, se ejecutan `searches`
+        búsquedas independientes en él y se suman sus visitas (paralelización
+        en la raíz). En este modo el árbol no se conserva entre turnos.
+        searches (int, optional): Búsquedas por decisión con executor.
+        seed (int, optional): Semilla del generador aleatorio.
+    """
+
+    def __init__(self, number: int, name: str = None, iterations: int = 500,
+                 time_limit: float = None, exploration: float = 0.7,
+                 executor: Executor = None, searches: int = 4, seed: int = None):
+        super().__init__(number, name)
+        self.__iterations = iterations
+        self.__time_limit = time_limit
+        self.__exploration = exploration
+        self.__executor = executor
+        self.__searches = searches
+        self.__random = random.Random(seed)
+
+        self.__root: Union[Node, None] = None
+        # Lo observado tras el último movimiento propio.
+        self.__last: Union[Observation, None] = None
+        self.__excluded: List[int] = []
+
+        self.__last_iterations = 0
+        self.__last_elapsed = 0.0
+
+    def __getstate__(self):
+        # El árbol y el executor no se envían a otros procesos.
+        state = self.__dict__.copy()
+        state["_ISMCTSPlayer__root"] = None
+        state["_ISMCTSPlayer__last"] = None
+        state["_ISMCTSPlayer__executor"] = None
+        return state
+
+    @property
+    def last_iterations(self) -> int:
+        """Iteraciones realizadas en la última decisión."""
+        return self.__last_iterations
+
+    @property
+    def iterations_per_second(self) -> float:
+        """Velocidad de la última decisión."""
+        if not self.__last_elapsed:
+            return 0.0
+        return self.__last_iterations / self.__last_elapsed
+
+    def choose_move(self, state: BoardState, moves: Sequence[Move]) -> Move:
+        if len(moves) == 1:
+            self.__observe(state)
+            self.__advance(moves[0], state)
+            return moves[0]
+
+        observation = self.__observe(state)
+        started = time.perf_counter()
+
+        if self.__executor is not None:
+            visits, done = self.__search_parallel(observation)
+            self.__root = None
+        else:
+            done = search(self.__root, observation, self.__random,
+                          self.__iterations, self.__time_limit, self.__exploration)
+            visits = {move: child.visits
+                      for move, child in self.__root.children.items()}
+
+        self.__last_elapsed = time.perf_counter() - started
+        self.__last_iterations = done
+
+        move = max(moves, key=lambda move: visits.get(move, 0))
+        self.__advance(move, state)
+        return move
+
+    def __search_parallel(self, observation: Observation) -> Tuple[Dict[Move, int], int]:
+        iterations = None
+        if self.__iterations is not None:
+            iterations = max(1, self.__iterations // self.__searches)
+
+        futures = [
+            self.__executor.submit(_search_visits, observation,
+                                   self.__random.getrandbits(32), iterations,
+                                   self.__time_limit, self.__exploration)
+            for _ in range(self.__searches)
+        ]
+        visits: Dict[Move, int] = {}
+        done = 0
+        for future in futures:
+            result, iterations_done = future.result()
+            done += iterations_done
+            for move, count in result.items():
+                visits[move] = visits.get(move, 0) + count
+        return visits, done
+
+    def __observe(self, state: BoardState) -> Observation:
+        """Actualiza lo deducido desde el último turno propio y ubica la raíz
+        del árbol en el estado actual."""
+        counts = tuple(bitboard.count_pieces(hand) for hand in state.hands)
+        last = self.__last
+
+        if last is None or last.played & ~state.played or any(
+                count > previous for count, previous in zip(counts, last.counts)):
+            # Partida nueva.
+            self.__excluded = [0] * len(state.hands)
+            self.__root = Node()
+        else:
+            self.__deduce_passes(last, counts)
+            self.__root = self.__follow(last, state, counts)
+
+        return Observation(state.turn, state.hands[state.turn], state.played,
+                           state.a, state.b, counts, tuple(self.__excluded),
+                           state.passes, state.pieces)
+
+    def __deduce_passes(self, last: Observation, counts: Tuple[int, ...]) -> None:
+        # Los asientos siguientes que no han jugado desde el último movimiento
+        # propio pasaron con los extremos que este dejó: no tienen esos números.
+        players = len(counts)
+        for offset in range(1, players):
+            seat = (last.seat + offset) % players
+            if counts[seat] != last.counts[seat]:
+                break
+            self.__excluded[seat] |= (bitboard.NUMBER_MASKS[last.a] |
+                                      bitboard.NUMBER_MASKS[last.b])
+
+    def __follow(self, last: Observation, state: BoardState,
+                 counts: Tuple[int, ...]) -> Node:
+        """Baja por el árbol con las jugadas de los rivales desde el último
+        turno propio, si se pueden deducir; si no, devuelve un árbol nuevo."""
+        node = self.__root
+        if node is None:
+            return Node()
+
+        players = len(counts)
+        new_pieces = list(bitboard.iter_bits(state.played & ~last.played))
+        current = BoardState(tuple(0 for _ in counts), last.played, last.a, last.b,
+                             (last.seat + 1) % players, 0, last.pieces)
+
+        for offset in range(1, players):
+            seat = (last.seat + offset) % players
+            delta = last.counts[seat] - counts[seat]
+            if delta == 0:
+                move = PASS
+                current = bitboard.pass_turn(current)
+            elif delta == 1 and len(new_pieces) == 1:
+                index = new_pieces.pop()
+                hands = list(current.hands)
+                hands[seat] = 1 << index
+                current = current._replace(hands=tuple(hands))
+                # Solo se jugó una ficha, así que los extremos actuales indican 
+                # el lado; si ambos lados dan lo mismo se usa el del árbol.
+                matches = [m for m in bitboard.legal_moves(current) if m[0] == index
+                           and _apply(current, m)[2:4] == (state.a, state.b)]
+                if not matches:
+                    return Node()
+                move = next((m for m in matches if m in node.children), matches[0])
+                current = _apply(current, move)
+            else:
+                return Node()
+
+            node = node.children.get(move)
+            if node is None:
+                return Node()
+
+        if new_pieces or (current.a, current.b) != (state.a, state.b):
+            return Node()
+        return node
+
+    def __advance(self, move: Move, state: BoardState) -> None:
+        """Guarda lo observado tras el movimiento propio y baja la raíz."""
+        after = _apply(state, move)
+        counts = tuple(bitboard.count_pieces(hand) for hand in after.hands)
+        self.__last = Observation(state.turn, after.hands[state.turn], after.played,
+                                  after.a, after.b, counts, tuple(self.__excluded),
+                                  after.passes, after.pieces)
+        if self.__root is not None:
+            self.__root = self.__root.children.get(move)
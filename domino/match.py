@@ -0,0 +1,193 @@
+"""Partidas a puntos: varias manos (rondas) seguidas hasta llegar a la meta.
+
+    match = Match([PLAYER1, PLAYER2, PLAYER3, PLAYER4], target=200, teams=True)
+    match.play()
+    match.scores, match.get_winner()
+
+Cada ronda es un Game nuevo. Termina con dominó (un jugador se queda sin
+fichas) o trancada (todos pasan seguidos); gana quien se quedó sin fichas o,
+si se trancó, quien tenga menos puntos (ver Game.get_winner). El bando
+ganador suma los puntos que quedan en las manos de los demás bandos; si hay
+empate nadie suma. El ganador sale en la ronda siguiente.
+
+Los puntos de cada mano se llevan en el registro (GameRecord.get_possession_pips)
+al mover cada ficha, así puntuar una ronda no recorre las manos. De una ronda
+solo se guarda su RoundResult, por lo que el costo por ronda no crece con el
+largo de la partida.
+"""
+import random
+from typing import List, NamedTuple, Sequence, Tuple, Union
+
+from .domino import Domino
+from .exceptions import DominoError, InvalidPlayer
+from .game import Game
+from .piece import DOUBLE_SIX, PieceSet
+from .player import Player
+
+
+class RoundResult(NamedTuple):
+    """Resultado de una ronda.
+
+    number: Número de la ronda, desde 1.
+    winner: Jugador que ganó la ronda, o None si hubo empate.
+    side: Bando ganador (ver Match.get_side), o -1 si hubo empate.
+    blocked: Si la ronda terminó trancada.
+    points: Puntos que sumó el bando ganador.
+    pips: Puntos que le quedaron a cada jugador, en el orden de Match.players.
+    turns: Fichas jugadas en la ronda.
+    """
+    number: int
+    winner: Union[Player, None]
+    side: int
+    blocked: bool
+    points: int
+    pips: Tuple[int, ...]
+    turns: int
+
+
+class Match(Domino):
+    """Partida a puntos entre 2 y 4 jugadores.
+
+    Args:
+        players (Sequence[Player]): Jugadores en orden de asiento, con números
+        distintos.
+        target (int, optional): Puntos para ganar. Defaults to 100.
+        teams (bool, optional): Con 4 jugadores, juegan en parejas los asientos
+        0 y 2 contra 1 y 3. Defaults to False.
+        piece_set (PieceSet, optional): Defaults to DOUBLE_SIX.
+        compact (bool, optional): Modo del registro de cada ronda.
+        seed (int, optional): Semilla de los repartos de todas las rondas.
+    """
+
+    TARGET = 100
+
+    def __init__(self, players: Sequence[Player], target: int = TARGET,
+                 teams: bool = False, piece_set: PieceSet = DOUBLE_SIX,
+                 compact: bool = False, seed: int = None):
+        self.__players = [Player.clean_player(player) for player in players]
+        if not 2 <= len(self.__players) <= 4:
+            raise InvalidPlayer("A match needs between 2 and 4 players.")
+        if len({player.number for player in self.__players}) != len(self.__players):
+            raise InvalidPlayer("The players of a match must have distinct numbers.")
+        if teams and len(self.__players) != 4:
+            raise DominoError("Teams need 4 players.")
+        if not isinstance(target, int) or target < 1:
+            raise DominoError("The target must be a positive integer.")
+
+        self.__target = target
+        self.__teams = teams
+        self.__piece_set = PieceSet.clean_piece_set(piece_set)
+        self.__compact = compact
+        self.__rng = random.Random(seed)
+
+        self.__scores = [0] * (2 if teams else len(self.__players))
+        self.__rounds: List[RoundResult] = []
+        self.__starter = 0
+        self.__game: Union[Game, None] = None
+
+    def __str__(self):
+        return "Match(%s)" % "-".join(str(score) for score in self.__scores)
+
+    @property
+    def players(self) -> List[Player]:
+        return self.__players
+
+    @property
+    def target(self) -> int:
+        return self.__target
+
+    @property
+    def teams(self) -> bool:
+        return self.__teams
+
+    @property
+    def piece_set(self) -> PieceSet:
+        return self.__piece_set
+
+    @property
+    def scores(self) -> Tuple[int, ...]:
+        """Puntos de cada bando."""
+        return tuple(self.__scores)
+
+    @property
+    def rounds(self) -> List[RoundResult]:
+        return self.__rounds
+
+    @property
+    def game(self) -> Union[Game, None]:
+        """Ronda en curso, o None si no hay."""
+        return self.__game
+
+    def get_side(self, player: Player) -> int:
+        """Bando del jugador: su asiento, o asiento % 2 si juegan en parejas."""
+        seat = self.__players.index(player)
+        return seat % 2 if self.__teams else seat
+
+    def get_side_players(self, side: int) -> List[Player]:
+        return [player for player in self.__players if self.get_side(player) == side]
+
+    def is_finished(self) -> bool:
+        return max(self.__scores) >= self.__target
+
+    def get_winner(self) -> int:
+        """Bando ganador de la partida, o -1 si no ha terminado."""
+        if not self.is_finished():
+            return -1
+        return self.__scores.index(max(self.__scores))
+
+    def new_round(self) -> Game:
+        """Reparte una ronda nueva; el ganador de la anterior sale primero."""
+        if self.is_finished():
+            raise DominoError("The match is finished.")
+        if self.__game is not None:
+            raise DominoError("The current round is not finished.")
+
+        start = self.__starter
+        players = self.__players[start:] + self.__players[:start]
+        self.__game = Game.create(*players, compact=self.__compact,
+                                  seed=self.__rng.getrandbits(64),
+                                  piece_set=self.__piece_set)
+        return self.__game
+
+    def finish_round(self) -> RoundResult:
+        """Puntúa la ronda en curso, que debe haber terminado."""
+        game = self.__game
+        if game is None or not game.is_finished():
+            raise DominoError("The current round is not finished.")
+
+        winner = game.get_winner()
+        pips = tuple(game.get_player_pips(player) for player in self.__players)
+        side = points = -1
+        if winner is None:
+            points = 0
+        else:
+            side = self.get_side(winner)
+            points = sum(pip for player, pip in zip(self.__players, pips)
+                         if self.get_side(player) != side)
+            self.__scores[side] += points
+            self.__starter = self.__players.index(winner)
+
+        result = RoundResult(
+            number=len(self.__rounds) + 1,
+            winner=winner,
+            side=side,
+            blocked=game.is_blocked(),
+            points=points,
+            pips=pips,
+            turns=bin(game.record.played_mask).count("1"),
+        )
+        self.__rounds.append(result)
+        self.__game = None
+        return result
+
+    def play_round(self) -> RoundResult:
+        """Juega una ronda completa con la estrategia (choose_move) de cada
+        jugador (ver Game.run)."""
+        self.new_round().run()
+        return self.finish_round()
+
+    def play(self) -> int:
+        """Juega rondas hasta que un bando llegue a la meta y lo devuelve."""
+        while not self.is_finished():
+            self.play_round()
+        return self.get_winner()
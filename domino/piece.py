@@ -1,223 +1,287 @@
 
+from typing import Dict, List, Tuple
 
+from .exceptions import InvalidPieceNumber, InvalidPiece
 
 
-from typing import List, Tuple
+def _get_pieces_values(max_number: int) -> Tuple[Tuple[int, int], ...]:
+    """Valores de las fichas hasta el doble `max_number`.
 
-from .exceptions import InvalidPieceNumber, InvalidPiece
+    Las del doble seis van primero y en su orden de siempre; las siguientes 
+    se agregan agrupadas por su número mayor (0:7, 1:7, ..., 7:7, 0:8, ...), 
+    así las fichas de cada juego son un prefijo de las del juego mayor.
+    """
+    base = min(max_number, 6)
+    values = [(a, b) for a in range(base + 1) for b in range(a, base + 1)]
+    for b in range(7, max_number + 1):
+        values.extend((a, b) for a in range(b + 1))
+    return tuple(values)
 
 
 class Piece:
-    
-    PIECES = (
-        (0, 0), (0, 1), (0, 2), (0, 3), (0, 4), (0, 5), (0, 6),
-        (1, 1), (1, 2), (1, 3), (1, 4), (1, 5), (1, 6),
-        (2, 2), (2, 3), (2, 4), (2, 5), (2, 6),
-        (3, 3), (3, 4), (3, 5), (3, 6),
-        (4, 4), (4, 5), (4, 6),
-        (5, 5), (5, 6),
-        (6, 6),
-    )
-    
-    def __init__(self, a: int, b: int):    
-        self.__a = self.clean_number(a)
-        self.__b = self.clean_number(b)
-            
+    """Ficha de dominó.
+
+    Solo existen las instancias de PIECES creadas al cargar el módulo; 
+    Piece(a, b), Piece.from_values y Piece.from_index devuelven siempre la 
+    misma instancia para los mismos valores, por lo que las fichas son 
+    inmutables y se pueden usar como claves de diccionarios y conjuntos.
+    """
+
+    # Número mayor de las fichas (juego de doble doce). Cada juego de fichas
+    # (ver PieceSet) usa las primeras de PIECES.
+    MAX_NUMBER = 12
+
+    PIECES = _get_pieces_values(MAX_NUMBER)
+
+    __slots__ = ("__a", "__b", "__index", "__total", "__tuple")
+
+    # Instancias únicas, por índice y por valores (en ambos órdenes).
+    __by_index: List['Piece'] = []
+    __by_values: Dict[Tuple[int, int], 'Piece'] = {}
+
+    def __new__(cls, a: int, b: int) -> 'Piece':
+        return cls.from_values(a, b)
+
     def __str__(self):
-        return "%d:%d" % self.tuple()
-    
+        return "%d:%d" % self.__tuple
+
     def __repr__(self):
         return "Ficha(%s)" % str(self)
-    
+
     def __iter__(self):
-        yield self.__a 
+        yield self.__a
         yield self.__b
-    
-    def __eq__(self, other: 'Piece') -> bool:
-        # Se comparán los valores (no el objeto).
-        # Para comparar el objeto use 'is', example: piece1 is piece2
-        return sum(other) == sum(self)
-    
-    def __lt__(self, other: 'Piece') -> bool:
-        return sum(other) > sum(self)
-    
-    def __gt__(self, other: 'Piece') -> bool:
-        return sum(other) < sum(self)
-    
-    @property
-    def a(self) -> int:
-        return self.__a 
-    
-    @property
-    def b(self) -> int:
-        return self.__b
-    
-    def tuple(self) -> Tuple:
-        return (self.__a, self.__b)
-    
-    @classmethod
-    def clean_number(cls, number: int) -> int:
-        if not isinstance(number, int):
-            raise InvalidPieceNumber("The number must be of type integer.")
-        
-        if not number in (0, 1, 2, 3, 4, 5, 6):
-            raise InvalidPieceNumber("The number is outside the range 0-6.")
-        
-        return number
-    
-    @classmethod
-    def clean_piece(cls, piece: 'Piece') -> 'Piece':
-        if not isinstance(piece, Piece):
-            raise InvalidPiece("The piece type '%s' is not valid." % str(piece))
-        return piece
-
-    
-class Piece00(Piece):
-    def __init__(self):
-        super().__init__(0, 0)
-        
-
-class Piece01(Piece):
-    def __init__(self):
-        super().__init__(0, 1)
 
+    def __contains__(self, number: int) -> bool:
+        return number == self.__a or number == self.__b
 
-class Piece02(Piece):
-    def __init__(self):
-        super().__init__(0, 2)
+    def __hash__(self):
+        return self.__index
 
+    def __eq__(self, other: 'Piece') -> bool:
+        # Al ser instancias únicas, comparar el índice equivale a comparar los
+        # valores (y el objeto).
+        if not isinstance(other, Piece):
+            return NotImplemented
+        return self.__index == other.__index
 
-class Piece03(Piece):
-    def __init__(self):
-        super().__init__(0, 3)
+    def __lt__(self, other: 'Piece') -> bool:
+        # Se ordena por puntos y, a igual puntuación, por índice.
+        if not isinstance(other, Piece):
+            return NotImplemented
+        return (self.__total, self.__index) < (other.__total, other.__index)
 
+    def __gt__(self, other: 'Piece') -> bool:
+        if not isinstance(other, Piece):
+            return NotImplemented
+        return (self.__total, self.__index) > (other.__total, other.__index)
 
-class Piece04(Piece):
-    def __init__(self):
-        super().__init__(0, 4)
+    def __setattr__(self, name, value):
+        raise AttributeError("Piece is immutable.")
 
+    def __reduce__(self):
+        # Al deserializar se recupera la instancia única.
+        return (Piece.from_index, (self.__index,))
 
-class Piece05(Piece):
-    def __init__(self):
-        super().__init__(0, 5)
+    @property
+    def a(self) -> int:
+        return self.__a
 
+    @property
+    def b(self) -> int:
+        return self.__b
 
-class Piece06(Piece):
-    def __init__(self):
-        super().__init__(0, 6)
+    @property
+    def index(self) -> int:
+        """Posición de la ficha en PIECES."""
+        return self.__index
 
+    @property
+    def mask(self) -> int:
+        return 1 << self.__index
 
-class Piece11(Piece):
-    def __init__(self):
-        super().__init__(1, 1)
+    @property
+    def total(self) -> int:
+        """Suma de los puntos de la ficha."""
+        return self.__total
 
+    def tuple(self) -> Tuple:
+        return self.__tuple
 
-class Piece12(Piece):
-    def __init__(self):
-        super().__init__(1, 2)
+    @classmethod
+    def from_index(cls, index: int) -> 'Piece':
+        try:
+            return cls.__by_index[index]
+        except (IndexError, TypeError):
+            raise InvalidPiece("The index %s is outside the range 0-%d."
+                               % (index, len(cls.PIECES) - 1))
 
+    @classmethod
+    def from_values(cls, a: int, b: int) -> 'Piece':
+        try:
+            return cls.__by_values[(a, b)]
+        except (KeyError, TypeError):
+            cls.clean_number(a)
+            cls.clean_number(b)
+            raise
 
-class Piece13(Piece):
-    def __init__(self):
-        super().__init__(1, 3)
-        
+    @classmethod
+    def clean_number(cls, number: int) -> int:
+        if not isinstance(number, int):
+            raise InvalidPieceNumber("The number must be of type integer.")
 
-class Piece14(Piece):
-    def __init__(self):
-        super().__init__(1, 4)
-        
+        if not 0 <= number <= cls.MAX_NUMBER:
+            raise InvalidPieceNumber("The number is outside the range 0-%d." 
+                                     % cls.MAX_NUMBER)
 
-class Piece15(Piece):
-    def __init__(self):
-        super().__init__(1, 5)
-        
+        return number
 
-class Piece16(Piece):
-    def __init__(self):
-        super().__init__(1, 6)
-        
+    @classmethod
+    def clean_piece(cls, piece: 'Piece') -> 'Piece':
+        if not isinstance(piece, Piece):
+            raise InvalidPiece("The piece type '%s' is not valid." % str(piece))
+        return piece
 
-class Piece22(Piece):
-    def __init__(self):
-        super().__init__(2, 2)
+    @classmethod
+    def _intern(cls) -> None:
+        """Crea las instancias únicas de todas las fichas."""
+        for index, (a, b) in enumerate(cls.PIECES):
+            piece = object.__new__(cls)
+            for name, value in (("a", a), ("b", b), ("index", index),
+                                ("total", a + b), ("tuple", (a, b))):
+                object.__setattr__(piece, "_Piece__" + name, value)
+
+            cls.__by_index.append(piece)
+            cls.__by_values[(a, b)] = piece
+            cls.__by_values[(b, a)] = piece
+
+
+Piece._intern()
+
+
+class PieceSet:
+    """Juego de fichas del doble 0 al doble `max_number`, con las tablas de 
+    búsqueda del motor de bits.
+
+    Las fichas del juego son las primeras `count` de Piece.PIECES, así que 
+    los índices y las máscaras de bits de una ficha son los mismos en todos 
+    los juegos. Por eso el juego menor es el doble seis: las fichas de un 
+    juego menor no son un prefijo de PIECES.
+
+    Args:
+        max_number (int): Número mayor (6 para doble seis), entre 6 y 
+        Piece.MAX_NUMBER.
+        hand_size (int): Fichas que se reparten a cada jugador.
+        name (str, optional): Nombre del juego.
+    """
+
+    __slots__ = ("__max_number", "__hand_size", "__name", "__count", "__mask", 
+                 "__number_masks", "__pips", "__other_number", "__doubles_mask")
+
+    # Número mayor del juego más chico que se puede crear.
+    MIN_NUMBER = 6
+
+    def __init__(self, max_number: int, hand_size: int, name: str = None):
+        self.__max_number = Piece.clean_number(max_number)
+        if max_number < self.MIN_NUMBER:
+            raise InvalidPieceNumber("The set number must be between %d and %d." 
+                                     % (self.MIN_NUMBER, Piece.MAX_NUMBER))
+        self.__count = (max_number + 1) * (max_number + 2) // 2
+
+        if not isinstance(hand_size, int) or not 1 <= hand_size <= self.__count // 2:
+            raise InvalidPieceNumber("The hand size must be between 1 and %d." 
+                                     % (self.__count // 2))
+
+        self.__hand_size = hand_size
+        self.__name = name or "double-%d" % max_number
+        self.__mask = (1 << self.__count) - 1
+
+        values = Piece.PIECES[:self.__count]
+        numbers = range(max_number + 1)
+        # Máscara de las fichas que llevan cada número.
+        self.__number_masks = tuple(
+            sum(1 << i for i, piece in enumerate(values) if number in piece)
+            for number in numbers)
+        # Puntos de cada ficha según su índice.
+        self.__pips = tuple(a + b for a, b in values)
+        # other_number[i][n] es el número que queda expuesto al poner la 
+        # ficha i sobre un extremo n (o -1 si no encaja).
+        self.__other_number = tuple(
+            tuple(b if a == n else a if b == n else -1 for n in numbers)
+            for a, b in values)
+        self.__doubles_mask = sum(1 << i for i, (a, b) in enumerate(values) if a == b)
 
+    def __str__(self):
+        return self.__name
 
-class Piece23(Piece):
-    def __init__(self):
-        super().__init__(2, 3)
+    def __repr__(self):
+        return "PieceSet(%s)" % self.__name
 
+    def __len__(self):
+        return self.__count
 
-class Piece24(Piece):
-    def __init__(self):
-        super().__init__(2, 4)
+    def __iter__(self):
+        for index in range(self.__count):
+            yield Piece.from_index(index)
 
+    def __contains__(self, piece: Piece) -> bool:
+        return isinstance(piece, Piece) and piece.index < self.__count
 
-class Piece25(Piece):
-    def __init__(self):
-        super().__init__(2, 5)
+    @property
+    def name(self) -> str:
+        return self.__name
 
+    @property
+    def max_number(self) -> int:
+        return self.__max_number
 
-class Piece26(Piece):
-    def __init__(self):
-        super().__init__(2, 6)
+    @property
+    def hand_size(self) -> int:
+        return self.__hand_size
 
+    @property
+    def count(self) -> int:
+        return self.__count
 
-class Piece33(Piece):
-    def __init__(self):
-        super().__init__(3, 3)
+    @property
+    def mask(self) -> int:
+        """Máscara de todas las fichas del juego."""
+        return self.__mask
 
+    @property
+    def max_players(self) -> int:
+        return min(4, self.__count // self.__hand_size)
 
-class Piece34(Piece):
-    def __init__(self):
-        super().__init__(3, 4)
+    @property
+    def number_masks(self) -> Tuple[int, ...]:
+        return self.__number_masks
 
+    @property
+    def pips(self) -> Tuple[int, ...]:
+        return self.__pips
 
-class Piece35(Piece):
-    def __init__(self):
-        super().__init__(3, 5)
-        
+    @property
+    def other_number(self) -> Tuple[Tuple[int, ...], ...]:
+        return self.__other_number
 
-class Piece36(Piece):
-    def __init__(self):
-        super().__init__(3, 6)
+    @property
+    def doubles_mask(self) -> int:
+        return self.__doubles_mask
 
+    @classmethod
+    def clean_piece_set(cls, piece_set: 'PieceSet') -> 'PieceSet':
+        if not isinstance(piece_set, PieceSet):
+            raise InvalidPiece("The piece set '%s' is not valid." % str(piece_set))
+        return piece_set
 
-class Piece44(Piece):
-    def __init__(self):
-        super().__init__(4, 4)
-   
 
-class Piece45(Piece):
-    def __init__(self):
-        super().__init__(4, 5)
-   
-   
-class Piece46(Piece):
-    def __init__(self):
-        super().__init__(4, 6)
-   
-   
-class Piece55(Piece):
-    def __init__(self):
-        super().__init__(5, 5)
-   
+DOUBLE_SIX = PieceSet(6, 7, "double-six")
+DOUBLE_NINE = PieceSet(9, 10, "double-nine")
+DOUBLE_TWELVE = PieceSet(12, 15, "double-twelve")
 
-class Piece56(Piece):
-    def __init__(self):
-        super().__init__(5, 6)
-   
+PIECE_SETS: Dict[str, PieceSet] = {
+    piece_set.name: piece_set for piece_set in (DOUBLE_SIX, DOUBLE_NINE, DOUBLE_TWELVE)
+}
 
-class Piece66(Piece):
-    def __init__(self):
-        super().__init__(6, 6)
-        
-        
-ALL_PIECES: List[Piece] = [
-    Piece00(), Piece01(), Piece02(), Piece03(), Piece04(), Piece05(), Piece06(),
-    Piece11(), Piece12(), Piece13(), Piece14(), Piece15(), Piece16(),
-    Piece22(), Piece23(), Piece24(), Piece25(), Piece26(),
-    Piece33(), Piece34(), Piece35(), Piece36(),
-    Piece44(), Piece45(), Piece46(),
-    Piece55(), Piece56(),
-    Piece66(),
-]
\ No newline at end of file
+# Fichas del juego por defecto (doble seis).
+ALL_PIECES: List[Piece] = list(DOUBLE_SIX)
@@ -1,8 +1,10 @@
 
 
 
-from typing import Union, Type
+from typing import Sequence, Union, Type
 
+from . import bitboard
+from .bitboard import BoardState, Move
 from .exceptions import InvalidPlayerNumber, InvalidPlayer
 
 
@@ -54,13 +56,21 @@ class Player(Person):
         return player 
     
     def play(self, game) -> Union[_Movement, None]:
-        pieces_and_side = game.get_player_pieces_for_current_play(self)
+        state = game.get_state(self)
+        moves = bitboard.legal_moves(state)
         
-        if not pieces_and_side:
+        if not moves:
+            game.pass_turn(self)
             return
         
-        piece = max([e[0] for e in pieces_and_side])
-        return game.play(player=self, piece=piece)
+        index, side = self.choose_move(state, moves)
+        return game.play(player=self, piece=game.get_piece_from_index(index), 
+                         side=side)
+    
+    def choose_move(self, state: BoardState, moves: Sequence[Move]) -> Move:
+        """Elige uno de los movimientos válidos (índice de ficha, lado). 
+        Las subclases cambian la estrategia sobrescribiendo este método."""
+        return bitboard.choose_max_piece(state, moves)
         
 
 class Player1(Player):
@@ -2,11 +2,14 @@
 
 
 
-from typing import Tuple, Union, List, Dict
+from array import array
+from collections import deque
+from typing import Deque, Iterator, NamedTuple, Sequence, Tuple, Union, List, Dict
 
+from .bitboard import PIECES_PIPS, iter_bits
 from .exceptions import DominoError, InvalidPiece, InvalidSide
 from .piece import Piece
-from .player import ANNOTATOR, Player
+from .player import ALL_PLAYERS, ANNOTATOR, Annotator, Player
 from .table import Table
 from .domino import Domino
 
@@ -47,12 +50,338 @@ class Movement(Domino):
     @property
     def side(self) -> int:
         return self.__side
+    
+    @classmethod
+    def _create(cls, piece: Piece, _from: Union[Player, Table], 
+                to: Union[Player, Table], side: int) -> 'Movement':
+        """Crea el movimiento sin validar los parámetros. Solo para datos que 
+        ya fueron validados, como los del registro compacto."""
+        movement = cls.__new__(cls)
+        movement.__piece = piece
+        movement.__from = _from
+        movement.__to = to
+        movement.__side = side
+        return movement
+
+
+# Códigos de los dueños de las fichas en el registro compacto. Los jugadores 
+# se codifican como su número + 1 (2-5).
+ANNOTATOR_CODE = 0
+TABLE_CODE = 1
+
+# Códigos de los lados en el registro compacto.
+SIDES_CODES = {None: 0, Table.A: 1, Table.B: 2}
+CODES_SIDES = (None, Table.A, Table.B)
+
+# Bytes por movimiento en el registro compacto: ficha, desde, hacia y lado.
+MOVEMENT_SIZE = 4
+
+
+def get_owner_code(owner: Union[Player, Table, Annotator]) -> int:
+    """Obtiene el código del dueño de una ficha en el registro compacto."""
+    if isinstance(owner, Table):
+        return TABLE_CODE
+    if isinstance(owner, Annotator):
+        return ANNOTATOR_CODE
+    return owner.number + 1
+
+
+class RecordState:
+    """Estado de la partida tras los primeros `turn` movimientos del registro: 
+    las fichas de cada dueño, sus puntos y la fila jugada en la mesa.
+
+    La fila se guarda como pares (número, posición del movimiento en el 
+    registro); record[posición] devuelve el movimiento.
+    """
+    
+    def __init__(self, turn: int = 0, 
+                 possession_masks: Union[Dict[Union[Player, Table], int], Sequence] = None,
+                 row: Sequence[Tuple[int, int]] = (), played_mask: int = 0,
+                 possession_pips: Union[Dict[Union[Player, Table], int], Sequence] = None):
+        self.__turn = turn
+        # Máscara de bits (un bit por ficha, ver Piece.index) de las fichas 
+        # que posee cada jugador o la mesa.
+        self.__possession_masks = dict(possession_masks or {})
+        # Suma de los puntos de las fichas de cada dueño. Se actualiza con 
+        # cada movimiento; si no se indica, se calcula de las máscaras.
+        if possession_pips is None:
+            possession_pips = {owner: sum(PIECES_PIPS[i] for i in iter_bits(mask)) 
+                               for owner, mask in self.__possession_masks.items()}
+        self.__possession_pips = dict(possession_pips)
+        self.__row: Deque[Tuple[int, int]] = deque(row)
+        # Máscara de las fichas que forman parte de la fila.
+        self.__played_mask = played_mask
+    
+    def __str__(self):
+        return "RecordState(turn %d, ends %s)" % (self.__turn, self.ends)
+    
+    @property
+    def turn(self) -> int:
+        """Cantidad de movimientos aplicados."""
+        return self.__turn
+    
+    @property
+    def possession_masks(self) -> Dict[Union[Player, Table], int]:
+        return self.__possession_masks
+    
+    @property
+    def possession_pips(self) -> Dict[Union[Player, Table], int]:
+        return self.__possession_pips
+    
+    @property
+    def row(self) -> Deque[Tuple[int, int]]:
+        return self.__row
+    
+    @property
+    def played_mask(self) -> int:
+        return self.__played_mask
+    
+    @property
+    def ends(self) -> Union[Tuple[int, int], None]:
+        """Números de los extremos A y B de la fila, o None si está vacía."""
+        if not self.__row:
+            return None
+        return self.__row[0][0], self.__row[-1][0]
+    
+    def get_possession_mask(self, owner: Union[Player, Table]) -> int:
+        return self.__possession_masks.get(owner, 0)
+    
+    def get_possession_pips(self, owner: Union[Player, Table]) -> int:
+        return self.__possession_pips.get(owner, 0)
+    
+    def copy(self) -> 'RecordState':
+        return RecordState(self.__turn, self.__possession_masks, self.__row, 
+                           self.__played_mask, self.__possession_pips)
+    
+    def to_tuple(self) -> Tuple:
+        """Copia inmutable y liviana del estado; RecordState(*t) la restaura."""
+        return (self.__turn, tuple(self.__possession_masks.items()), 
+                tuple(self.__row), self.__played_mask, 
+                tuple(self.__possession_pips.items()))
+    
+    def get_side_for_piece(self, piece: Piece) -> int:
+        """Obtiene el lado de la fila en el que encaja la ficha.
+
+        Raises:
+            InvalidPiece: Si la ficha no encaja en ninguno de los extremos.
+        """
+        if not self.__row:
+            return Table.A
+        
+        a, b = self.__row[0][0], self.__row[-1][0]
+        
+        if a in piece: return Table.A
+        if b in piece: return Table.B
+        
+        raise InvalidPiece("The piece %s is not valid for either side %s or %s" 
+                                                                % (piece, a, b))
+    
+    def __get_row_number(self, movement: Movement) -> int:
+        """Valida el movimiento contra los extremos de la fila y devuelve el 
+        número que quedará expuesto en el lado jugado."""
+        a, b = movement.piece.tuple()
+        
+        if movement.side == Table.A:
+            row_side = self.__row[0][0]
+            if row_side == a:
+                return b
+            if row_side == b:
+                return a
+            raise InvalidPiece("The piece %s is no valid for side "
+            "A. Piece number must be %d" % (movement.piece, row_side))
+        
+        if movement.side == Table.B:
+            row_side = self.__row[-1][0]
+            if row_side == a:
+                return b
+            if row_side == b:
+                return a
+            raise InvalidPiece("The piece %s is no valid for side "
+            "B. Piece number must be %d" % (movement.piece, row_side))
+        
+        raise InvalidSide("The side %s is not valid" % movement.side)
+    
+    def apply(self, movement: Movement, number: int = None) -> None:
+        """Aplica el siguiente movimiento del registro.
+
+        Args:
+            movement (Movement): Movimiento a aplicar.
+            number (int, optional): Número que queda expuesto en el lado 
+            jugado, si ya se conoce (por ejemplo del motor de bits); en ese 
+            caso no se valida la ficha contra la fila.
+
+        Raises:
+            InvalidPiece: Si la ficha no encaja en el lado indicado.
+            InvalidSide: Si el lado no es válido.
+        """
+        position = self.__turn
+        piece = movement.piece
+        
+        # Si quien pone la ficha es el anotador, no se contabiliza.
+        # El anotador es utilizado para repartir las fichas a los jugadores,
+        # y para ponerlas en la mesa inicialmente.
+        if movement._from is not ANNOTATOR and isinstance(movement.to, Table):
+            if not self.__row:
+                a, b = piece.tuple()
+                self.__row.append((a, position))
+                self.__row.append((b, position))
+            else:
+                if number is None:
+                    number = self.__get_row_number(movement)
+                if movement.side == Table.A:
+                    self.__row.appendleft((number, position))
+                else:
+                    self.__row.append((number, position))
+            
+            self.__played_mask |= piece.mask
+        
+        masks = self.__possession_masks
+        pips = self.__possession_pips
+        if movement._from is not ANNOTATOR:
+            masks[movement._from] = masks.get(movement._from, 0) & ~piece.mask
+            pips[movement._from] = pips.get(movement._from, 0) - piece.total
+        masks[movement.to] = masks.get(movement.to, 0) | piece.mask
+        pips[movement.to] = pips.get(movement.to, 0) + piece.total
+        
+        self.__turn += 1
+    
+    def revert(self, movement: Movement) -> None:
+        """Deshace el último movimiento aplicado, que debe ser `movement`."""
+        self.__turn -= 1
+        position = self.__turn
+        piece = movement.piece
+        
+        if movement._from is not ANNOTATOR and isinstance(movement.to, Table):
+            if len(self.__row) == 2 and self.__row[0][1] == self.__row[1][1]:
+                self.__row.clear()
+            elif self.__row[0][1] == position:
+                self.__row.popleft()
+            else:
+                self.__row.pop()
+            
+            self.__played_mask &= ~piece.mask
+        
+        masks = self.__possession_masks
+        pips = self.__possession_pips
+        masks[movement.to] &= ~piece.mask
+        pips[movement.to] -= piece.total
+        if movement._from is not ANNOTATOR:
+            masks[movement._from] = masks.get(movement._from, 0) | piece.mask
+            pips[movement._from] = pips.get(movement._from, 0) + piece.total
+
+
+class RowTile(NamedTuple):
+    """Ficha de la fila orientada: a es el número del lado izquierdo (A) y b el 
+    del derecho (B). position es la del movimiento en el registro."""
+    a: int
+    b: int
+    position: int
+    movement: Movement
+    
+    @property
+    def value(self) -> Tuple[int, int]:
+        return self.a, self.b
+
+
+class AlignedRow:
+    """Vista de solo lectura de las fichas de la fila, de izquierda (A) a 
+    derecha (B), cada una orientada para que sus números coincidan con los de 
+    sus vecinas.
+
+    No copia nada: se apoya en la fila de RecordState (pares número, 
+    posición), que el registro actualiza con cada movimiento, al deshacer y 
+    en las copias. Dos números consecutivos de la fila son una ficha, y su 
+    movimiento es el más reciente de los dos (las fichas se agregan hacia 
+    afuera). Crear la vista y len() son O(1); recorrerla es O(n).
+    """
+    
+    __slots__ = ("__row", "__record")
+    
+    def __init__(self, row: Deque[Tuple[int, int]], record: 'GameRecord'):
+        self.__row = row
+        self.__record = record
+    
+    def __len__(self):
+        return max(0, len(self.__row) - 1)
+    
+    def __bool__(self):
+        return len(self.__row) > 1
+    
+    def __iter__(self) -> Iterator[RowTile]:
+        record = self.__record
+        previous = None
+        for entry in self.__row:
+            if previous is not None:
+                position = max(previous[1], entry[1])
+                yield RowTile(previous[0], entry[0], position, record[position])
+            previous = entry
+    
+    def __getitem__(self, index: int) -> RowTile:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("row index out of range")
+        a, position_a = self.__row[index]
+        b, position_b = self.__row[index + 1]
+        position = max(position_a, position_b)
+        return RowTile(a, b, position, self.__record[position])
+    
+    def __str__(self):
+        return " ".join("[%d|%d]" % (tile.a, tile.b) for tile in self)
+    
+    def values(self) -> Iterator[Tuple[int, int]]:
+        """Recorre solo los números orientados, sin crear los movimientos."""
+        previous = None
+        for number, _ in self.__row:
+            if previous is not None:
+                yield previous, number
+            previous = number
+
+
+class RecordListener:
+    """Recibe los cambios de un GameRecord al que se agregó con 
+    GameRecord.add_listener(). Las subclases sobrescriben los métodos que 
+    necesiten; se llaman después de actualizar el registro."""
+    
+    def on_move(self, record: 'GameRecord', movement: Movement) -> None:
+        pass
+    
+    def on_pass(self, record: 'GameRecord', player: Player) -> None:
+        pass
+    
+    def on_undo(self, record: 'GameRecord', movement: Movement) -> None:
+        pass
 
 
 class GameRecord(Domino):
+    """Registro de los movimientos de una partida.
+
+    Con compact=True los movimientos se guardan como MOVEMENT_SIZE bytes 
+    cada uno en un array y los objetos Movement se crean solo al leerlos. Los 
+    índices por jugador y por ficha se calculan al consultarlos en vez de 
+    mantenerse en memoria.
+
+    Cada checkpoint_interval movimientos se guarda una copia del estado 
+    (RecordState), de modo que state_at(turn) solo repite los movimientos 
+    desde el checkpoint anterior. Con checkpoint_interval=0 solo se guarda el 
+    estado inicial; es el valor por defecto en modo compacto, donde prima la 
+    memoria.
+    """
+    
+    CHECKPOINT_INTERVAL = 16
     
-    def __init__(self):
+    def __init__(self, compact: bool = False, checkpoint_interval: int = None):
+        if checkpoint_interval is None:
+            checkpoint_interval = 0 if compact else self.CHECKPOINT_INTERVAL
+        
+        self.__compact = compact
         self.__movements: List[Movement] = []
+        # Movimientos codificados, solo en modo compacto.
+        self.__log = array("B")
+        # Dueños de las fichas según su código, para decodificar el registro.
+        self.__owners: Dict[int, Union[Player, Table, Annotator]] = {
+            ANNOTATOR_CODE: ANNOTATOR}
+        
         # Movimientos agrupados por jugador.
         self.__players_movements: Dict[Player, Movement] = {}
         # Movimientos agrupados por ficha.
@@ -60,92 +389,200 @@ class GameRecord(Domino):
         
         # Lleva el control de la poseción actual de la ficha.
         self.__pieces_possession: Dict[Piece, Union[Player, Table, None]] = {}
+        
+        # Estado actual (fichas de cada dueño y fila jugada). Se actualiza en 
+        # cada movimiento, así no hay que reconstruirlo desde el registro.
+        self.__state = RecordState()
+        
+        self.__checkpoint_interval = checkpoint_interval
+        # Checkpoints guardados con RecordState.to_tuple().
+        self.__checkpoints: List[Tuple] = [RecordState().to_tuple()]
+        
+        # Pases consecutivos desde el último movimiento. Los pases no son 
+        # movimientos, no se guardan en el registro; solo se guarda cuántos 
+        # había antes de cada movimiento, para que undo() los restaure.
+        self.__passes = 0
+        self.__passes_log = array("B")
+        self.__listeners: List[RecordListener] = []
 
     def __str__(self):
-        return str(self.__movements)
+        return str(list(self))
         
-    def __iter__(self):
-        for movement in self.__movements:
-            yield movement 
+    def __iter__(self) -> Iterator[Movement]:
+        if not self.__compact:
+            yield from self.__movements
+            return
+        
+        log = self.__log
+        for position in range(0, len(log), MOVEMENT_SIZE):
+            yield self.__decode(log, position)
             
     def __len__(self):
+        if self.__compact:
+            return len(self.__log) // MOVEMENT_SIZE
         return len(self.__movements)
     
+    def __getitem__(self, index: int) -> Movement:
+        if not self.__compact:
+            return self.__movements[index]
+        
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("movement index out of range")
+        return self.__decode(self.__log, index * MOVEMENT_SIZE)
+    
+    @property
+    def compact(self) -> bool:
+        return self.__compact
+    
+    def to_bytes(self) -> bytes:
+        """Codifica los movimientos con MOVEMENT_SIZE bytes cada uno."""
+        if self.__compact:
+            return self.__log.tobytes()
+        
+        log = array("B")
+        for movement in self.__movements:
+            log.extend(self.__encode(movement))
+        return log.tobytes()
+    
+    @classmethod
+    def from_bytes(cls, data: bytes, players: Sequence[Player] = None, 
+                   compact: bool = False) -> 'GameRecord':
+        """Reconstruye un registro codificado con to_bytes(), repitiendo (y 
+        validando) cada movimiento.
+
+        Args:
+            data (bytes): Movimientos codificados.
+            players (Sequence[Player], optional): Jugadores a los que 
+            corresponden los códigos. Defaults to ALL_PLAYERS.
+            compact (bool, optional): Modo del registro creado.
+        """
+        owners = {ANNOTATOR_CODE: ANNOTATOR, TABLE_CODE: Table()}
+        owners.update((get_owner_code(player), player) 
+                      for player in players or ALL_PLAYERS)
+        
+        record = cls(compact=compact)
+        for position in range(0, len(data), MOVEMENT_SIZE):
+            piece, _from, to, side = data[position:position + MOVEMENT_SIZE]
+            record.move(Piece.from_index(piece), owners[_from], owners[to], 
+                        CODES_SIDES[side])
+        return record
+    
     @property
     def players_movements(self) -> Dict[Player, Movement]:
-        return self.__players_movements
+        if not self.__compact:
+            return self.__players_movements
+        
+        players_movements = {}
+        for movement in self:
+            players_movements.setdefault(movement._from, []).append(movement)
+            players_movements.setdefault(movement.to, []).append(movement)
+        return players_movements
     
     @property
     def pieces_movements(self) -> Dict[Piece, Movement]:
-        return self.__pieces_movements
+        if not self.__compact:
+            return self.__pieces_movements
+        
+        pieces_movements = {}
+        for movement in self:
+            pieces_movements.setdefault(movement.piece, []).append(movement)
+        return pieces_movements
 
     @property
     def pieces_possession(self) -> Dict[Piece, Union[Player, Table, None]]:
-        return self.__pieces_possession
+        if not self.__compact:
+            return self.__pieces_possession
+        
+        pieces_possession = {}
+        for owner, mask in self.__state.possession_masks.items():
+            for index in range(mask.bit_length()):
+                if mask >> index & 1:
+                    pieces_possession[Piece.from_index(index)] = owner
+        return pieces_possession
+    
+    def get_player_movements(self, player: Union[Player, Table]) -> List[Movement]:
+        """Obtiene los movimientos desde o hacia el jugador o la mesa."""
+        if not self.__compact:
+            return list(self.__players_movements.get(player, []))
+        
+        code = get_owner_code(player)
+        log = self.__log
+        return [self.__decode(log, position) 
+                for position in range(0, len(log), MOVEMENT_SIZE)
+                if log[position + 1] == code or log[position + 2] == code]
+    
+    def get_piece_movements(self, piece: Piece) -> List[Movement]:
+        """Obtiene los movimientos de la ficha."""
+        if not self.__compact:
+            return list(self.__pieces_movements.get(piece, []))
+        
+        log = self.__log
+        return [self.__decode(log, position) 
+                for position in range(0, len(log), MOVEMENT_SIZE)
+                if log[position] == piece.index]
+    
+    @property
+    def possession_masks(self) -> Dict[Union[Player, Table], int]:
+        return self.__state.possession_masks
+    
+    @property
+    def played_mask(self) -> int:
+        return self.__state.played_mask
+    
+    def get_possession_mask(self, owner: Union[Player, Table]) -> int:
+        """Obtiene la máscara de bits de las fichas que posee el jugador o la 
+        mesa."""
+        return self.__state.possession_masks.get(owner, 0)
+    
+    @property
+    def possession_pips(self) -> Dict[Union[Player, Table], int]:
+        return self.__state.possession_pips
+    
+    def get_possession_pips(self, owner: Union[Player, Table]) -> int:
+        """Obtiene la suma de los puntos de las fichas que posee el jugador o 
+        la mesa, sin recorrerlas (se actualiza en cada movimiento)."""
+        return self.__state.possession_pips.get(owner, 0)
+    
+    @property
+    def state(self) -> RecordState:
+        """Estado actual. No debe modificarse; use state.copy() para ello."""
+        return self.__state
     
     @property
     def a(self) -> Tuple[int, Movement]:
-        return self.build_row()[0]
+        number, position = self.__state.row[0]
+        return number, self[position]
     
     @property
     def b(self) -> Tuple[int, Movement]:
-        return self.build_row()[-1]
+        number, position = self.__state.row[-1]
+        return number, self[position]
     
-    def get_row_pieces_values_in_correct_alignament(self) -> List[Tuple[int, int]]:
-        row = self.build_row()
-        out: List[Tuple[int, int]] = []
-        pieces_included: List[Piece] = []
-        
-        n = 1
-        for number, movement in row:
-            
-            # ESto pasa porque build_row contine (a propósito) movimientos 
-            # repetidos
-            if movement.piece in pieces_included:
-                continue
-            
-            a, b = movement.piece.tuple()
-            
-            if not out:
-                value = (a, b)
-                out.append({"turn": n, "value": value, "movement": movement})
-                pieces_included.append(movement.piece)
-            
-            # Si se jugó por el lado izquierdo (A).
-            elif movement.side == Table.A:
-                if movement.piece.a == number:
-                    value = (b, a)
-                elif movement.piece.b == number:
-                    value = (a, b)
-                else:
-                    raise InvalidPiece("The piece %s is not valid in movement %s" % 
-                                       (movement.piece, movement))
-                    
-                out.insert(0, {"turn": n, "value": value, "movement": movement})
-                pieces_included.append(movement.piece)
-            
-            # Si se jugó por el lado derecho (B).
-            elif movement.side == Table.B:
-                if movement.piece.a == number:
-                    value = (b, a)
-                elif movement.piece.b == number:
-                    value = (a, b)
-                else:
-                    raise InvalidPiece("The piece %s is not valid in movement %s" % 
-                                       (movement.piece, movement))
-
-                out.append({"turn": n, "value": value, "movement": movement})
-                pieces_included.append(movement.piece)
-                
-            else:
-                raise InvalidSide("The side %s is not valid in movement %s" 
-                                  % (movement.side, movement))
-
-
-            print(n, movement.side, value, movement.piece)
-            n += 1
-            
-        return out
+    @property
+    def ends(self) -> Union[Tuple[int, int], None]:
+        """Números de los extremos A y B de la fila, o None si está vacía."""
+        return self.__state.ends
+    
+    @property
+    def aligned_row(self) -> 'AlignedRow':
+        """Vista de las fichas de la fila, orientadas y de izquierda a derecha. 
+        Se obtiene en O(1) y refleja siempre el estado actual."""
+        return AlignedRow(self.__state.row, self)
+    
+    def get_row_pieces_values_in_correct_alignament(self) -> List[Dict]:
+        """Obtiene las fichas de la fila de izquierda (A) a derecha (B) como 
+        diccionarios con "turn" (orden en que se jugó la ficha, desde 1), 
+        "value" (números orientados) y "movement". Para solo recorrerlas es 
+        preferible aligned_row, que no crea la lista."""
+        tiles = list(self.aligned_row)
+        order = sorted(range(len(tiles)), key=lambda k: tiles[k].position)
+        turns = [0] * len(tiles)
+        for turn, k in enumerate(order, 1):
+            turns[k] = turn
+        return [{"turn": turn, "value": tile.value, "movement": tile.movement} 
+                for turn, tile in zip(turns, tiles)]
     
     def build_row(self, movement_add: Movement = None) -> List[Tuple[int, Movement]]:
         """Obtiene un listado de números enteros que representan el estado del 
@@ -162,50 +599,165 @@ class GameRecord(Domino):
         Returns:
             List[int]: Una lista de enteros.
         """
-        row: List[Tuple[int, Movement]] = []
-        movements = list(self) + [movement_add] if movement_add else list(self)
+        if movement_add:
+            self.__add_movement(movement_add)
+        
+        return [(number, self[position]) for number, position in self.__state.row]
+    
+    def get_side_for_piece(self, piece: Piece) -> int:
+        """Obtiene el lado de la fila en el que encaja la ficha.
+
+        Raises:
+            InvalidPiece: Si la ficha no encaja en ninguno de los extremos.
+        """
+        return self.__state.get_side_for_piece(piece)
+    
+    def state_at(self, turn: int) -> RecordState:
+        """Obtiene el estado de la partida tras los primeros `turn` 
+        movimientos, partiendo del checkpoint más cercano."""
+        if not 0 <= turn <= len(self):
+            raise IndexError("turn out of range")
         
-        for movement in movements:
+        state = RecordState(*self.__checkpoints[self.__get_checkpoint_index(turn)])
+        for position in range(state.turn, turn):
+            state.apply(self[position])
+        return state
+    
+    @property
+    def checkpoint_interval(self) -> int:
+        return self.__checkpoint_interval
+    
+    def get_checkpoint_turn(self, turn: int) -> int:
+        """Obtiene el turno del checkpoint desde el que state_at(turn) 
+        repite los movimientos."""
+        return self.__checkpoints[self.__get_checkpoint_index(turn)][0]
+    
+    def __get_checkpoint_index(self, turn: int) -> int:
+        if not self.__checkpoint_interval:
+            return 0
+        return min(turn // self.__checkpoint_interval, len(self.__checkpoints) - 1)
+    
+    def copy(self) -> 'GameRecord':
+        """Obtiene un registro independiente con los mismos movimientos. Los 
+        movimientos, fichas y jugadores se comparten, no se copian."""
+        record = type(self).__new__(type(self))
+        record.__compact = self.__compact
+        record.__movements = list(self.__movements)
+        record.__log = array("B", self.__log)
+        record.__owners = dict(self.__owners)
+        record.__players_movements = {owner: list(movements) for owner, movements 
+                                      in self.__players_movements.items()}
+        record.__pieces_movements = {piece: list(movements) for piece, movements 
+                                     in self.__pieces_movements.items()}
+        record.__pieces_possession = dict(self.__pieces_possession)
+        record.__state = self.__state.copy()
+        record.__checkpoint_interval = self.__checkpoint_interval
+        record.__checkpoints = list(self.__checkpoints)
+        # Los listeners no se copian.
+        record.__passes = self.__passes
+        record.__passes_log = array("B", self.__passes_log)
+        record.__listeners = []
+        return record
+    
+    def undo(self) -> Movement:
+        """Deshace el último movimiento y lo devuelve. Los pases consecutivos 
+        vuelven a ser los que había antes del movimiento.
+
+        Raises:
+            IndexError: Si el registro está vacío.
+        """
+        if not len(self):
+            raise IndexError("undo from an empty record")
+        
+        if self.__compact:
+            movement = self[-1]
+            del self.__log[-MOVEMENT_SIZE:]
+        else:
+            movement = self.__movements.pop()
+            for owner in (movement._from, movement.to):
+                movements = self.__players_movements[owner]
+                movements.pop()
+                if not movements:
+                    del self.__players_movements[owner]
             
-            # Si quien pone la ficha es el anotador, no se contabiliza.
-            # El anotador es utilizado para repartir las fichas a los jugadores,
-            # y para ponerlas en la mesa inicialmente.
-            if movement._from is ANNOTATOR:
-                continue 
+            movements = self.__pieces_movements[movement.piece]
+            movements.pop()
+            if not movements:
+                del self.__pieces_movements[movement.piece]
             
-            if movement and isinstance(movement.to, Table):
-                a, b = movement.piece.tuple()
-                
-                if not row:
-                    row.append((a, movement))
-                    row.append((b, movement))
-                
-                elif movement.side == Table.A:
-                    row_side = row[0][0]
-                    if row_side == a:
-                        row.insert(0, (b, movement))
-                    elif row_side == b:
-                        row.insert(0, (a, movement))
-                    else:
-                        raise InvalidPiece("The piece %s is no valid for side "
-                        "A. Piece number must be %d" % (movement.piece, row[0][0]))
-                        
-                elif movement.side == Table.B:
-                    row_side = row[-1][0]
-                    if row_side == a:
-                        row.append((b, movement))
-                    elif row_side == b:
-                        row.append((a, movement))
-                    else:
-                        raise InvalidPiece("The piece %s is no valid for side "
-                        "B. Piece number must be %d" % (movement.piece, row_side))
-                else:
-                    raise InvalidSide("The side %s is not valid" % movement.side)
+            if movement._from is ANNOTATOR:
+                del self.__pieces_possession[movement.piece]
+            else:
+                self.__pieces_possession[movement.piece] = movement._from
         
-        if movement_add:
-            self.__movements.append(movement_add)
+        self.__state.revert(movement)
         
-        return row
+        if self.__checkpoints[-1][0] > len(self):
+            self.__checkpoints.pop()
+        
+        self.__passes = self.__passes_log.pop()
+        for listener in self.__listeners:
+            listener.on_undo(self, movement)
+        
+        return movement
+    
+    @property
+    def passes(self) -> int:
+        """Pases consecutivos desde el último movimiento."""
+        return self.__passes
+    
+    def pass_turn(self, player: Player) -> None:
+        """Registra que el jugador pasó por no tener fichas que jugar."""
+        self.__passes += 1
+        for listener in self.__listeners:
+            listener.on_pass(self, player)
+    
+    def add_listener(self, listener: RecordListener) -> None:
+        self.__listeners.append(listener)
+    
+    def remove_listener(self, listener: RecordListener) -> None:
+        self.__listeners.remove(listener)
+    
+    def cursor(self, turn: int = 0) -> 'RecordCursor':
+        """Obtiene un cursor para recorrer la partida movimiento a movimiento."""
+        return RecordCursor(self, turn)
+    
+    def __add_movement(self, movement: Movement, number: int = None) -> None:
+        """Valida el movimiento, actualiza el estado y lo agrega al registro. 
+        Ver RecordState.apply para `number`."""
+        self.__state.apply(movement, number)
+        self.__passes_log.append(self.__passes)
+        
+        if self.__compact:
+            self.__log.extend(self.__encode(movement))
+        else:
+            self.__movements.append(movement)
+        
+        interval = self.__checkpoint_interval
+        if interval and self.__state.turn % interval == 0:
+            self.__checkpoints.append(self.__state.to_tuple())
+    
+    def __get_owner_code(self, owner: Union[Player, Table, Annotator]) -> int:
+        code = get_owner_code(owner)
+        self.__owners.setdefault(code, owner)
+        return code
+    
+    def __encode(self, movement: Movement) -> Tuple[int, int, int, int]:
+        return (
+            movement.piece.index, 
+            self.__get_owner_code(movement._from), 
+            self.__get_owner_code(movement.to), 
+            SIDES_CODES[movement.side],
+        )
+    
+    def __decode(self, log: array, position: int) -> Movement:
+        """Crea el Movement codificado en la posición (en bytes) del registro."""
+        return Movement._create(
+            Piece.from_index(log[position]),
+            self.__owners[log[position + 1]],
+            self.__owners[log[position + 2]],
+            CODES_SIDES[log[position + 3]],
+        )
             
     def is_piece_played(self, piece: Piece) -> bool:
         for movement in self:
@@ -221,7 +773,31 @@ class GameRecord(Domino):
         # Valida que la ficha vaya por el lado especificado.
         # Lanzará un InvalidSide exception si la ficha no va.
         # Se agregará al record si la ficha es correcta.
-        self.build_row(mov) 
+        self.__add_movement(mov)
+        return self.__register(mov)
+    
+    def _move(self, piece: Piece, _from: Union[Player, Table], 
+              to: Union[Player, Table], side: int, number: int = None) -> Movement:
+        """Como move(), pero sin validar los parámetros ni la ficha contra la 
+        fila. Solo para movimientos generados por el motor (ver Game.run).
+
+        Args:
+            number (int, optional): Número que queda expuesto en el lado 
+            jugado, si se pone en la mesa una ficha que no es la primera.
+        """
+        mov = Movement._create(piece, _from, to, side)
+        self.__add_movement(mov, number)
+        return self.__register(mov)
+    
+    def __register(self, mov: Movement) -> Movement:
+        """Indexa el movimiento ya agregado y avisa a los listeners."""
+        piece, _from, to = mov.piece, mov._from, mov.to
+        self.__passes = 0
+        
+        if self.__compact:
+            if self.__listeners:
+                self.__notify_move(mov)
+            return mov
         
         # Indexamos los datos.
         try:
@@ -235,11 +811,79 @@ class GameRecord(Domino):
             self.__players_movements[to] = [mov]
             
         try:
-            self.__pieces_movements[piece.tuple()].append(mov)
+            self.__pieces_movements[piece].append(mov)
         except (KeyError):
-            self.__pieces_movements[piece.tuple()] = [mov]
+            self.__pieces_movements[piece] = [mov]
             
-        self.__pieces_possession[piece.tuple()] = to
+        self.__pieces_possession[piece] = to
+        
+        if self.__listeners:
+            self.__notify_move(mov)
         
         return mov
-    
\ No newline at end of file
+    
+    def __notify_move(self, movement: Movement) -> None:
+        for listener in self.__listeners:
+            listener.on_move(self, movement)
+
+
+class RecordCursor:
+    """Recorre los estados de una partida hacia adelante o hacia atrás, 
+    aplicando o deshaciendo un movimiento por paso.
+
+    El estado del cursor cambia al moverlo; use state.copy() para guardarlo.
+    """
+    
+    def __init__(self, record: GameRecord, turn: int = 0):
+        self.__record = record
+        self.__state = record.state_at(turn)
+    
+    def __iter__(self) -> Iterator[Tuple[Movement, RecordState]]:
+        """Avanza hasta el final, devolviendo cada movimiento y el estado 
+        resultante."""
+        movement = self.forward()
+        while movement is not None:
+            yield movement, self.__state
+            movement = self.forward()
+    
+    @property
+    def turn(self) -> int:
+        return self.__state.turn
+    
+    @property
+    def state(self) -> RecordState:
+        return self.__state
+    
+    def forward(self) -> Union[Movement, None]:
+        """Aplica el siguiente movimiento. Devuelve None al final."""
+        if self.__state.turn >= len(self.__record):
+            return None
+        movement = self.__record[self.__state.turn]
+        self.__state.apply(movement)
+        return movement
+    
+    def backward(self) -> Union[Movement, None]:
+        """Deshace el movimiento anterior. Devuelve None al inicio."""
+        if self.__state.turn <= 0:
+            return None
+        movement = self.__record[self.__state.turn - 1]
+        self.__state.revert(movement)
+        return movement
+    
+    def seek(self, turn: int) -> RecordState:
+        """Mueve el cursor al turno indicado, paso a paso si está cerca o desde 
+        el checkpoint más cercano si no."""
+        if not 0 <= turn <= len(self.__record):
+            raise IndexError("turn out of range")
+        
+        # Se elige el camino con menos movimientos que repetir.
+        distance = turn - self.__state.turn
+        if abs(distance) > turn - self.__record.get_checkpoint_turn(turn):
+            self.__state = self.__record.state_at(turn)
+        else:
+            while self.__state.turn < turn:
+                self.forward()
+            while self.__state.turn > turn:
+                self.backward()
+        
+        return self.__state
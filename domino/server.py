@@ -0,0 +1,486 @@
+"""Servidor asyncio de mesas concurrentes.
+
+Cada mesa es una tarea que juega una partida; las decisiones de los
+jugadores de la computadora se ejecutan en un executor para no detener el
+ciclo de eventos, y los clientes se conectan por TCP con un protocolo de
+mensajes JSON, uno por línea.
+
+Mensajes del cliente:
+
+    {"type": "join", "players": 2, "humans": 1}
+        Espera una mesa de `players` asientos con `humans` clientes; los
+        demás asientos los ocupa la computadora.
+    {"type": "move", "turn": 12, "piece": [6, 4], "side": "A"}
+        Respuesta a un mensaje "turn".
+    {"type": "stats"}
+
+Mensajes del servidor:
+
+    {"type": "start", "table": 1, "seat": 0, "players": 2, "hand": [[6, 4], ...]}
+    {"type": "turn", "table": 1, "turn": 12, "ends": [6, 1], "timeout": 10.0,
+     "moves": [{"piece": [6, 4], "side": "A"}, ...]}
+    {"type": "played", "table": 1, "seat": 1, "piece": [4, 1], "side": "B"}
+    {"type": "passed", "table": 1, "seat": 1}
+    {"type": "end", "table": 1, "winner": 0, "pips": [0, 17]}
+    {"type": "stats", ...}
+    {"type": "error", "message": "..."}
+
+Si un cliente no responde a tiempo, se desconecta o envía un movimiento no
+válido, se juega por él la ficha de más puntos.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import Executor
+from typing import Callable, Deque, Dict, List, Sequence, Tuple, Union
+
+from . import bitboard
+from .bitboard import BoardState, Move
+from .events import SIDES_NAMES, EventStream, JsonlSink
+from .exceptions import DominoError
+from .game import Game
+from .piece import Piece
+from .player import Player
+from .table import Table
+
+
+NAMES_SIDES = {"A": Table.A, "B": Table.B}
+
+# Cantidad de mediciones guardadas para calcular los percentiles.
+SAMPLES = 10000
+
+
+def _encode_move(move: Move) -> Dict:
+    return {"piece": list(Piece.PIECES[move[0]]), "side": SIDES_NAMES[move[1]]}
+
+
+def _decode_move(message: Dict) -> Union[Move, None]:
+    try:
+        piece = Piece.from_values(*message["piece"])
+        return (piece.index, NAMES_SIDES[message.get("side", "A")])
+    except Exception:
+        return None
+
+
+def _percentile(values: Sequence[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+class Connection:
+    """Cliente conectado. Los mensajes recibidos se encolan en inbox."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.__reader = reader
+        self.__writer = writer
+        self.__closed = False
+        self.inbox: asyncio.Queue = asyncio.Queue()
+
+    def __str__(self):
+        return "Connection(%s)" % (self.__writer.get_extra_info("peername"),)
+
+    @property
+    def closed(self) -> bool:
+        return self.__closed
+
+    async def receive(self) -> Union[Dict, None]:
+        """Lee el siguiente mensaje, o None si el cliente se desconectó."""
+        while not self.__closed:
+            try:
+                line = await self.__reader.readline()
+            except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+                line = b""
+            if not line:
+                self.__closed = True
+                break
+            try:
+                message = json.loads(line)
+            except ValueError:
+                await self.send({"type": "error", "message": "Invalid JSON."})
+                continue
+            if isinstance(message, dict):
+                return message
+            await self.send({"type": "error", "message": "Expected an object."})
+        return None
+
+    async def send(self, message: Dict) -> None:
+        if self.__closed:
+            return
+        try:
+            self.__writer.write(json.dumps(message).encode() + b"\n")
+            await self.__writer.drain()
+        except ConnectionError:
+            self.__closed = True
+
+    def close(self) -> None:
+        self.__closed = True
+        self.__writer.close()
+
+
+class RemotePlayer(Player):
+    """Asiento ocupado por un cliente."""
+
+    def __init__(self, number: int, connection: Connection, name: str = None):
+        super().__init__(number, name)
+        self.__connection = connection
+
+    @property
+    def connection(self) -> Connection:
+        return self.__connection
+
+
+class GameHost:
+    """Servidor de mesas.
+
+    Args:
+        host (str, optional): Dirección de escucha.
+        port (int, optional): Puerto de escucha; 0 elige uno libre.
+        turn_timeout (float, optional): Segundos por turno.
+        executor (Executor, optional): Executor para las decisiones de la
+        computadora. Defaults to el executor por defecto del ciclo (hilos); un
+        ProcessPoolExecutor evita el GIL con estrategias costosas.
+        ai (Callable[[int], Player], optional): Crea el jugador de la
+        computadora con el número indicado. Defaults to Player.
+        events (EventStream, optional): Recibe las jugadas de todas las
+        mesas (ver domino.events).
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765,
+                 turn_timeout: float = 10.0, executor: Executor = None,
+                 ai: Callable[[int], Player] = Player, events: EventStream = None):
+        self.__host = host
+        self.__port = port
+        self.__turn_timeout = turn_timeout
+        self.__executor = executor
+        self.__ai = ai
+        self.__events = events
+
+        self.__server: Union[asyncio.AbstractServer, None] = None
+        self.__closing = False
+        self.__tasks: set = set()
+        # Tareas de las mesas en juego y clientes conectados, para cerrarlos
+        # en orden en close().
+        self.__tables: set = set()
+        self.__clients: set = set()
+        self.__dealing = asyncio.Lock()
+        self.__waiting: Dict[Tuple[int, int], List[Connection]] = {}
+        self.__connections = 0
+        self.__next_table = 1
+
+        self.__started = time.perf_counter()
+        self.__tables_served = 0
+        self.__tables_active = 0
+        self.__moves = 0
+        self.__timeouts = 0
+        self.__latencies: Deque[float] = deque(maxlen=SAMPLES)
+        self.__lags: Deque[float] = deque(maxlen=SAMPLES)
+
+    @property
+    def port(self) -> int:
+        """Puerto en el que escucha (útil si se indicó 0)."""
+        if self.__server is None:
+            return self.__port
+        return self.__server.sockets[0].getsockname()[1]
+
+    def get_stats(self) -> Dict:
+        """Estadísticas del servidor. Las latencias y el retraso del ciclo se
+        expresan en milisegundos."""
+        latencies = list(self.__latencies)
+        lags = list(self.__lags)
+        return {
+            "uptime": time.perf_counter() - self.__started,
+            "tables_served": self.__tables_served,
+            "tables_active": self.__tables_active,
+            "connections": self.__connections,
+            "moves": self.__moves,
+            "timeouts": self.__timeouts,
+            "move_latency": {
+                "p50": _percentile(latencies, 50) * 1000,
+                "p90": _percentile(latencies, 90) * 1000,
+                "p99": _percentile(latencies, 99) * 1000,
+            },
+            "loop_lag": {
+                "p50": _percentile(lags, 50) * 1000,
+                "p99": _percentile(lags, 99) * 1000,
+                "max": max(lags, default=0.0) * 1000,
+            },
+        }
+
+    async def start(self) -> None:
+        self.__server = await asyncio.start_server(self.__handle_client,
+                                                   self.__host, self.__port)
+        self.__spawn(self.__monitor_lag())
+
+    async def serve_forever(self) -> None:
+        if self.__server is None:
+            await self.start()
+        await self.__server.serve_forever()
+
+    async def close(self, timeout: float = None) -> None:
+        """Deja de aceptar clientes y mesas nuevas, espera a que terminen las
+        mesas en juego y cierra las conexiones.
+
+        Args:
+            timeout (float, optional): Segundos máximos de espera; las mesas
+            que no hayan terminado se cancelan. Defaults to sin límite.
+        """
+        self.__closing = True
+        if self.__server is not None:
+            self.__server.close()
+        if self.__tables:
+            await asyncio.wait(list(self.__tables), timeout=timeout)
+        for task in list(self.__tasks):
+            task.cancel()
+        await asyncio.gather(*self.__tasks, return_exceptions=True)
+        for connection in list(self.__clients):
+            connection.close()
+        if self.__server is not None:
+            await self.__server.wait_closed()
+
+    def add_table(self, players: int = 2) -> asyncio.Task:
+        """Inicia una mesa solo con jugadores de la computadora."""
+        if self.__closing:
+            raise DominoError("The server is closing.")
+        return self.__spawn_table(
+            [self.__ai(number) for number in range(1, players + 1)])
+
+    async def run_table(self, players: Sequence[Player]) -> Game:
+        """Juega una partida completa en la mesa y la devuelve."""
+        table = self.__next_table
+        self.__next_table += 1
+        self.__tables_active += 1
+
+        try:
+            # Repartir registra todas las fichas; si empiezan muchas mesas a la
+            # vez se reparte una por vuelta del ciclo para no detenerlo.
+            async with self.__dealing:
+                game = Game.create(*players)
+                await asyncio.sleep(0)
+            if self.__events is not None:
+                self.__events.watch(game, table)
+            remotes = [(seat, player.connection) for seat, player in enumerate(players)
+                       if isinstance(player, RemotePlayer)]
+
+            for seat, connection in remotes:
+                hand = game.get_player_pieces(players[seat])
+                await connection.send({
+                    "type": "start", "table": table, "seat": seat,
+                    "players": len(players),
+                    "hand": [list(piece.tuple()) for piece in hand],
+                })
+
+            state = game.get_state()
+            turn = 0
+            while not bitboard.is_finished(state):
+                seat = state.turn
+                moves = bitboard.legal_moves(state)
+
+                if moves:
+                    index, side = await self.__choose(table, turn, players[seat],
+                                                      state, moves)
+                    game.play(players[seat], Piece.from_index(index), side)
+                    state = bitboard.play(state, index, side)
+                    message = {"type": "played", "table": table, "seat": seat}
+                    message.update(_encode_move((index, side)))
+                else:
+                    game.pass_turn(players[seat])
+                    state = bitboard.pass_turn(state)
+                    message = {"type": "passed", "table": table, "seat": seat}
+
+                await self.__broadcast(remotes, message)
+                turn += 1
+                # Sin clientes ni executor nada suspende la tarea; se cede el
+                # ciclo en cada turno para no detener las demás mesas.
+                await asyncio.sleep(0)
+
+            await self.__broadcast(remotes, {
+                "type": "end", "table": table,
+                "winner": bitboard.get_winner(state),
+                "pips": [bitboard.count_pips(hand) for hand in state.hands],
+            })
+            self.__tables_served += 1
+            return game
+        finally:
+            self.__tables_active -= 1
+
+    async def __choose(self, table: int, turn: int, player: Player,
+                       state: BoardState, moves: List[Move]) -> Move:
+        started = time.perf_counter()
+        try:
+            if isinstance(player, RemotePlayer):
+                move = await self.__ask(player.connection, table, turn, state, moves)
+            elif type(player).choose_move is Player.choose_move:
+                # La estrategia por defecto es trivial; no vale la pena enviarla
+                # al executor.
+                move = player.choose_move(state, moves)
+            else:
+                loop = asyncio.get_running_loop()
+                move = await asyncio.wait_for(
+                    loop.run_in_executor(self.__executor, player.choose_move,
+                                         state, moves),
+                    self.__turn_timeout)
+        except asyncio.TimeoutError:
+            self.__timeouts += 1
+            move = None
+
+        if move not in moves:
+            move = bitboard.choose_max_piece(state, moves)
+
+        self.__latencies.append(time.perf_counter() - started)
+        self.__moves += 1
+        return move
+
+    async def __ask(self, connection: Connection, table: int, turn: int,
+                    state: BoardState, moves: List[Move]) -> Union[Move, None]:
+        if connection.closed:
+            return None
+
+        await connection.send({
+            "type": "turn", "table": table, "turn": turn,
+            "ends": [state.a, state.b], "timeout": self.__turn_timeout,
+            "moves": [_encode_move(move) for move in moves],
+        })
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.__turn_timeout
+        while True:
+            message = await asyncio.wait_for(connection.inbox.get(),
+                                             max(0.0, deadline - loop.time()))
+            if message is None:
+                return None
+            # Se descartan las respuestas a turnos anteriores.
+            if message.get("type") == "move" and message.get("turn") == turn:
+                move = _decode_move(message)
+                if move not in moves:
+                    await connection.send({"type": "error", "message": "Invalid move."})
+                return move
+
+    async def __broadcast(self, remotes: List[Tuple[int, Connection]],
+                          message: Dict) -> None:
+        for _, connection in remotes:
+            await connection.send(message)
+
+    async def __handle_client(self, reader: asyncio.StreamReader,
+                              writer: asyncio.StreamWriter) -> None:
+        connection = Connection(reader, writer)
+        self.__connections += 1
+        self.__clients.add(connection)
+        try:
+            while True:
+                message = await connection.receive()
+                if message is None:
+                    connection.inbox.put_nowait(None)
+                    break
+
+                kind = message.get("type")
+                if kind == "join":
+                    await self.__join(connection, message)
+                elif kind == "stats":
+                    await connection.send(dict(self.get_stats(), type="stats"))
+                elif kind == "move":
+                    connection.inbox.put_nowait(message)
+                else:
+                    await connection.send({"type": "error",
+                                           "message": "Unknown message type."})
+        finally:
+            self.__connections -= 1
+            self.__clients.discard(connection)
+            for waiting in self.__waiting.values():
+                if connection in waiting:
+                    waiting.remove(connection)
+            connection.close()
+
+    async def __join(self, connection: Connection, message: Dict) -> None:
+        if self.__closing:
+            await connection.send({"type": "error",
+                                   "message": "The server is closing."})
+            return
+        players, humans = message.get("players", 2), message.get("humans", 1)
+        if players not in (2, 3, 4) or not isinstance(humans, int) \
+                or not 1 <= humans <= players:
+            await connection.send({"type": "error",
+                                   "message": "Invalid players or humans."})
+            return
+
+        waiting = self.__waiting.setdefault((players, humans), [])
+        waiting.append(connection)
+        if len(waiting) < humans:
+            return
+
+        connections = waiting[:humans]
+        del waiting[:humans]
+        seats = [RemotePlayer(number, connections[number - 1])
+                 if number <= humans else self.__ai(number)
+                 for number in range(1, players + 1)]
+        self.__spawn_table(seats)
+
+    async def __monitor_lag(self, interval: float = 0.05) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + interval
+            await asyncio.sleep(interval)
+            self.__lags.append(max(0.0, loop.time() - expected))
+
+    def __spawn(self, coroutine) -> asyncio.Task:
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self.__tasks.add(task)
+        task.add_done_callback(self.__tasks.discard)
+        return task
+
+    def __spawn_table(self, players: Sequence[Player]) -> asyncio.Task:
+        task = self.__spawn(self.run_table(players))
+        self.__tables.add(task)
+        task.add_done_callback(self.__tables.discard)
+        return task
+
+
+async def _serve(options: argparse.Namespace) -> None:
+    events = None
+    if options.events:
+        events = EventStream([JsonlSink(options.events)])
+        events.start()
+    host = GameHost(options.host, options.port, options.timeout, events=events)
+    await host.start()
+    print("listening on %s:%d" % (options.host, host.port))
+
+    bots: set = set()
+    try:
+        while True:
+            bots = {task for task in bots if not task.done()}
+            while len(bots) < options.bots:
+                bots.add(host.add_table(options.players))
+            await asyncio.sleep(options.interval)
+            print(json.dumps(host.get_stats()))
+    finally:
+        await host.close()
+        if events is not None:
+            events.close()
+
+
+def main(*args):
+    parser = argparse.ArgumentParser(prog="domino.server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("-t", "--timeout", type=float, default=10.0)
+    parser.add_argument("-b", "--bots", type=int, default=0,
+                        help="mesas solo de la computadora a mantener activas")
+    parser.add_argument("-p", "--players", type=int, default=2, choices=(2, 3, 4))
+    parser.add_argument("-i", "--interval", type=float, default=5.0)
+    parser.add_argument("-e", "--events", default=None,
+                        help="archivo JSONL donde se agregan las jugadas")
+    options = parser.parse_args(args or None)
+
+    try:
+        asyncio.run(_serve(options))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv[1:]))
@@ -0,0 +1,184 @@
+"""Simulación masiva de partidas sin interfaz.
+
+Ejemplo:
+
+    for result in simulate(100000, PLAYER1, PLAYER2, workers=8, seed=1):
+        ...
+
+Las partidas se reparten en bloques entre los procesos de un
+ProcessPoolExecutor; cada bloque tiene su propia semilla, derivada de la
+semilla de la simulación, por lo que los resultados son reproducibles para
+una misma semilla y tamaño de bloque. Solo hay unos pocos bloques pendientes
+por proceso, así que la memoria no crece con la cantidad de partidas.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Deque, Iterator, List, NamedTuple, Sequence, Tuple
+
+from . import bitboard
+from .game import Game
+from .player import ALL_PLAYERS, Player
+
+
+class GameResult(NamedTuple):
+    """Resultado compacto de una partida simulada.
+
+    winner: Número del jugador ganador, o 0 si hubo empate.
+    turns: Cantidad de turnos jugados, pases incluidos.
+    pips: Puntos que le quedaron a cada jugador, en orden de asiento.
+    """
+    winner: int
+    turns: int
+    pips: Tuple[int, ...]
+
+
+def play_game(players: Sequence[Player], seed: int = None) -> GameResult:
+    """Reparte con Game.create y juega la partida completa en el motor de bits."""
+    game = Game.create(*players, seed=seed)
+    policies = [player.choose_move for player in game.players]
+    state, turns = bitboard.playout(game.get_state(), policies)
+
+    seat = bitboard.get_winner(state)
+    return GameResult(
+        winner=game.players[seat].number if seat != -1 else 0,
+        turns=turns,
+        pips=tuple(bitboard.count_pips(hand) for hand in state.hands),
+    )
+
+
+def _run_shard(players: Sequence[Player], games: int, seed: int) -> List[GameResult]:
+    rng = random.Random(seed)
+    return [play_game(players, rng.getrandbits(64)) for _ in range(games)]
+
+
+class Simulation:
+    """Iterador de resultados de una simulación en curso.
+
+    Los resultados se entregan por bloques, en el orden de get_shards().
+    """
+
+    def __init__(self, games: int, players: Sequence[Player], workers: int = None,
+                 seed: int = None, chunk_size: int = 1000):
+        self.__games = games
+        self.__players = [Player.clean_player(player) for player in players]
+        self.__workers = workers
+        self.__seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.__chunk_size = max(1, chunk_size)
+        self.__done = 0
+        self.__started = None
+        self.__finished = None
+
+    def __str__(self):
+        return "Simulation(%d/%d games, %.0f games/s)" % (
+            self.__done, self.__games, self.games_per_second)
+
+    def __iter__(self) -> Iterator[GameResult]:
+        self.__started = time.perf_counter()
+        self.__finished = None
+        self.__done = 0
+
+        for results in self.__run_shards():
+            for result in results:
+                self.__done += 1
+                yield result
+
+        self.__finished = time.perf_counter()
+
+    @property
+    def seed(self) -> int:
+        return self.__seed
+
+    @property
+    def done(self) -> int:
+        return self.__done
+
+    @property
+    def elapsed(self) -> float:
+        if self.__started is None:
+            return 0.0
+        return (self.__finished or time.perf_counter()) - self.__started
+
+    @property
+    def games_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.__done / elapsed if elapsed else 0.0
+
+    def get_shards(self) -> List[Tuple[int, int]]:
+        """Obtiene los bloques (cantidad de partidas, semilla) a simular."""
+        return list(self.__iter_shards())
+
+    def __iter_shards(self) -> Iterator[Tuple[int, int]]:
+        # Las semillas de los bloques salen de un generador, no de seed + n,
+        # para que simulaciones con semillas vecinas no compartan bloques.
+        rng = random.Random(self.__seed)
+        for start in range(0, self.__games, self.__chunk_size):
+            yield min(self.__chunk_size, self.__games - start), rng.getrandbits(64)
+
+    def __run_shards(self) -> Iterator[List[GameResult]]:
+        workers = self.__workers or os.cpu_count() or 1
+        if workers == 1:
+            for games, seed in self.__iter_shards():
+                yield _run_shard(self.__players, games, seed)
+            return
+
+        # A lo sumo 2 bloques pendientes por proceso; cada resultado se suelta
+        # al entregarlo.
+        with ProcessPoolExecutor(workers) as executor:
+            pending: Deque[Future] = deque()
+            for games, seed in self.__iter_shards():
+                pending.append(executor.submit(_run_shard, self.__players, games, seed))
+                while len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+
+def simulate(games: int, *players: Player, workers: int = None, seed: int = None,
+             chunk_size: int = 1000) -> Simulation:
+    """Simula partidas completas entre los jugadores indicados.
+
+    Args:
+        games (int): Cantidad de partidas.
+        players (Player): Jugadores (estrategias) en orden de asiento.
+        Defaults to ALL_PLAYERS.
+        workers (int, optional): Procesos a utilizar; 1 simula en el proceso
+        actual. Defaults to la cantidad de CPUs.
+        seed (int, optional): Semilla de la que se derivan las de los bloques.
+        chunk_size (int, optional): Partidas por bloque. Defaults to 1000.
+
+    Returns:
+        Simulation: Iterador de GameResult.
+    """
+    return Simulation(games, players or ALL_PLAYERS, workers=workers, seed=seed,
+                      chunk_size=chunk_size)
+
+
+def main(*args):
+    parser = argparse.ArgumentParser(prog="domino.simulate")
+    parser.add_argument("games", type=int)
+    parser.add_argument("-p", "--players", type=int, default=2, choices=(2, 3, 4))
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument("-s", "--seed", type=int, default=None)
+    parser.add_argument("-c", "--chunk-size", type=int, default=1000)
+    options = parser.parse_args(args or None)
+
+    simulation = simulate(options.games, *ALL_PLAYERS[:options.players],
+                          workers=options.workers, seed=options.seed,
+                          chunk_size=options.chunk_size)
+    wins = {}
+    for result in simulation:
+        wins[result.winner] = wins.get(result.winner, 0) + 1
+
+    for number in sorted(wins):
+        print("winner %d: %d" % (number, wins[number]))
+    print(simulation)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv[1:]))
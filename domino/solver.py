@@ -0,0 +1,249 @@
+"""Solucionador exacto de finales de partida con información perfecta.
+
+Busca con negamax y poda alfa-beta sobre el motor de bits, usando hashing
+de Zobrist del estado y una tabla de transposición de tamaño fijo, donde
+cada posición nueva reemplaza a la que ocupaba su casilla.
+
+El valor de una posición es el margen final de puntos desde el punto de
+vista del jugador en turno: los puntos que le quedan al rival menos los
+propios al terminar la partida (dominó o tranque).
+"""
+import random
+import time
+from typing import List, NamedTuple, Union
+
+from . import bitboard
+from .bitboard import EMPTY, BoardState, Move, NUMBER_MASKS, OTHER_NUMBER, PIECES_PIPS
+from .exceptions import DominoError
+from .game import Game
+from .piece import Piece
+from .player import Player
+from .table import Table
+
+
+_random = random.Random(0x5EED)
+
+# Claves de Zobrist: ficha en la mano de cada asiento, extremos (sin importar
+# el orden, ver _get_ends_key), turno y pases consecutivos.
+TILE_KEYS = tuple(tuple(_random.getrandbits(64) for _ in range(len(Piece.PIECES)))
+                  for _ in range(2))
+ENDS_KEYS = tuple(tuple(_random.getrandbits(64) for _ in range(Piece.MAX_NUMBER + 2))
+                  for _ in range(Piece.MAX_NUMBER + 2))
+TURN_KEYS = (0, _random.getrandbits(64))
+PASSES_KEYS = tuple(_random.getrandbits(64) for _ in range(3))
+
+# Tipos de valor guardados en la tabla de transposición.
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+_INFINITY = 1 << 30
+
+
+class SolverResult(NamedTuple):
+    """Resultado de resolver una posición.
+
+    move: Jugada óptima (índice de ficha, lado), o None si hay que pasar.
+    margin: Margen final de puntos para el jugador en turno con juego óptimo.
+    nodes: Posiciones visitadas.
+    elapsed: Segundos de búsqueda.
+    probes, hits: Consultas y aciertos en la tabla de transposición.
+    """
+    move: Union[Move, None]
+    margin: int
+    nodes: int
+    elapsed: float
+    probes: int
+    hits: int
+
+    @property
+    def piece(self) -> Union[Piece, None]:
+        return Piece.from_index(self.move[0]) if self.move else None
+
+    @property
+    def side(self) -> Union[int, None]:
+        return self.move[1] if self.move else None
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.probes if self.probes else 0.0
+
+
+def _get_ends_key(a: int, b: int) -> int:
+    # (a, b) y (b, a) son la misma posición.
+    if a > b:
+        a, b = b, a
+    return ENDS_KEYS[a + 1][b + 1]
+
+
+def get_hash(state: BoardState) -> int:
+    """Hash de Zobrist del estado de una partida de dos jugadores."""
+    key = _get_ends_key(state.a, state.b) ^ TURN_KEYS[state.turn]
+    key ^= PASSES_KEYS[min(state.passes, 2)]
+    for seat, hand in enumerate(state.hands):
+        for index in bitboard.iter_bits(hand):
+            key ^= TILE_KEYS[seat][index]
+    return key
+
+
+class EndgameSolver:
+    """Resuelve posiciones de dos jugadores con todas las manos conocidas.
+
+    La tabla de transposición se conserva entre llamadas; clear() la vacía.
+
+    Args:
+        table_size (int, optional): Casillas de la tabla (se redondea a una
+        potencia de 2). Defaults to 2 ** 18.
+    """
+
+    def __init__(self, table_size: int = 1 << 18):
+        size = 1 << max(0, table_size - 1).bit_length()
+        self.__mask = size - 1
+        self.__keys: List[int] = [0] * size
+        self.__entries: List[tuple] = [None] * size
+        self.__nodes = 0
+        self.__probes = 0
+        self.__hits = 0
+        self.__evictions = 0
+
+    @property
+    def table_size(self) -> int:
+        return self.__mask + 1
+
+    @property
+    def evictions(self) -> int:
+        """Entradas reemplazadas por otra posición desde el último clear()."""
+        return self.__evictions
+
+    def clear(self) -> None:
+        size = self.__mask + 1
+        self.__keys = [0] * size
+        self.__entries = [None] * size
+        self.__evictions = 0
+
+    def solve(self, game: Game, player: Player) -> SolverResult:
+        """Resuelve la partida con `player` en turno."""
+        if len(game.players) != 2:
+            raise DominoError("The endgame solver supports 2-player games only.")
+        return self.solve_state(game.get_state(player))
+
+    def solve_state(self, state: BoardState) -> SolverResult:
+        if len(state.hands) != 2:
+            raise DominoError("The endgame solver supports 2-player games only.")
+
+        self.__nodes = self.__probes = self.__hits = 0
+        started = time.perf_counter()
+
+        h0, h1 = state.hands
+        hands_key = 0
+        for seat, hand in enumerate(state.hands):
+            for index in bitboard.iter_bits(hand):
+                hands_key ^= TILE_KEYS[seat][index]
+
+        move, margin = self.__search_root(h0, h1, state.a, state.b, state.turn,
+                                          min(state.passes, 2), hands_key)
+
+        return SolverResult(move, margin, self.__nodes,
+                            time.perf_counter() - started, self.__probes,
+                            self.__hits)
+
+    def __get_moves(self, hand: int, a: int, b: int, first: int) -> List[Move]:
+        """Jugadas ordenadas: primero la mejor conocida, luego las más pesadas.
+        Si ambos extremos son iguales se omite el lado B, que da lo mismo."""
+        moves = bitboard.get_legal_moves(hand, a, b)
+        if a == b and a != EMPTY:
+            moves = [move for move in moves if move[1] == Table.A]
+        moves.sort(key=lambda move: (move[0] != first, -PIECES_PIPS[move[0]]))
+        return moves
+
+    def __search_root(self, h0, h1, a, b, turn, passes, hands_key):
+        mine = h0 if turn == 0 else h1
+        moves = self.__get_moves(mine, a, b, -1)
+
+        if not moves or not h0 or not h1 or passes >= 2:
+            return None, self.__negamax(h0, h1, a, b, turn, passes, hands_key,
+                                        -_INFINITY, _INFINITY)
+
+        best_move, alpha = None, -_INFINITY
+        for move in moves:
+            value = -self.__play(h0, h1, a, b, turn, hands_key, move,
+                                 -_INFINITY, -alpha)
+            if value > alpha:
+                best_move, alpha = move, value
+        return best_move, alpha
+
+    def __play(self, h0, h1, a, b, turn, hands_key, move, alpha, beta):
+        index, side = move
+        bit = 1 << index
+        if turn == 0:
+            h0 &= ~bit
+        else:
+            h1 &= ~bit
+
+        if a == EMPTY:
+            a, b = Piece.PIECES[index]
+        elif side == Table.A:
+            a = OTHER_NUMBER[index][a]
+        else:
+            b = OTHER_NUMBER[index][b]
+
+        return self.__negamax(h0, h1, a, b, 1 - turn, 0,
+                              hands_key ^ TILE_KEYS[turn][index], alpha, beta)
+
+    def __negamax(self, h0, h1, a, b, turn, passes, hands_key, alpha, beta):
+        self.__nodes += 1
+        mine, theirs = (h0, h1) if turn == 0 else (h1, h0)
+
+        if not mine or not theirs or passes >= 2:
+            return bitboard.count_pips(theirs) - bitboard.count_pips(mine)
+
+        key = hands_key ^ _get_ends_key(a, b) ^ TURN_KEYS[turn] ^ PASSES_KEYS[passes]
+        slot = key & self.__mask
+        first = -1
+        original_alpha = alpha
+
+        self.__probes += 1
+        if self.__keys[slot] == key:
+            self.__hits += 1
+            value, flag, first = self.__entries[slot]
+            if flag == EXACT:
+                return value
+            if flag == LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+
+        if a != EMPTY and not mine & (NUMBER_MASKS[a] | NUMBER_MASKS[b]):
+            best_index = -1
+            value = -self.__negamax(h0, h1, a, b, 1 - turn, passes + 1, hands_key,
+                                    -beta, -alpha)
+        else:
+            value, best_index = -_INFINITY, -1
+            for move in self.__get_moves(mine, a, b, first):
+                score = -self.__play(h0, h1, a, b, turn, hands_key, move,
+                                     -beta, -alpha)
+                if score > value:
+                    value, best_index = score, move[0]
+                if value > alpha:
+                    alpha = value
+                if alpha >= beta:
+                    break
+
+        if value <= original_alpha:
+            flag = UPPER
+        elif value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+
+        if self.__keys[slot] not in (0, key):
+            self.__evictions += 1
+        self.__keys[slot] = key
+        self.__entries[slot] = (value, flag, best_index)
+        return value
@@ -0,0 +1,330 @@
+"""Estadísticas de grandes colecciones de partidas.
+
+Las partidas se procesan en bloques en procesos de trabajo (map) y los
+resultados parciales se combinan (reduce), de modo que la memoria usada no
+depende de la cantidad de partidas:
+
+    stats = collect(records, workers=8)               # iterador de GameRecord
+    stats = collect_archives(["partidas.dar"])         # archivos de domino.archive
+    print(format_report(stats))
+
+Cada partida se lee de sus bytes (GameRecord.to_bytes()) sin crear objetos
+Movement. Una partida en la que nadie se quedó sin fichas se considera
+trancada: gana quien tenga menos puntos, o nadie si hay empate.
+
+Ejemplo de la línea de comandos:
+
+    python -m domino.stats partidas.dar --strategy 1=max --strategy 2=ismcts
+    python -m domino.stats --simulate 100000
+"""
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Deque, Dict, Iterable, Iterator, List, Sequence, Tuple, Union
+
+from . import bitboard
+from .archive import ArchiveReader
+from .game import Game
+from .piece import Piece
+from .player import ALL_PLAYERS
+from .record import GameRecord, MOVEMENT_SIZE, TABLE_CODE
+
+
+class GameStats:
+    """Agregados de un conjunto de partidas; se combinan con merge().
+
+    Args:
+        strategies (Dict[int, str], optional): Nombre de la estrategia de cada
+        número de jugador. Defaults to "Player N".
+    """
+
+    def __init__(self, strategies: Dict[int, str] = None):
+        self.__strategies = dict(strategies or {})
+        self.games = 0
+        self.blocked = 0
+        self.draws = 0
+        # Turnos con ficha jugada: total y cantidad de partidas por largo.
+        self.turns = 0
+        self.lengths: Dict[int, int] = {}
+        # Índice de la ficha de salida -> [partidas, ganadas por quien salió].
+        self.openings: Dict[int, List[int]] = {}
+        # Estrategia -> [partidas, ganadas, puntos restantes].
+        self.players: Dict[str, List[int]] = {}
+
+    @property
+    def strategies(self) -> Dict[int, str]:
+        return self.__strategies
+
+    def get_strategy(self, number: int) -> str:
+        return self.__strategies.get(number) or "Player %d" % number
+
+    def add_record(self, record: GameRecord) -> None:
+        self.add_bytes(record.to_bytes())
+
+    def add_bytes(self, data: bytes) -> None:
+        """Agrega una partida codificada con GameRecord.to_bytes()."""
+        # Código del dueño -> máscara de sus fichas.
+        hands: Dict[int, int] = {}
+        opening = opener = None
+        turns = 0
+
+        for position in range(0, len(data), MOVEMENT_SIZE):
+            piece, _from, to = data[position:position + 3]
+            bit = 1 << piece
+            if _from == TABLE_CODE and to > TABLE_CODE:
+                hands[to] = hands.get(to, 0) | bit
+            elif _from > TABLE_CODE and to == TABLE_CODE:
+                hands[_from] &= ~bit
+                if opening is None:
+                    opening, opener = piece, _from
+                turns += 1
+
+        if not hands:
+            return
+
+        codes = sorted(hands)
+        pips = [bitboard.count_pips(hands[code]) for code in codes]
+        winner = next((code for code in codes if not hands[code]), None)
+        if winner is None:
+            self.blocked += 1
+            lowest = min(pips)
+            if pips.count(lowest) == 1:
+                winner = codes[pips.index(lowest)]
+            else:
+                self.draws += 1
+
+        self.games += 1
+        self.turns += turns
+        self.lengths[turns] = self.lengths.get(turns, 0) + 1
+
+        if opening is not None:
+            values = self.openings.setdefault(opening, [0, 0])
+            values[0] += 1
+            values[1] += winner == opener
+
+        for code, points in zip(codes, pips):
+            # Los jugadores se codifican como su número + 1.
+            values = self.players.setdefault(self.get_strategy(code - 1), [0, 0, 0])
+            values[0] += 1
+            values[1] += winner == code
+            values[2] += points
+
+    def merge(self, other: 'GameStats') -> 'GameStats':
+        """Suma los agregados de otro GameStats a este y lo devuelve."""
+        self.games += other.games
+        self.blocked += other.blocked
+        self.draws += other.draws
+        self.turns += other.turns
+        for length, count in other.lengths.items():
+            self.lengths[length] = self.lengths.get(length, 0) + count
+        for totals, others in ((self.openings, other.openings),
+                               (self.players, other.players)):
+            for key, values in others.items():
+                current = totals.setdefault(key, [0] * len(values))
+                for k, value in enumerate(values):
+                    current[k] += value
+        return self
+
+    @property
+    def average_length(self) -> float:
+        return self.turns / self.games if self.games else 0.0
+
+    def get_length_percentile(self, percent: float) -> int:
+        target = self.games * percent / 100
+        seen = 0
+        for length in sorted(self.lengths):
+            seen += self.lengths[length]
+            if seen >= target:
+                return length
+        return 0
+
+    def get_opening_win_rates(self) -> Dict[Piece, Tuple[int, float]]:
+        """Ficha de salida -> (partidas, proporción ganada por quien salió)."""
+        return {Piece.from_index(index): (games, wins / games)
+                for index, (games, wins) in sorted(self.openings.items())}
+
+    def get_strategies_stats(self) -> Dict[str, Tuple[int, float, float]]:
+        """Estrategia -> (partidas, proporción ganada, puntos restantes promedio)."""
+        return {name: (games, wins / games, pips / games)
+                for name, (games, wins, pips) in sorted(self.players.items())}
+
+    def to_dict(self) -> Dict:
+        return {
+            "games": self.games,
+            "blocked": self.blocked,
+            "draws": self.draws,
+            "average_length": self.average_length,
+            "length_p50": self.get_length_percentile(50),
+            "length_p90": self.get_length_percentile(90),
+            "openings": {str(piece): {"games": games, "win_rate": rate}
+                         for piece, (games, rate) in self.get_opening_win_rates().items()},
+            "strategies": {name: {"games": games, "win_rate": rate, "average_pips": pips}
+                           for name, (games, rate, pips)
+                           in self.get_strategies_stats().items()},
+        }
+
+
+def _map_bytes(chunk: Sequence[bytes], strategies: Dict[int, str]) -> GameStats:
+    stats = GameStats(strategies)
+    for data in chunk:
+        stats.add_bytes(data)
+    return stats
+
+
+def _map_archive(path: str, start: int, stop: int,
+                 strategies: Dict[int, str]) -> GameStats:
+    stats = GameStats(strategies)
+    with ArchiveReader(path) as reader:
+        for index in range(start, stop):
+            stats.add_bytes(reader.get_bytes(index))
+    return stats
+
+
+def _map_simulation(players: int, first: int, games: int,
+                    strategies: Dict[int, str]) -> GameStats:
+    stats = GameStats(strategies)
+    for seed in range(first, first + games):
+        game = Game.create(*ALL_PLAYERS[:players], seed=seed)
+        game.run()
+        stats.add_record(game.record)
+    return stats
+
+
+def _reduce(executor: Union[Executor, None], tasks: Iterator[tuple],
+            strategies: Dict[int, str], workers: int) -> GameStats:
+    """Ejecuta los bloques y combina sus resultados, con a lo sumo 2 bloques
+    pendientes por proceso para que la memoria no crezca."""
+    total = GameStats(strategies)
+    if executor is None:
+        for function, *args in tasks:
+            total.merge(function(*args))
+        return total
+
+    pending: Deque[Future] = deque()
+    for function, *args in tasks:
+        pending.append(executor.submit(function, *args))
+        while len(pending) >= 2 * workers:
+            total.merge(pending.popleft().result())
+    while pending:
+        total.merge(pending.popleft().result())
+    return total
+
+
+def _run(tasks: Iterator[tuple], strategies: Dict[int, str], workers: int) -> GameStats:
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return _reduce(None, tasks, strategies, 1)
+    with ProcessPoolExecutor(workers) as executor:
+        return _reduce(executor, tasks, strategies, workers)
+
+
+def collect(records: Iterable[Union[GameRecord, bytes]], workers: int = None,
+            chunk_size: int = 1000, strategies: Dict[int, str] = None) -> GameStats:
+    """Calcula las estadísticas de un iterador de partidas.
+
+    Args:
+        records: GameRecord o sus bytes (GameRecord.to_bytes()).
+        workers (int, optional): Procesos; 1 calcula en el proceso actual.
+        Defaults to la cantidad de CPUs.
+        chunk_size (int, optional): Partidas por bloque.
+        strategies (Dict[int, str], optional): Ver GameStats.
+    """
+    def tasks():
+        chunk = []
+        for record in records:
+            chunk.append(record if isinstance(record, bytes) else record.to_bytes())
+            if len(chunk) >= chunk_size:
+                yield _map_bytes, chunk, strategies
+                chunk = []
+        if chunk:
+            yield _map_bytes, chunk, strategies
+
+    return _run(tasks(), strategies, workers)
+
+
+def collect_archives(paths: Sequence[str], workers: int = None, chunk_size: int = 10000,
+                     strategies: Dict[int, str] = None) -> GameStats:
+    """Calcula las estadísticas de archivos de partidas (domino.archive). Cada
+    proceso abre el archivo y lee su rango de partidas."""
+    def tasks():
+        for path in paths:
+            with ArchiveReader(path) as reader:
+                count = len(reader)
+            for start in range(0, count, chunk_size):
+                yield _map_archive, path, start, min(count, start + chunk_size), strategies
+
+    return _run(tasks(), strategies, workers)
+
+
+def collect_simulation(games: int, players: int = 2, workers: int = None,
+                       chunk_size: int = 1000, seed: int = 0,
+                       strategies: Dict[int, str] = None) -> GameStats:
+    """Simula partidas entre los jugadores por defecto (seed, seed + 1, ...)
+    y calcula sus estadísticas."""
+    def tasks():
+        for first in range(0, games, chunk_size):
+            yield (_map_simulation, players, seed + first,
+                   min(chunk_size, games - first), strategies)
+
+    return _run(tasks(), strategies, workers)
+
+
+def format_report(stats: GameStats, openings: int = 28) -> str:
+    lines = [
+        "games:          %d" % stats.games,
+        "blocked:        %d (%.1f%%)" % (stats.blocked,
+                                         100 * stats.blocked / max(1, stats.games)),
+        "draws:          %d" % stats.draws,
+        "turns:          mean %.1f  p50 %d  p90 %d" % (
+            stats.average_length, stats.get_length_percentile(50),
+            stats.get_length_percentile(90)),
+        "",
+        "%-16s %9s %9s %12s" % ("strategy", "games", "win rate", "pips left"),
+    ]
+    for name, (games, rate, pips) in stats.get_strategies_stats().items():
+        lines.append("%-16s %9d %8.1f%% %12.2f" % (name, games, rate * 100, pips))
+
+    lines += ["", "%-16s %9s %9s" % ("opening", "games", "win rate")]
+    rates = sorted(stats.get_opening_win_rates().items(), key=lambda item: (-item[1][0], -item[1][1]))
+    for piece, (games, rate) in rates[:openings]:
+        lines.append("%-16s %9d %8.1f%%" % (piece, games, rate * 100))
+    return "\n".join(lines)
+
+
+def main(*args):
+    parser = argparse.ArgumentParser(prog="domino.stats")
+    parser.add_argument("archives", nargs="*")
+    parser.add_argument("--simulate", type=int, default=0,
+                        help="simula esta cantidad de partidas en vez de leer archivos")
+    parser.add_argument("-p", "--players", type=int, default=2, choices=(2, 3, 4))
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument("-c", "--chunk-size", type=int, default=None)
+    parser.add_argument("--strategy", action="append", default=[],
+                        help="NÚMERO=NOMBRE, nombre de la estrategia de un jugador")
+    parser.add_argument("--json", action="store_true")
+    options = parser.parse_args(args or None)
+
+    if not options.archives and not options.simulate:
+        parser.error("indique archivos de partidas o --simulate")
+
+    strategies = {}
+    for item in options.strategy:
+        number, _, name = item.partition("=")
+        strategies[int(number)] = name
+
+    if options.simulate:
+        stats = collect_simulation(options.simulate, options.players, options.workers,
+                                   options.chunk_size or 1000, strategies=strategies)
+    else:
+        stats = collect_archives(options.archives, options.workers,
+                                 options.chunk_size or 10000, strategies)
+
+    print(json.dumps(stats.to_dict(), indent=2) if options.json else format_report(stats))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv[1:]))
@@ -0,0 +1,387 @@
+"""Torneos de todos contra todos entre estrategias.
+
+Ejemplo:
+
+    tournament = Tournament([
+        Entrant("max", Player),
+        Entrant("ismcts", functools.partial(ISMCTSPlayer, iterations=200)),
+    ], deals=500, seed=1, checkpoint="torneo.jsonl")
+    for standing in tournament.run():
+        ...
+    print(format_standings(tournament.get_standings()))
+
+Cada grupo de participantes (cada par, o cada grupo de 4 en partidas de 4
+jugadores) juega los mismos repartos rotando los asientos, de modo que la
+ventaja del reparto y de salir primero se compensa. Los repartos dependen
+solo de la semilla, el grupo y el número de reparto, así que el resultado no
+depende del orden en que terminen los procesos.
+
+Los procesos reciben solo las fábricas de jugadores y devuelven resultados
+compactos; el progreso se guarda en un archivo JSONL para poder continuar un
+torneo interrumpido.
+"""
+import argparse
+import functools
+import itertools
+import json
+import math
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Iterator, List, NamedTuple, Sequence, Tuple
+
+from . import bitboard, deals
+from .bitboard import BoardState
+from .exceptions import DominoError
+from .ismcts import ISMCTSPlayer
+from .player import Player
+
+
+class Entrant(NamedTuple):
+    """Participante: nombre y fábrica que crea el jugador con su número de
+    asiento (1-4), por ejemplo una subclase de Player o un functools.partial.
+    Debe poder enviarse a otros procesos con pickle."""
+    name: str
+    factory: Callable[[int], Player]
+
+
+class Job(NamedTuple):
+    """Bloque de trabajo: `deals` repartos consecutivos de un grupo."""
+    number: int
+    group: Tuple[int, ...]
+    first: int
+    deals: int
+
+
+# Resultado de una partida: participantes por asiento, asiento ganador (-1 si
+# hubo empate) y puntos que le quedaron a cada asiento.
+GameSummary = Tuple[Tuple[int, ...], int, Tuple[int, ...]]
+
+
+class Standing(NamedTuple):
+    """Fila de la tabla de posiciones. Los intervalos son de 95%."""
+    name: str
+    games: int
+    wins: int
+    draws: int
+    losses: int
+    win_rate: float
+    win_rate_low: float
+    win_rate_high: float
+    elo: float
+    elo_low: float
+    elo_high: float
+
+
+def deal(seed: int, group: Sequence[int], number: int, players: int) -> Tuple[int, ...]:
+    """Manos del reparto `number` de un grupo, 7 fichas por asiento."""
+    rng = random.Random("%d/%s/%d" % (seed, ",".join(map(str, group)), number))
+    return deals.random_deal(players, rng)
+
+
+def _play_job(factories: Sequence[Callable[[int], Player]], job: Job,
+              seed: int) -> List[GameSummary]:
+    """Juega un bloque en el proceso de trabajo."""
+    players = len(job.group)
+    summaries = []
+    for number in range(job.first, job.first + job.deals):
+        hands = deal(seed, job.group, number, players)
+        for rotation in range(players):
+            seats = tuple(job.group[(seat + rotation) % players]
+                          for seat in range(players))
+            policies = [factories[entrant](seat + 1).choose_move
+                        for seat, entrant in enumerate(seats)]
+            state, _ = bitboard.playout(BoardState(hands), policies)
+            summaries.append((seats, bitboard.get_winner(state),
+                              tuple(bitboard.count_pips(hand) for hand in state.hands)))
+    return summaries
+
+
+def wilson_interval(successes: float, trials: int, z: float = 1.96) -> Tuple[float, float]:
+    """Intervalo de confianza de Wilson para una proporción."""
+    if not trials:
+        return 0.0, 1.0
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    center = (p + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def fit_elo(scores: Sequence[Sequence[float]], games: Sequence[Sequence[int]],
+            iterations: int = 500) -> List[float]:
+    """Ratings Elo de máxima verosimilitud (modelo de Bradley-Terry).
+
+    Args:
+        scores: scores[i][j] es la puntuación de i contra j (1 por victoria,
+        0.5 por empate).
+        games: games[i][j] es la cantidad de comparaciones entre i y j.
+
+    Returns:
+        List[float]: Ratings centrados en 1500. Cada par recibe un empate
+        ficticio para que los ratings sean finitos.
+    """
+    size = len(scores)
+    strengths = [1.0] * size
+    for _ in range(iterations):
+        updated = []
+        for i in range(size):
+            won = 0.0
+            denominator = 0.0
+            for j in range(size):
+                if i == j:
+                    continue
+                won += scores[i][j] + 0.5
+                denominator += (games[i][j] + 1) / (strengths[i] + strengths[j])
+            updated.append(won / denominator if denominator else 1.0)
+
+        mean = math.exp(sum(math.log(s) for s in updated) / size)
+        updated = [s / mean for s in updated]
+        change = max(abs(a - b) for a, b in zip(updated, strengths))
+        strengths = updated
+        if change < 1e-9:
+            break
+
+    return [1500 + 400 * math.log10(s) for s in strengths]
+
+
+class Tournament:
+    """Torneo de todos contra todos.
+
+    Args:
+        entrants (Sequence[Entrant]): Participantes.
+        players (int, optional): Jugadores por partida (2-4).
+        deals (int, optional): Repartos por grupo; cada uno se juega una vez
+        por rotación de asientos.
+        seed (int, optional): Semilla de los repartos.
+        workers (int, optional): Procesos; 1 juega en el proceso actual.
+        Defaults to la cantidad de CPUs.
+        chunk_size (int, optional): Repartos por bloque de trabajo.
+        checkpoint (str, optional): Archivo JSONL de progreso. Si existe, se
+        continúa desde él.
+    """
+
+    def __init__(self, entrants: Sequence[Entrant], players: int = 2,
+                 deals: int = 100, seed: int = 0, workers: int = None,
+                 chunk_size: int = 25, checkpoint: str = None):
+        if not 2 <= players <= 4:
+            raise DominoError("The players per game must be between 2 and 4.")
+        if len(entrants) < players:
+            raise DominoError("At least %d entrants are required." % players)
+        if len({entrant.name for entrant in entrants}) != len(entrants):
+            raise DominoError("The entrants names must be unique.")
+
+        self.__entrants = list(entrants)
+        self.__players = players
+        self.__deals = deals
+        self.__seed = seed
+        self.__workers = workers
+        self.__chunk_size = max(1, chunk_size)
+        self.__checkpoint = checkpoint
+        self.__results: Dict[int, List[GameSummary]] = {}
+
+        if checkpoint and os.path.exists(checkpoint):
+            self.__load_checkpoint()
+
+    @property
+    def entrants(self) -> List[Entrant]:
+        return self.__entrants
+
+    @property
+    def done(self) -> int:
+        """Bloques de trabajo terminados."""
+        return len(self.__results)
+
+    @property
+    def total(self) -> int:
+        return len(self.get_jobs())
+
+    def get_jobs(self) -> List[Job]:
+        jobs = []
+        groups = itertools.combinations(range(len(self.__entrants)), self.__players)
+        for group in groups:
+            for first in range(0, self.__deals, self.__chunk_size):
+                jobs.append(Job(len(jobs), group, first,
+                                min(self.__chunk_size, self.__deals - first)))
+        return jobs
+
+    def get_games(self) -> Iterator[GameSummary]:
+        for number in sorted(self.__results):
+            yield from self.__results[number]
+
+    def run(self) -> List[Standing]:
+        """Juega los bloques pendientes y devuelve la tabla de posiciones."""
+        pending = [job for job in self.get_jobs() if job.number not in self.__results]
+        factories = [entrant.factory for entrant in self.__entrants]
+
+        if self.__workers == 1:
+            for job in pending:
+                self.__add_results(job, _play_job(factories, job, self.__seed))
+        elif pending:
+            with ProcessPoolExecutor(self.__workers) as executor:
+                futures = {executor.submit(_play_job, factories, job, self.__seed): job
+                           for job in pending}
+                for future in as_completed(futures):
+                    self.__add_results(futures[future], future.result())
+
+        return self.get_standings()
+
+    def get_standings(self, resamples: int = 200) -> List[Standing]:
+        """Tabla de posiciones ordenada por Elo.
+
+        Las partidas se comparan por pares de asientos: gana quien terminó con
+        menos puntos (el ganador de la partida) y los empates valen 0.5. El
+        intervalo del Elo se estima remuestreando los resultados de cada par.
+        """
+        size = len(self.__entrants)
+        scores = [[0.0] * size for _ in range(size)]
+        games = [[0] * size for _ in range(size)]
+        totals = [[0, 0, 0] for _ in range(size)]
+
+        for seats, winner, pips in self.get_games():
+            for seat, entrant in enumerate(seats):
+                totals[entrant][0 if winner == seat else 1 if winner == -1 else 2] += 1
+            for first, second in itertools.combinations(range(len(seats)), 2):
+                i, j = seats[first], seats[second]
+                games[i][j] += 1
+                games[j][i] += 1
+                if pips[first] == pips[second]:
+                    scores[i][j] += 0.5
+                    scores[j][i] += 0.5
+                elif pips[first] < pips[second]:
+                    scores[i][j] += 1
+                else:
+                    scores[j][i] += 1
+
+        ratings = fit_elo(scores, games)
+        low, high = self.__get_elo_intervals(scores, games, resamples)
+
+        standings = []
+        for i, entrant in enumerate(self.__entrants):
+            wins, draws, losses = totals[i]
+            played = wins + draws + losses
+            interval = wilson_interval(wins, played)
+            standings.append(Standing(
+                entrant.name, played, wins, draws, losses,
+                wins / played if played else 0.0, interval[0], interval[1],
+                ratings[i], low[i], high[i],
+            ))
+        standings.sort(key=lambda standing: -standing.elo)
+        return standings
+
+    def __get_elo_intervals(self, scores, games, resamples) -> Tuple[List[float], List[float]]:
+        size = len(scores)
+        rng = random.Random(self.__seed)
+        samples = [[] for _ in range(size)]
+
+        for _ in range(resamples):
+            sample = [[0.0] * size for _ in range(size)]
+            for i, j in itertools.combinations(range(size), 2):
+                n = games[i][j]
+                if not n:
+                    continue
+                p = scores[i][j] / n
+                # Aproximación normal de la binomial (n suele ser grande).
+                value = rng.gauss(n * p, math.sqrt(n * p * (1 - p)))
+                value = min(float(n), max(0.0, value))
+                sample[i][j] = value
+                sample[j][i] = n - value
+            for i, rating in enumerate(fit_elo(sample, games, 100)):
+                samples[i].append(rating)
+
+        low, high = [], []
+        for values in samples:
+            values.sort()
+            if not values:
+                low.append(1500.0)
+                high.append(1500.0)
+                continue
+            low.append(values[int(len(values) * 0.025)])
+            high.append(values[min(len(values) - 1, int(len(values) * 0.975))])
+        return low, high
+
+    def __get_header(self) -> Dict:
+        return {
+            "entrants": [entrant.name for entrant in self.__entrants],
+            "players": self.__players,
+            "deals": self.__deals,
+            "seed": self.__seed,
+            "chunk_size": self.__chunk_size,
+        }
+
+    def __load_checkpoint(self) -> None:
+        with open(self.__checkpoint) as file:
+            text = file.read()
+
+        if not text.endswith("\n"):
+            # Se descarta la línea incompleta de una interrupción durante la
+            # escritura, para que lo que se agregue empiece en una línea nueva.
+            text = text[:text.rfind("\n") + 1]
+            with open(self.__checkpoint, "w") as file:
+                file.write(text)
+
+        lines = text.splitlines()
+        if not lines:
+            return
+        if json.loads(lines[0]) != self.__get_header():
+            raise DominoError("The checkpoint %s belongs to another tournament."
+                              % self.__checkpoint)
+
+        for line in lines[1:]:
+            item = json.loads(line)
+            self.__results[item["job"]] = [
+                (tuple(seats), winner, tuple(pips))
+                for seats, winner, pips in item["games"]
+            ]
+
+    def __add_results(self, job: Job, summaries: List[GameSummary]) -> None:
+        self.__results[job.number] = summaries
+        if not self.__checkpoint:
+            return
+
+        new = not os.path.exists(self.__checkpoint) or not os.path.getsize(self.__checkpoint)
+        with open(self.__checkpoint, "a") as file:
+            if new:
+                file.write(json.dumps(self.__get_header()) + "\n")
+            file.write(json.dumps({"job": job.number, "games": summaries}) + "\n")
+
+
+def format_standings(standings: Sequence[Standing]) -> str:
+    lines = ["%-16s %7s %7s %7s %7s %18s %18s" % (
+        "name", "games", "wins", "draws", "losses", "win rate", "elo")]
+    for s in standings:
+        lines.append("%-16s %7d %7d %7d %7d %6.1f%% [%4.1f-%4.1f] %6.0f [%4.0f-%4.0f]" % (
+            s.name, s.games, s.wins, s.draws, s.losses, s.win_rate * 100,
+            s.win_rate_low * 100, s.win_rate_high * 100, s.elo, s.elo_low, s.elo_high))
+    return "\n".join(lines)
+
+
+def main(*args):
+    parser = argparse.ArgumentParser(prog="domino.tournament")
+    parser.add_argument("deals", type=int)
+    parser.add_argument("-p", "--players", type=int, default=2, choices=(2, 3, 4))
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("-c", "--chunk-size", type=int, default=25)
+    parser.add_argument("--checkpoint", default=None)
+    parser.add_argument("--iterations", type=int, nargs="*", default=[100],
+                        help="un participante ISMCTS por cada cantidad de iteraciones")
+    options = parser.parse_args(args or None)
+
+    entrants = [Entrant("max", Player)]
+    for iterations in options.iterations:
+        entrants.append(Entrant("ismcts-%d" % iterations,
+                                functools.partial(ISMCTSPlayer, iterations=iterations,
+                                                  seed=options.seed)))
+
+    tournament = Tournament(entrants, players=options.players, deals=options.deals,
+                            seed=options.seed, workers=options.workers,
+                            chunk_size=options.chunk_size,
+                            checkpoint=options.checkpoint)
+    print(format_standings(tournament.run()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv[1:]))
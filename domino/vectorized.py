@@ -0,0 +1,251 @@
+"""Motor vectorizado con NumPy para avanzar muchas partidas a la vez.
+
+Requiere NumPy. Cada partida del lote ocupa una fila de los arreglos: las
+manos son booleanos (partidas, asientos, fichas), los extremos y el turno
+son enteros por partida. En cada paso se calculan las jugadas válidas de
+todo el lote con una sola operación y se aplica la estrategia a la vez.
+
+Las reglas son las del motor de bits (domino.bitboard): sin robar, se pasa
+cuando no hay jugada y la partida se tranca tras un pase de cada asiento.
+Con las estrategias deterministas el resultado es idéntico al de
+bitboard.playout sobre los mismos repartos.
+"""
+import time
+from typing import Callable, List, NamedTuple, Sequence, Union
+
+import numpy as np
+
+from .bitboard import EMPTY, BoardState, PIECES_PIPS, iter_bits
+from .piece import DOUBLE_SIX, Piece, PieceSet
+from .table import Table
+
+
+# Las tablas cubren todas las fichas de Piece.PIECES; un lote de un juego de 
+# fichas usa solo sus primeras columnas (ver PieceSet).
+PIECES_COUNT = len(Piece.PIECES)
+_NUMBERS = Piece.MAX_NUMBER + 1
+
+_PIECES = np.array(Piece.PIECES, dtype=np.int8)
+_PIPS = np.array(PIECES_PIPS, dtype=np.int16)
+_IS_DOUBLE = _PIECES[:, 0] == _PIECES[:, 1]
+
+# FITS[n, i] indica si la ficha i lleva el número n. La última fila (índice
+# EMPTY) corresponde a la mesa vacía, donde encaja cualquier ficha.
+FITS = np.zeros((_NUMBERS + 1, PIECES_COUNT), dtype=bool)
+for _n in range(_NUMBERS):
+    FITS[_n] = (_PIECES[:, 0] == _n) | (_PIECES[:, 1] == _n)
+FITS[EMPTY] = True
+
+# OTHER[i, n] es el número que queda expuesto al poner la ficha i sobre n.
+OTHER = np.full((PIECES_COUNT, _NUMBERS + 1), EMPTY, dtype=np.int8)
+for _n in range(_NUMBERS):
+    OTHER[:, _n] = np.where(_PIECES[:, 0] == _n, _PIECES[:, 1],
+                            np.where(_PIECES[:, 1] == _n, _PIECES[:, 0], EMPTY))
+
+
+# Una estrategia recibe las jugadas válidas (partidas, fichas), el lote y el
+# generador aleatorio, y devuelve el índice de ficha elegido por partida.
+# El lado se decide después: A si la ficha encaja en A, si no B.
+Policy = Callable[[np.ndarray, 'GameBatch', np.random.Generator], np.ndarray]
+
+
+def max_piece_policy(legal: np.ndarray, batch: 'GameBatch',
+                     rng: np.random.Generator) -> np.ndarray:
+    """La regla de Player.play: la ficha con más puntos (la de menor índice si
+    hay empate), igual que bitboard.choose_max_piece."""
+    return np.argmax(np.where(legal, _PIPS[:legal.shape[1]], -1), axis=1)
+
+
+def heaviest_pip_policy(legal: np.ndarray, batch: 'GameBatch',
+                        rng: np.random.Generator) -> np.ndarray:
+    """La ficha con más puntos, prefiriendo los dobles en caso de empate,
+    igual que bitboard.choose_heaviest_piece."""
+    count = legal.shape[1]
+    return np.argmax(np.where(legal, _PIPS[:count] * 2 + _IS_DOUBLE[:count], -1), axis=1)
+
+
+def random_policy(legal: np.ndarray, batch: 'GameBatch',
+                  rng: np.random.Generator) -> np.ndarray:
+    """Una ficha jugable al azar."""
+    return np.argmax(np.where(legal, rng.random(legal.shape), -1.0), axis=1)
+
+
+POLICIES = {
+    "max": max_piece_policy,
+    "heaviest": heaviest_pip_policy,
+    "random": random_policy,
+}
+
+
+class BatchResult(NamedTuple):
+    """Resultado de un lote de partidas.
+
+    winners: Asiento ganador por partida, o -1 si hubo empate.
+    turns: Turnos jugados por partida, pases incluidos.
+    pips: Puntos restantes por partida y asiento.
+    elapsed: Segundos que tardó la simulación.
+    """
+    winners: np.ndarray
+    turns: np.ndarray
+    pips: np.ndarray
+    elapsed: float
+
+    @property
+    def games_per_second(self) -> float:
+        return len(self.winners) / self.elapsed if self.elapsed else 0.0
+
+
+class GameBatch:
+    """Lote de partidas en arreglos de NumPy.
+
+    La cantidad de fichas (última dimensión de hands) es la del juego de 
+    fichas, por ejemplo 28 en el doble seis.
+    """
+
+    def __init__(self, hands: np.ndarray, a: np.ndarray = None, b: np.ndarray = None,
+                 turn: np.ndarray = None):
+        games, _, count = hands.shape
+        self.hands = hands.astype(bool)
+        self.played = np.zeros((games, count), dtype=bool)
+        self.__fits = FITS[:, :count]
+        self.__pips = _PIPS[:count]
+        self.a = np.full(games, EMPTY, dtype=np.int8) if a is None else a.astype(np.int8)
+        self.b = np.full(games, EMPTY, dtype=np.int8) if b is None else b.astype(np.int8)
+        self.turn = np.zeros(games, dtype=np.int8) if turn is None else turn.astype(np.int8)
+        self.passes = np.zeros(games, dtype=np.int8)
+        self.turns = np.zeros(games, dtype=np.int32)
+        self.finished = ~self.hands.any(axis=2).all(axis=1)
+
+    def __len__(self):
+        return self.hands.shape[0]
+
+    @property
+    def players(self) -> int:
+        return self.hands.shape[1]
+
+    @property
+    def pieces_count(self) -> int:
+        return self.hands.shape[2]
+
+    @classmethod
+    def from_states(cls, states: Sequence[BoardState]) -> 'GameBatch':
+        """Crea el lote a partir de estados del motor de bits, por ejemplo los
+        de Game.get_state() para comparar con la simulación escalar."""
+        players = len(states[0].hands)
+        count = max(state.pieces for state in states).bit_length()
+        hands = np.zeros((len(states), players, count), dtype=bool)
+        for g, state in enumerate(states):
+            for seat, hand in enumerate(state.hands):
+                hands[g, seat, list(iter_bits(hand))] = True
+
+        batch = cls(
+            hands,
+            a=np.array([state.a for state in states]),
+            b=np.array([state.b for state in states]),
+            turn=np.array([state.turn for state in states]),
+        )
+        for g, state in enumerate(states):
+            batch.played[g, list(iter_bits(state.played))] = True
+        return batch
+
+    @classmethod
+    def deal(cls, games: int, players: int = 2, rng: np.random.Generator = None,
+             hand_size: int = None, piece_set: PieceSet = DOUBLE_SIX) -> 'GameBatch':
+        """Reparte partidas nuevas barajando las fichas de cada una.
+
+        Args:
+            hand_size (int, optional): Defaults to el del juego de fichas.
+            piece_set (PieceSet, optional): Defaults to DOUBLE_SIX.
+        """
+        rng = rng or np.random.default_rng()
+        count = piece_set.count
+        hand_size = hand_size or piece_set.hand_size
+        order = rng.permuted(np.tile(np.arange(count), (games, 1)), axis=1)
+        hands = np.zeros((games, players, count), dtype=bool)
+        rows = np.arange(games)[:, None]
+        for seat in range(players):
+            hands[rows, seat, order[:, seat * hand_size:(seat + 1) * hand_size]] = True
+        return cls(hands)
+
+    def get_legal(self) -> np.ndarray:
+        """Jugadas válidas (partidas, fichas) del asiento en turno de cada
+        partida. Las partidas terminadas no tienen jugadas."""
+        games = np.arange(len(self))
+        hand = self.hands[games, self.turn]
+        legal = hand & (self.__fits[self.a] | self.__fits[self.b])
+        legal[self.finished] = False
+        return legal
+
+    def step(self, policies: Sequence[Policy], rng: np.random.Generator) -> None:
+        """Avanza un turno todas las partidas que no han terminado."""
+        active = ~self.finished
+        legal = self.get_legal()
+        can_play = legal.any(axis=1)
+
+        if len(policies) == 1:
+            choice = policies[0](legal, self, rng)
+        else:
+            choice = np.zeros(len(self), dtype=np.intp)
+            for seat, policy in enumerate(policies):
+                in_turn = self.turn == seat
+                if in_turn.any():
+                    choice[in_turn] = policy(legal, self, rng)[in_turn]
+
+        games = np.nonzero(can_play)[0]
+        pieces = choice[games]
+        turn = self.turn[games]
+        a, b = self.a[games], self.b[games]
+
+        self.hands[games, turn, pieces] = False
+        self.played[games, pieces] = True
+
+        empty = a == EMPTY
+        side_a = self.__fits[a, pieces]
+        new_a = np.where(side_a, OTHER[pieces, a], a)
+        new_b = np.where(side_a, b, OTHER[pieces, b])
+        self.a[games] = np.where(empty, _PIECES[pieces, 0], new_a)
+        self.b[games] = np.where(empty, _PIECES[pieces, 1], new_b)
+
+        self.passes[can_play] = 0
+        self.passes[active & ~can_play] += 1
+        self.turns[active] += 1
+        self.turn[active] = (self.turn[active] + 1) % self.players
+
+        self.finished |= (~self.hands.any(axis=2)).any(axis=1)
+        self.finished |= self.passes >= self.players
+
+    def get_pips(self) -> np.ndarray:
+        return (self.hands * self.__pips).sum(axis=2)
+
+    def get_winners(self) -> np.ndarray:
+        """Asiento ganador por partida (ver bitboard.get_winner)."""
+        pips = self.get_pips()
+        empty = ~self.hands.any(axis=2)
+        lowest = pips.min(axis=1, keepdims=True)
+        tied = (pips == lowest).sum(axis=1) > 1
+
+        winners = np.where(tied, -1, np.argmin(pips, axis=1))
+        return np.where(empty.any(axis=1), np.argmax(empty, axis=1), winners)
+
+    def run(self, policies: Union[Policy, str, Sequence[Union[Policy, str]]] = "max",
+            rng: np.random.Generator = None) -> BatchResult:
+        """Juega todas las partidas hasta el final.
+
+        Args:
+            policies: Estrategia para todos los asientos o una por asiento;
+            puede ser una función o un nombre de POLICIES. Defaults to "max".
+            rng (np.random.Generator, optional): Para las estrategias al azar.
+        """
+        if isinstance(policies, str) or callable(policies):
+            policies = [policies]
+        policies: List[Policy] = [POLICIES[p] if isinstance(p, str) else p
+                                  for p in policies]
+        rng = rng or np.random.default_rng()
+
+        started = time.perf_counter()
+        while not self.finished.all():
+            self.step(policies, rng)
+        elapsed = time.perf_counter() - started
+
+        return BatchResult(self.get_winners(), self.turns.copy(), self.get_pips(),
+                           elapsed)
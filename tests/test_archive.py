@@ -0,0 +1,53 @@
+import pytest
+
+from domino.archive import ArchiveReader, ArchiveWriter
+from domino.exceptions import InvalidArchive
+from domino.game import Game
+from domino.player import ALL_PLAYERS
+
+
+@pytest.fixture(scope="module")
+def records():
+    records = []
+    for seed in range(60):
+        game = Game.create(*ALL_PLAYERS[:2 + seed % 3], seed=seed, compact=bool(seed % 2))
+        game.run()
+        records.append(game.record)
+    return records
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_archive_round_trip(records, tmp_path, compress):
+    path = str(tmp_path / "games.dar")
+    with ArchiveWriter(path, compress=compress) as writer:
+        for record in records:
+            writer.write(record)
+
+    with ArchiveReader(path) as reader:
+        assert len(reader) == len(records)
+        assert reader.compressed == compress
+        for index in (0, 7, len(records) - 1, -1):
+            assert reader.get_bytes(index) == records[index].to_bytes()
+            assert [str(movement) for movement in reader[index]] == [
+                str(movement) for movement in records[index]]
+        assert [record.to_bytes() for record in reader] == [
+            record.to_bytes() for record in records]
+        with pytest.raises(IndexError):
+            reader.get_bytes(len(records))
+
+
+def test_invalid_archives_are_rejected(records, tmp_path):
+    path = tmp_path / "games.dar"
+    path.write_bytes(b"")
+    with pytest.raises(InvalidArchive):
+        ArchiveReader(str(path))
+
+    with ArchiveWriter(str(path)) as writer:
+        writer.write(records[0])
+    data = path.read_bytes()
+    path.write_bytes(data[:-1])
+    with pytest.raises(InvalidArchive):
+        ArchiveReader(str(path))
+    path.write_bytes(b"NOTANARC" + data[8:])
+    with pytest.raises(InvalidArchive):
+        ArchiveReader(str(path))
@@ -0,0 +1,113 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from domino import bitboard, dataset
+from domino.game import Game
+from domino.piece import DOUBLE_NINE, DOUBLE_SIX
+from domino.player import ALL_PLAYERS
+from domino.record import RecordState
+from domino.table import Table
+
+
+def get_outcome(record, players):
+    """Asiento ganador (-1 si hay empate) y si la partida se trancó."""
+    hands = [record.get_possession_mask(player) for player in players]
+    winner = next((seat for seat, hand in enumerate(hands) if not hand), None)
+    if winner is not None:
+        return winner, False
+    pips = [bitboard.count_pips(hand) for hand in hands]
+    lowest = min(pips)
+    return (pips.index(lowest) if pips.count(lowest) == 1 else -1), True
+
+
+def encode_reference(record, players, game):
+    """Codifica cada jugada repitiendo el registro movimiento a movimiento."""
+    seats = {player: seat for seat, player in enumerate(players)}
+    winner, _ = get_outcome(record, players)
+    rows = []
+    state = RecordState()
+    for movement in record:
+        if movement._from in seats and isinstance(movement.to, Table):
+            seat = seats[movement._from]
+            opponents = tuple(
+                bitboard.count_pieces(state.get_possession_mask(players[(seat + k) % len(players)]))
+                if k < len(players) else -1
+                for k in (1, 2, 3))
+            outcome = 1 if winner == seat else 0 if winner == -1 else -1
+            rows.append((
+                state.get_possession_mask(movement._from),
+                state.played_mask,
+                state.ends or (-1, -1),
+                opponents,
+                (movement.piece.index, 0 if movement.side == Table.A else 1),
+                outcome,
+                game,
+                seat,
+                len(rows),
+            ))
+        state.apply(movement)
+    return rows
+
+
+def to_mask(row):
+    return sum(1 << int(index) for index in np.nonzero(row)[0])
+
+
+def decode(data):
+    return [(
+        to_mask(data["hand"][i]),
+        to_mask(data["played"][i]),
+        tuple(int(x) for x in data["ends"][i]),
+        tuple(int(x) for x in data["opponents"][i]),
+        tuple(int(x) for x in data["move"][i]),
+        int(data["outcome"][i]),
+        int(data["game"][i]),
+        int(data["seat"][i]),
+        int(data["turn"][i]),
+    ) for i in range(len(data["game"]))]
+
+
+@pytest.fixture(scope="module", params=[DOUBLE_SIX, DOUBLE_NINE], ids=["double-six", "double-nine"])
+def games(request):
+    piece_set = request.param
+    games = []
+    for seed in range(120):
+        game = Game.create(*ALL_PLAYERS[:2 + seed % 3], seed=seed, piece_set=piece_set)
+        game.run()
+        games.append(game)
+    return piece_set, games
+
+
+def get_expected(games):
+    rows = []
+    for number, game in enumerate(games):
+        rows += encode_reference(game.record, game.players, number)
+    return rows
+
+
+def test_encode_games_matches_the_reference(games):
+    piece_set, games = games
+    outcomes = [get_outcome(game.record, game.players) for game in games]
+    # Las partidas cubren los casos del resultado: trancadas con ganador y
+    # con empate, y con 2, 3 y 4 jugadores.
+    assert any(blocked and winner != -1 for winner, blocked in outcomes)
+    assert any(winner == -1 for winner, _ in outcomes)
+    assert {len(game.players) for game in games} == {2, 3, 4}
+
+    data = dataset.encode_games([game.record.to_bytes() for game in games], piece_set)
+    assert decode(data) == get_expected(games)
+
+
+def test_writer_resumes_and_loads(games, tmp_path):
+    piece_set, games = games
+    path = str(tmp_path / "dataset")
+    with dataset.DatasetWriter(path, piece_set, batch_size=37) as writer:
+        writer.write(game.record for game in games[:70])
+    with dataset.DatasetWriter(path, piece_set, batch_size=37) as writer:
+        writer.write(game.record for game in games[70:])
+        assert writer.games == len(games)
+
+    data = dataset.load(path)
+    assert isinstance(data["hand"], np.memmap)
+    assert decode(data) == get_expected(games)
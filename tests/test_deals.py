@@ -0,0 +1,39 @@
+import random
+
+import pytest
+
+from domino import deals
+from domino.exceptions import DominoError
+from domino.piece import DOUBLE_NINE, DOUBLE_SIX
+
+
+@pytest.mark.parametrize("piece_set", [DOUBLE_SIX, DOUBLE_NINE])
+@pytest.mark.parametrize("players", [1, 2, 3, 4])
+def test_rank_and_unrank_are_inverse(players, piece_set):
+    rng = random.Random(players)
+    total = deals.count_deals(players, piece_set)
+    for rank in [0, total - 1] + [rng.randrange(total) for _ in range(50)]:
+        hands = deals.unrank_deal(rank, players, piece_set)
+        assert deals.rank_deal(hands, piece_set) == rank
+    for _ in range(50):
+        hands = deals.random_deal(players, rng, piece_set)
+        assert deals.unrank_deal(deals.rank_deal(hands, piece_set), players, piece_set) == hands
+
+
+def test_stratified_ranks_take_one_rank_per_part():
+    parts = deals.split_ranks(2, 7)
+    ranks = deals.stratified_ranks(2, 7, random.Random(1))
+    assert all(rank in part for rank, part in zip(ranks, parts))
+    for rank in ranks:
+        deals.unrank_deal(rank, 2)
+
+
+@pytest.mark.parametrize("count", [0, -1])
+def test_stratified_ranks_rejects_empty_counts(count):
+    with pytest.raises(DominoError):
+        deals.stratified_ranks(1, count)
+
+
+def test_stratified_ranks_rejects_more_parts_than_deals():
+    with pytest.raises(DominoError):
+        deals.stratified_ranks(1, deals.count_deals(1) + 1)
@@ -0,0 +1,34 @@
+import threading
+
+from domino.events import EventStream, PASSED, Sink
+
+
+class BlockingSink(Sink):
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.events = []
+        self.closed = False
+
+    def write(self, events):
+        self.release.wait()
+        self.events.extend(events)
+
+    def close(self):
+        self.closed = True
+
+
+def test_close_timeout_keeps_sinks_open_until_the_thread_ends():
+    sink = BlockingSink()
+    stream = EventStream([sink], batch_size=1)
+    stream.start()
+    stream.publish((PASSED, 1, 0.0, 0))
+
+    assert stream.close(timeout=0.05) is False
+    assert stream.running and not sink.closed
+
+    sink.release.set()
+    assert stream.close() is True
+    assert not stream.running and sink.closed
+    assert [event["type"] for event in sink.events] == ["passed"]
+    assert stream.close() is True
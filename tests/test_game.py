@@ -0,0 +1,37 @@
+from domino.game import Game
+from domino.player import PLAYER1, PLAYER2
+from domino.table import Table
+
+
+def test_undo_restores_passes_before_the_movement():
+    game = Game.create(PLAYER1, PLAYER2, seed=3)
+    record = game.record
+    record.pass_turn(PLAYER1)
+    piece = game.get_player_pieces(PLAYER2)[0]
+    record.move(piece, PLAYER2, game.table, Table.A)
+    assert record.passes == 0
+
+    record.pass_turn(PLAYER1)
+    record.undo()
+    assert record.passes == 1
+    assert record.copy().passes == 1
+
+
+def test_clone_keeps_the_subclass():
+    class CustomGame(Game):
+        pass
+
+    game = CustomGame.create(PLAYER1, PLAYER2, seed=3)
+    clone = game.clone()
+    assert type(clone) is CustomGame
+    assert list(clone.record) == list(game.record)
+
+
+def test_get_state_keeps_the_passes():
+    game = Game.create(PLAYER1, PLAYER2, seed=3)
+    assert game.get_state().passes == 0
+    game.pass_turn(PLAYER1)
+    game.pass_turn(PLAYER2)
+    state = game.get_state(PLAYER1)
+    assert state.passes == 2
+    assert game.is_blocked()
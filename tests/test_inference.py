@@ -0,0 +1,36 @@
+import pytest
+
+from domino.game import Game
+from domino.inference import HandTracker
+from domino.piece import DOUBLE_NINE, DOUBLE_SIX
+from domino.player import ALL_PLAYERS
+
+
+def snapshot(tracker, game):
+    return [(tracker.get_possible_mask(player), tracker.get_pieces_count(player),
+             tracker.get_suit_counts(player),
+             [round(p, 9) for p in tracker.get_probabilities(player)])
+            for player in game.players]
+
+
+@pytest.mark.parametrize("players", [2, 3, 4])
+@pytest.mark.parametrize("piece_set", [DOUBLE_SIX, DOUBLE_NINE])
+def test_undo_restores_the_tracker(players, piece_set):
+    for seed in range(5):
+        game = Game.create(*ALL_PLAYERS[:players], seed=seed, piece_set=piece_set)
+        trackers = [HandTracker(game, game.players[0]), HandTracker(game)]
+        # Estado de cada tracker antes de cada movimiento.
+        before = []
+        turn = 0
+        while not game.is_finished():
+            player = game.players[turn % players]
+            turn += 1
+            state = [snapshot(tracker, game) for tracker in trackers]
+            length = len(game.record)
+            player.play(game)
+            if len(game.record) > length:
+                before.append(state)
+
+        while before:
+            game.record.undo()
+            assert [snapshot(tracker, game) for tracker in trackers] == before.pop()
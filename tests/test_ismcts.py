@@ -0,0 +1,93 @@
+import pickle
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from domino import bitboard, ismcts
+from domino.game import Game
+from domino.ismcts import ISMCTSPlayer, Observation, sample
+from domino.piece import DOUBLE_NINE, DOUBLE_SIX
+from domino.player import Player
+
+
+def observe(state):
+    counts = tuple(bitboard.count_pieces(hand) for hand in state.hands)
+    return Observation(state.turn, state.hands[state.turn], state.played, state.a,
+                       state.b, counts, (0,) * len(counts), state.passes, state.pieces)
+
+
+@pytest.mark.parametrize("piece_set", [DOUBLE_SIX, DOUBLE_NINE], ids=["double-six", "double-nine"])
+@pytest.mark.parametrize("players", [2, 3, 4])
+def test_sample_is_consistent_with_the_observation(players, piece_set):
+    rng = random.Random(players)
+    game = Game.create(*[Player(n) for n in range(1, players + 1)], seed=1,
+                       piece_set=piece_set)
+    observation = observe(game.get_state())
+    # El asiento 1 no tiene seises.
+    excluded = list(observation.excluded)
+    excluded[1] = bitboard.NUMBER_MASKS[6]
+    observation = observation._replace(excluded=tuple(excluded))
+
+    for _ in range(50):
+        state = sample(observation, rng)
+        assert state.hands[0] == observation.hand
+        assert [bitboard.count_pieces(hand) for hand in state.hands] == list(observation.counts)
+        assert not state.hands[1] & excluded[1]
+        union = 0
+        for hand in state.hands:
+            assert not union & hand
+            union |= hand
+        assert not union & ~piece_set.mask
+
+
+@pytest.mark.parametrize("players", [2, 3, 4])
+def test_deductions_hold_and_moves_are_legal(players, monkeypatch):
+    checked = []
+    search = ismcts.search
+
+    def checked_search(root, observation, *args, **kwargs):
+        hands = truth[-1]
+        for seat, mask in enumerate(observation.excluded):
+            assert not hands[seat] & mask
+        checked.append(observation)
+        return search(root, observation, *args, **kwargs)
+
+    monkeypatch.setattr(ismcts, "search", checked_search)
+    truth = []
+    for seed in range(10):
+        seats = [ISMCTSPlayer(n, iterations=30, seed=seed) for n in range(1, players + 1)]
+
+        def policy(player):
+            def choose(state, moves):
+                truth.append(state.hands)
+                move = player.choose_move(state, moves)
+                assert move in moves
+                return move
+            return choose
+
+        game = Game.create(*seats, seed=seed)
+        game.run([policy(player) for player in seats])
+        assert game.is_finished()
+    assert checked and any(any(observation.excluded) for observation in checked)
+
+
+def test_seeded_player_is_reproducible_and_picklable():
+    def play(player):
+        game = Game.create(player, Player(2), seed=3)
+        game.run()
+        return game.record.to_bytes()
+
+    assert play(ISMCTSPlayer(1, iterations=50, seed=7)) == play(ISMCTSPlayer(1, iterations=50, seed=7))
+    copy = pickle.loads(pickle.dumps(ISMCTSPlayer(1, iterations=50, seed=7)))
+    assert play(copy) == play(ISMCTSPlayer(1, iterations=50, seed=7))
+
+
+def test_root_parallel_search_returns_legal_moves():
+    with ThreadPoolExecutor(2) as executor:
+        player = ISMCTSPlayer(1, iterations=40, executor=executor, searches=2, seed=1)
+        game = Game.create(player, Player(2), seed=5)
+        state = game.get_state()
+        moves = bitboard.legal_moves(state)
+        assert player.choose_move(state, moves) in moves
+        assert player.last_iterations == 40 or len(moves) == 1
@@ -0,0 +1,77 @@
+import pytest
+
+from domino import bitboard
+from domino.exceptions import DominoError, InvalidPlayer
+from domino.game import Game
+from domino.match import Match
+from domino.player import ALL_PLAYERS, PLAYER1, PLAYER2, PLAYER3
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_pips_follow_moves_undo_and_checkpoints(compact):
+    for seed in range(20):
+        game = Game.create(*ALL_PLAYERS, seed=seed, compact=compact)
+        turn = 0
+        while not game.is_finished():
+            game.players[turn % 4].play(game)
+            turn += 1
+            for player in game.players:
+                assert game.get_player_pips(player) == bitboard.count_pips(
+                    game.record.get_possession_mask(player))
+
+        state = game.record.state_at(len(game.record) - 3)
+        record = game.record.copy()
+        for _ in range(3):
+            record.undo()
+        for player in game.players:
+            expected = bitboard.count_pips(state.get_possession_mask(player))
+            assert state.get_possession_pips(player) == expected
+            assert record.get_possession_pips(player) == expected
+
+
+def test_game_winner_matches_the_bitboard_rules():
+    for seed in range(100):
+        game = Game.create(PLAYER1, PLAYER2, PLAYER3, seed=seed)
+        winner = game.run()
+        seat = bitboard.get_winner(game.get_state())
+        assert winner is (game.players[seat] if seat != -1 else None)
+
+
+@pytest.mark.parametrize("players, teams", [(ALL_PLAYERS, True), (ALL_PLAYERS, False),
+                                            ([PLAYER1, PLAYER2], False)])
+def test_match_scores_add_up_and_replay(players, teams):
+    match = Match(players, target=150, teams=teams, seed=3)
+    side = match.play()
+    assert match.is_finished() and match.scores[side] >= 150
+
+    scores = [0] * len(match.scores)
+    for result in match.rounds:
+        assert sum(result.pips) >= result.points
+        if result.winner is None:
+            assert result.points == 0 and result.side == -1 and result.blocked
+        else:
+            scores[result.side] += result.points
+            assert result.side == match.get_side(result.winner)
+    assert tuple(scores) == match.scores
+
+    again = Match(players, target=150, teams=teams, seed=3)
+    again.play()
+    assert again.rounds == match.rounds
+
+
+def test_match_rejects_invalid_settings():
+    with pytest.raises(InvalidPlayer):
+        Match([PLAYER1])
+    with pytest.raises(InvalidPlayer):
+        Match([PLAYER1, PLAYER1])
+    with pytest.raises(DominoError):
+        Match([PLAYER1, PLAYER2], teams=True)
+    with pytest.raises(DominoError):
+        Match([PLAYER1, PLAYER2], target=0)
+
+    match = Match([PLAYER1, PLAYER2], seed=1)
+    match.new_round()
+    with pytest.raises(DominoError):
+        match.new_round()
+    with pytest.raises(DominoError):
+        match.finish_round()
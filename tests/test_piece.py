@@ -0,0 +1,33 @@
+import pytest
+
+from domino.exceptions import InvalidPieceNumber
+from domino.piece import DOUBLE_NINE, DOUBLE_SIX, DOUBLE_TWELVE, Piece, PieceSet
+
+
+@pytest.mark.parametrize("piece_set", [DOUBLE_SIX, DOUBLE_NINE, DOUBLE_TWELVE])
+def test_piece_set_has_exactly_its_pieces(piece_set):
+    n = piece_set.max_number
+    expected = {(a, b) for a in range(n + 1) for b in range(a, n + 1)}
+    assert {piece.tuple() for piece in piece_set} == expected
+    assert len(piece_set) == len(expected)
+    assert piece_set.mask == sum(piece.mask for piece in piece_set)
+    for number in range(n + 1):
+        assert piece_set.number_masks[number] == sum(
+            piece.mask for piece in piece_set if number in piece)
+
+
+@pytest.mark.parametrize("max_number", [0, 1, 3, 5])
+def test_small_piece_sets_are_rejected(max_number):
+    with pytest.raises(InvalidPieceNumber):
+        PieceSet(max_number, 1)
+
+
+def test_pieces_order_by_pips_and_reject_other_types():
+    low, high = Piece.from_values(0, 1), Piece.from_values(3, 3)
+    assert low < high and high > low
+    assert sorted([high, low]) == [low, high]
+    for other in (1, (0, 1), None):
+        with pytest.raises(TypeError):
+            low < other
+        with pytest.raises(TypeError):
+            low > other
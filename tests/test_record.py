@@ -0,0 +1,41 @@
+import pytest
+
+from domino.game import Game
+from domino.player import PLAYER1, PLAYER2, PLAYER3
+from domino.record import GameRecord, RecordState
+
+
+def snapshot(state):
+    masks = {str(owner): mask for owner, mask in state.possession_masks.items() if mask}
+    return state.turn, masks, list(state.row), state.played_mask
+
+
+def replay(record, **kwargs):
+    copy = GameRecord(**kwargs)
+    for movement in record:
+        copy.move(movement.piece, movement._from, movement.to, movement.side)
+    return copy
+
+
+@pytest.mark.parametrize("compact", [False, True])
+@pytest.mark.parametrize("interval", [0, 1, 4, 16, 64])
+def test_cursor_seek_with_record_interval(compact, interval):
+    game = Game.create(PLAYER1, PLAYER2, PLAYER3, seed=7)
+    game.run()
+    record = replay(game.record, compact=compact, checkpoint_interval=interval)
+    assert record.checkpoint_interval == interval
+
+    state = RecordState()
+    expected = [snapshot(state)]
+    for movement in record:
+        state.apply(movement)
+        expected.append(snapshot(state))
+
+    cursor = record.cursor()
+    for turn in (len(record), 0, 25, 3, 17, len(record) - 1, 40, 2):
+        turn = min(turn, len(record))
+        assert snapshot(cursor.seek(turn)) == expected[turn]
+        assert record.get_checkpoint_turn(turn) <= turn
+
+    with pytest.raises(IndexError):
+        cursor.seek(len(record) + 1)
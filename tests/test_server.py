@@ -0,0 +1,136 @@
+import asyncio
+import json
+import time
+
+from domino import bitboard
+from domino.bitboard import PIECES_PIPS
+from domino.game import Game
+from domino.piece import Piece
+from domino.player import Player
+from domino.server import GameHost, NAMES_SIDES, _encode_move
+
+
+def to_move(message):
+    return Piece.from_values(*message["piece"]).index, NAMES_SIDES[message["side"]]
+
+
+class Client:
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def join(cls, port, players=2, humans=1):
+        client = cls(*await asyncio.open_connection("127.0.0.1", port))
+        await client.send({"type": "join", "players": players, "humans": humans})
+        return client
+
+    async def send(self, message):
+        self.writer.write(json.dumps(message).encode() + b"\n")
+        await self.writer.drain()
+
+    async def receive(self):
+        return json.loads(await asyncio.wait_for(self.reader.readline(), 5))
+
+    def close(self):
+        self.writer.close()
+
+
+class SlowPlayer(Player):
+    """Estrategia que se ejecuta en el executor."""
+
+    def choose_move(self, state, moves):
+        time.sleep(0.001)
+        return super().choose_move(state, moves)
+
+
+def test_remote_player_moves_and_falls_back_to_max_piece():
+    async def main():
+        host = GameHost(port=0, turn_timeout=0.2)
+        await host.start()
+        client = await Client.join(host.port)
+
+        start = await client.receive()
+        assert start["type"] == "start" and start["seat"] == 0
+        assert len(start["hand"]) == 7
+
+        # Primer turno: una jugada válida que no es la de más puntos, si la
+        # hay. Segundo turno: una jugada inválida. Luego no se responde.
+        answers = ["valid", "invalid"]
+        checked = []
+        message = await client.receive()
+        while message["type"] != "end":
+            if message["type"] == "turn":
+                moves = [to_move(move) for move in message["moves"]]
+                expected = bitboard.choose_max_piece(None, moves)
+                answer = answers.pop(0) if answers else "late"
+                if answer == "valid":
+                    expected = min(moves, key=lambda move: PIECES_PIPS[move[0]])
+                    await client.send(dict(_encode_move(expected), type="move",
+                                           turn=message["turn"]))
+                elif answer == "invalid":
+                    await client.send({"type": "move", "turn": message["turn"],
+                                       "piece": [9, 9], "side": "A"})
+                    assert (await client.receive())["type"] == "error"
+                message = await client.receive()
+                assert message["type"] == "played" and message["seat"] == 0
+                checked.append((answer, to_move(message) == expected))
+            message = await client.receive()
+
+        assert message["winner"] in (-1, 0, 1)
+        assert checked and all(ok for _, ok in checked)
+        late = sum(answer == "late" for answer, _ in checked)
+        assert host.get_stats()["timeouts"] == late
+        client.close()
+        await host.close()
+
+    asyncio.run(main())
+
+
+def test_close_drains_active_tables():
+    async def main():
+        host = GameHost(port=0, ai=SlowPlayer)
+        await host.start()
+        tasks = [host.add_table(players) for players in (2, 3, 4) * 3]
+        await asyncio.sleep(0)
+        assert host.get_stats()["tables_active"] == len(tasks)
+
+        await host.close()
+        for task in tasks:
+            assert not task.cancelled()
+            assert isinstance(task.result(), Game) and task.result().is_finished()
+        assert host.get_stats()["tables_served"] == len(tasks)
+
+    asyncio.run(main())
+
+
+def test_bot_tables_do_not_stall_the_loop():
+    async def main():
+        host = GameHost(port=0)
+        gaps = []
+
+        async def heartbeat():
+            loop = asyncio.get_running_loop()
+            while True:
+                started = loop.time()
+                await asyncio.sleep(0.001)
+                gaps.append(loop.time() - started)
+
+        beat = asyncio.get_running_loop().create_task(heartbeat())
+        await asyncio.sleep(0.01)
+        started = time.perf_counter()
+        tasks = [host.add_table(4) for _ in range(200)]
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+        beat.cancel()
+        await host.close()
+
+        assert all(task.result().is_finished() for task in tasks)
+        # Cada vuelta del ciclo avanza un turno de cada mesa, así que el
+        # retraso es una fracción del tiempo total y no crece con el largo
+        # de las partidas.
+        assert len(gaps) > 5
+        assert max(gaps) < elapsed / 4
+
+    asyncio.run(main())
@@ -0,0 +1,19 @@
+from domino.player import PLAYER1, PLAYER2, PLAYER3
+from domino.simulate import Simulation, simulate
+
+
+def test_results_are_reproducible_with_any_workers():
+    expected = list(simulate(50, PLAYER1, PLAYER2, PLAYER3, workers=1, seed=5,
+                             chunk_size=4))
+    assert len(expected) == 50
+    for workers in (1, 2):
+        results = list(simulate(50, PLAYER1, PLAYER2, PLAYER3, workers=workers,
+                                seed=5, chunk_size=4))
+        assert results == expected
+
+
+def test_neighbouring_seeds_do_not_share_shards():
+    first = Simulation(10000, [PLAYER1, PLAYER2], seed=0, chunk_size=100).get_shards()
+    second = Simulation(10000, [PLAYER1, PLAYER2], seed=1, chunk_size=100).get_shards()
+    assert [games for games, _ in first] == [100] * 100
+    assert not {seed for _, seed in first} & {seed for _, seed in second}
@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+from domino import bitboard
+from domino.exceptions import DominoError
+from domino.game import Game
+from domino.player import PLAYER1, PLAYER2, PLAYER3
+from domino.solver import EndgameSolver
+
+
+def apply(state, move):
+    if move is None:
+        return bitboard.pass_turn(state)
+    return bitboard.play(state, *move)
+
+
+def minimax(state):
+    """Margen del jugador en turno, recorriendo todo el árbol."""
+    if bitboard.is_finished(state):
+        own, other = state.hands[state.turn], state.hands[1 - state.turn]
+        return bitboard.count_pips(other) - bitboard.count_pips(own)
+    moves = bitboard.legal_moves(state) or [None]
+    return max(-minimax(apply(state, move)) for move in moves)
+
+
+def get_endgames(count):
+    rng = random.Random(4)
+    states = []
+    seed = 0
+    while len(states) < count:
+        state = Game.create(PLAYER1, PLAYER2, seed=seed).get_state()
+        seed += 1
+        for _ in range(rng.randint(5, 9)):
+            if bitboard.is_finished(state):
+                break
+            moves = bitboard.legal_moves(state)
+            state = apply(state, bitboard.choose_max_piece(state, moves) if moves else None)
+        if not bitboard.is_finished(state):
+            states.append(state)
+    return states
+
+
+@pytest.mark.parametrize("table_size", [1 << 18, 16])
+def test_solver_matches_minimax(table_size):
+    solver = EndgameSolver(table_size)
+    for state in get_endgames(25):
+        result = solver.solve_state(state)
+        expected = minimax(state)
+        assert result.margin == expected
+        if result.move is None:
+            assert not bitboard.legal_moves(state)
+        else:
+            assert result.move in bitboard.legal_moves(state)
+            assert -minimax(apply(state, result.move)) == expected
+    # Con una tabla pequeña las posiciones se reemplazan entre sí.
+    assert solver.evictions or table_size > 16
+
+
+def test_solver_rejects_more_than_two_players():
+    game = Game.create(PLAYER1, PLAYER2, PLAYER3, seed=1)
+    with pytest.raises(DominoError):
+        EndgameSolver().solve(game, PLAYER1)
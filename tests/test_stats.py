@@ -0,0 +1,9 @@
+from domino.stats import collect_simulation
+
+
+def test_results_do_not_depend_on_the_workers():
+    expected = collect_simulation(60, players=3, workers=1, chunk_size=7).to_dict()
+    assert expected["games"] == 60
+    for workers in (2, None):
+        stats = collect_simulation(60, players=3, workers=workers, chunk_size=7)
+        assert stats.to_dict() == expected
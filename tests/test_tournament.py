@@ -0,0 +1,55 @@
+import functools
+
+import pytest
+
+from domino.exceptions import DominoError
+from domino.ismcts import ISMCTSPlayer
+from domino.player import Player
+from domino.tournament import Entrant, Tournament, format_standings, wilson_interval
+
+
+ENTRANTS = [
+    Entrant("max", Player),
+    Entrant("mcts", functools.partial(ISMCTSPlayer, iterations=20, seed=1)),
+    Entrant("max2", Player),
+]
+
+
+def test_standings_do_not_depend_on_the_workers():
+    expected = Tournament(ENTRANTS, deals=6, seed=3, workers=1, chunk_size=4).run()
+    assert Tournament(ENTRANTS, deals=6, seed=3, workers=2, chunk_size=4).run() == expected
+    assert format_standings(expected).count("\n") >= len(ENTRANTS)
+
+
+def test_checkpoint_resumes_after_an_interrupted_write(tmp_path):
+    path = str(tmp_path / "tournament.jsonl")
+    expected = Tournament(ENTRANTS, deals=6, seed=3, workers=1, chunk_size=2,
+                          checkpoint=path).run()
+
+    with open(path) as file:
+        lines = file.read().splitlines()
+    with open(path, "w") as file:
+        file.write("\n".join(lines[:4]) + "\n" + lines[4][:15])
+
+    resumed = Tournament(ENTRANTS, deals=6, seed=3, workers=1, chunk_size=2,
+                         checkpoint=path)
+    assert resumed.done == 3 and resumed.total == 9
+    assert resumed.run() == expected
+
+    with pytest.raises(DominoError):
+        Tournament(ENTRANTS, deals=7, seed=3, checkpoint=path)
+
+
+def test_four_player_tables():
+    entrants = ENTRANTS + [Entrant("max3", Player)]
+    standings = Tournament(entrants, players=4, deals=3, seed=1, workers=1).run()
+    assert sorted(standing.name for standing in standings) == sorted(
+        entrant.name for entrant in entrants)
+    for standing in standings:
+        assert standing.games == standing.wins + standing.draws + standing.losses
+
+
+def test_wilson_interval_contains_the_rate():
+    low, high = wilson_interval(30, 100)
+    assert 0 <= low < 0.3 < high <= 1
+    assert wilson_interval(0, 0) == (0.0, 1.0)
@@ -0,0 +1,36 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from domino import bitboard
+from domino.game import Game
+from domino.piece import DOUBLE_NINE, DOUBLE_SIX
+from domino.player import ALL_PLAYERS
+from domino.vectorized import GameBatch
+
+
+POLICIES = [("max", bitboard.choose_max_piece),
+            ("heaviest", bitboard.choose_heaviest_piece)]
+
+
+@pytest.mark.parametrize("piece_set", [DOUBLE_SIX, DOUBLE_NINE], ids=["double-six", "double-nine"])
+@pytest.mark.parametrize("name, policy", POLICIES, ids=[name for name, _ in POLICIES])
+@pytest.mark.parametrize("players", [2, 3, 4])
+def test_batch_matches_bitboard_playout(players, name, policy, piece_set):
+    states = [Game.create(*ALL_PLAYERS[:players], seed=seed, piece_set=piece_set).get_state()
+              for seed in range(300)]
+    result = GameBatch.from_states(states).run(name)
+
+    for g, state in enumerate(states):
+        final, turns = bitboard.playout(state, [policy] * players)
+        assert result.turns[g] == turns
+        assert result.winners[g] == bitboard.get_winner(final)
+        assert tuple(result.pips[g]) == tuple(bitboard.count_pips(hand) for hand in final.hands)
+
+
+def test_random_policy_finishes_every_game():
+    batch = GameBatch.deal(500, 4, np.random.default_rng(1))
+    result = batch.run(["max", "random", "heaviest", "random"])
+    assert len(result.winners) == 500
+    assert set(np.unique(result.winners)) <= {-1, 0, 1, 2, 3}
+    assert (result.pips >= 0).all()